@@ -0,0 +1,57 @@
+"""
+Compare file size and metadata read time of NXmx files written with and without compact layout.
+
+Run with:
+    python benchmarks/bench_compact_layout.py [-n REPEATS]
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from common import make_nxmx_writer, read_all_metadata
+
+
+def run(repeats: int = 20) -> dict[str, dict[str, float]]:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for compact in [False, True]:
+            label = "compact" if compact else "default"
+            filename = Path(tmpdir) / f"bench_{label}.nxs"
+            t0 = time.perf_counter()
+            make_nxmx_writer(filename).write(
+                image_filename="bench_data", compact_layout=compact
+            )
+            write_time = time.perf_counter() - t0
+            read_times = []
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                read_all_metadata(filename)
+                read_times.append(time.perf_counter() - t0)
+            results[label] = {
+                "file_size_bytes": filename.stat().st_size,
+                "write_time_s": write_time,
+                "read_time_s": float(np.median(read_times)),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--repeats", type=int, default=20)
+    args = parser.parse_args()
+    results = run(args.repeats)
+    print(f"{'layout':<10}{'size (B)':>12}{'write (ms)':>12}{'read (ms)':>12}")
+    for label, res in results.items():
+        print(
+            f"{label:<10}{res['file_size_bytes']:>12}"
+            f"{res['write_time_s'] * 1e3:>12.2f}{res['read_time_s'] * 1e3:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare write, open and metadata read times of NXmx files written with each HDF5 property profile.
+
+The files are written to the target directory, which should live on the filesystem of interest.
+
+Run with:
+    python benchmarks/bench_h5_profiles.py [-d DIRECTORY] [-n REPEATS]
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import h5py
+import numpy as np
+from common import make_nxmx_writer, read_all_metadata
+
+from nexgen.h5_profiles import H5_PROFILES
+
+
+def run(directory: Path | None = None, repeats: int = 20) -> dict[str, dict]:
+    results = {}
+    with tempfile.TemporaryDirectory(dir=directory) as tmpdir:
+        for name in H5_PROFILES.keys():
+            filename = Path(tmpdir) / f"bench_{name}.nxs"
+            t0 = time.perf_counter()
+            make_nxmx_writer(filename, h5_profile=name).write(
+                image_filename="bench_data"
+            )
+            write_time = time.perf_counter() - t0
+            open_times = []
+            read_times = []
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                with h5py.File(filename, "r"):
+                    pass
+                open_times.append(time.perf_counter() - t0)
+                t0 = time.perf_counter()
+                read_all_metadata(filename)
+                read_times.append(time.perf_counter() - t0)
+            results[name] = {
+                "file_size_bytes": filename.stat().st_size,
+                "write_time_s": write_time,
+                "open_time_s": float(np.median(open_times)),
+                "read_time_s": float(np.median(read_times)),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-d", "--directory", type=Path, default=None)
+    parser.add_argument("-n", "--repeats", type=int, default=20)
+    args = parser.parse_args()
+    results = run(args.directory, args.repeats)
+    print(
+        f"{'profile':<12}{'size (B)':>12}{'write (ms)':>12}{'open (ms)':>12}{'read (ms)':>12}"
+    )
+    for name, res in results.items():
+        print(
+            f"{name:<12}{res['file_size_bytes']:>12}{res['write_time_s'] * 1e3:>12.2f}"
+            f"{res['open_time_s'] * 1e3:>12.2f}{res['read_time_s'] * 1e3:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Compare the path lookups done by the meta file readers, with the old substring scan over \
+the whole object list and with the path index, on meta files with large _dectris groups \
+and Tristan meta files with many modules.
+
+The file is visited once either way, so the time taken by the visit is reported \
+separately from the lookups.
+
+Run with:
+    python benchmarks/bench_meta_index.py [-s SIZES] [-n REPEATS]
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import h5py
+import numpy as np
+from common import make_eiger_meta_file
+
+from nexgen.tools.metafile import PathIndex
+
+DEFAULT_SIZES = [100, 1_000, 10_000]
+
+# Lookups done when writing a NeXus file from an Eiger meta file
+DECTRIS_KEYS = [
+    "nimages",
+    "ntrigger",
+    "pixels_in_detector",
+    "pixel_size",
+    "beam_center",
+    "wavelength",
+    "detector_distance",
+    "countrate_correction_count_cutoff",
+    "sensor_material",
+    "sensor_thickness",
+    "bit_depth_image",
+    "software_version",
+    "threshold_energy",
+    "bit_depth_readout",
+    "detector_number",
+    "detector_readout_time",
+    "mask_applied",
+    "flatfield_correction_applied",
+]
+
+TRISTAN_KEYS = ["software_version", "meta_version"]
+
+
+def make_large_dectris_meta_file(filename: Path, num_entries: int):
+    """Eiger meta file with num_entries extra datasets in the _dectris group, as written \
+    for detectors with many thresholds and modules."""
+    make_eiger_meta_file(filename, 10)
+    with h5py.File(filename, "r+") as fh:
+        for n in range(num_entries):
+            fh[f"_dectris/detector_module_{n:05d}_calibration"] = np.zeros(1)
+
+
+def make_tristan_meta_file(filename: Path, num_entries: int):
+    """Tristan meta file with cue datasets for num_entries modules."""
+    with h5py.File(filename, "w") as fh:
+        fh["meta_version"] = 1
+        for n in range(num_entries):
+            fh[f"ts_qty_module{n % 100:02d}_{n // 100:03d}"] = np.zeros(2)
+            fh[f"module_{n:05d}/cue_id"] = np.zeros(2, dtype=np.uint16)
+            fh[f"module_{n:05d}/cue_timestamp_zero"] = np.zeros(2, dtype=np.uint64)
+
+
+def visit(handle: h5py.File) -> list[str]:
+    walk = []
+    handle.visit(walk.append)
+    return walk
+
+
+def scan(walk: list[str], keys: list[str]):
+    for key in keys:
+        _ = [obj for obj in walk if key in obj]
+
+
+def indexed(index: PathIndex, keys: list[str]):
+    for key in keys:
+        index.find(key)
+
+
+CASES = {
+    "dectris": (make_large_dectris_meta_file, DECTRIS_KEYS),
+    "tristan": (make_tristan_meta_file, TRISTAN_KEYS),
+}
+
+
+def best_time(fn, make_args, repeats: int) -> float:
+    """Best time of fn(*make_args()), excluding the time taken by make_args."""
+    times = []
+    for _ in range(repeats):
+        args = make_args()
+        t0 = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-s",
+        "--sizes",
+        type=lambda s: [int(x) for x in s.split(",")],
+        default=DEFAULT_SIZES,
+        help="Comma separated list of numbers of extra entries in the meta file.",
+    )
+    parser.add_argument("-n", "--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'case':<10}{'entries':>10}{'visit (ms)':>12}{'scan (ms)':>12}"
+        f"{'index (ms)':>12}{'speedup':>9}"
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, (make_file, keys) in CASES.items():
+            for size in args.sizes:
+                filename = Path(tmpdir) / f"{name}_{size}_meta.h5"
+                make_file(filename, size)
+                with h5py.File(filename, "r") as fh:
+                    t_visit = best_time(visit, lambda: (fh,), args.repeats)
+                    walk = visit(fh)
+                    t_scan = best_time(scan, lambda: (walk, keys), args.repeats)
+                    t_index = best_time(
+                        indexed, lambda: (PathIndex(fh), keys), args.repeats
+                    )
+                print(
+                    f"{name:<10}{size:>10}{t_visit * 1e3:>12.2f}{t_scan * 1e3:>12.2f}"
+                    f"{t_index * 1e3:>12.2f}{t_scan / t_index:>9.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measure the import time of the nexgen command line tools and main modules with \
+`python -X importtime`, and check it against the start up budget.
+
+Exits with a non-zero status if any module goes over its budget.
+
+Run with:
+    python benchmarks/bench_startup.py [-n REPEATS]
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+
+import numpy as np
+
+# Cumulative import time budget for each module, in ms
+BUDGETS_MS = {
+    "nexgen.__main__": 250,
+    "nexgen.utils": 250,
+    "nexgen.command_line.SSX_cli": 300,
+    "nexgen.command_line.I19_2_cli": 300,
+    "nexgen.nxs_write.nxmx_writer": 700,
+}
+
+
+def import_time(module: str) -> float:
+    """Cumulative import time of a module in a fresh interpreter, in ms."""
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Lines look like "import time: <self us> | <cumulative us> | <module>"
+    for line in res.stderr.splitlines():
+        if line.count("|") != 2:
+            continue
+        _, cumulative, name = (s.strip() for s in line.split("|"))
+        if name == module and cumulative.isdigit():
+            return int(cumulative) / 1e3
+    raise RuntimeError(f"No import time found for {module}.")
+
+
+def run(repeats: int = 5) -> dict[str, dict[str, float]]:
+    results = {}
+    for module, budget in BUDGETS_MS.items():
+        times = [import_time(module) for _ in range(repeats)]
+        results[module] = {
+            "import_time_ms": float(np.median(times)),
+            "budget_ms": budget,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--repeats", type=int, default=5)
+    args = parser.parse_args()
+    results = run(args.repeats)
+    print(f"{'module':<35}{'import (ms)':>14}{'budget (ms)':>14}")
+    over_budget = []
+    for module, res in results.items():
+        print(f"{module:<35}{res['import_time_ms']:>14.1f}{res['budget_ms']:>14}")
+        if res["import_time_ms"] > res["budget_ms"]:
+            over_budget.append(module)
+    if over_budget:
+        sys.exit(f"Import time over budget for: {', '.join(over_budget)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Benchmark suite for the NeXus writers, VDS, scan calculations, copy tools, MRC conversion \
+and meta file parsing, run on synthesized collections of increasing size.
+
+The results are saved to benchmarks/results/<nexgen version>.json, so that they can be \
+compared between releases with --compare.
+
+Run with:
+    python benchmarks/bench_suite.py [-s SIZES] [-k CASES] [-n REPEATS] [-o OUTPUT] [--compare FILE]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import h5py
+import numpy as np
+from common import (
+    BENCH_IMAGE_SIZE,
+    make_eiger_meta_file,
+    make_image_files,
+    make_nxmx_writer,
+)
+
+import nexgen
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# A case gets a working directory and a collection size, synthesizes whatever it needs and
+# returns the function to be timed.
+Case = Callable[[Path, int], Callable[[], object]]
+
+
+def _write_collection(wdir: Path, size: int):
+    datafiles = make_image_files(wdir, "bench", size)
+    writer = make_nxmx_writer(wdir / "bench.nxs", size, BENCH_IMAGE_SIZE)
+    return writer, datafiles
+
+
+def nxmx_write(wdir: Path, size: int):
+    writer, datafiles = _write_collection(wdir, size)
+
+    def run():
+        writer.write(image_datafiles=datafiles, write_mode="w")
+
+    return run
+
+
+def nxmx_write_vds(wdir: Path, size: int):
+    writer, datafiles = _write_collection(wdir, size)
+
+    def run():
+        writer.write(image_datafiles=datafiles, write_mode="w")
+        writer.write_vds(vds_dtype=np.uint16)
+
+    return run
+
+
+def scan_rotation(wdir: Path, size: int):
+    from nexgen.nxs_utils import Axis, TransformationType
+    from nexgen.nxs_utils.scan_utils import calculate_scan_points
+
+    axis = Axis("omega", ".", TransformationType.ROTATION, (-1, 0, 0), 0.0, 0.1, size)
+    return lambda: calculate_scan_points(axis, rotation=True, tot_num_imgs=size)
+
+
+def scan_grid(wdir: Path, size: int):
+    from nexgen.nxs_utils import Axis, TransformationType
+    from nexgen.nxs_utils.scan_utils import calculate_scan_points
+
+    n = int(math.sqrt(size))
+    axis1 = Axis("sam_y", ".", TransformationType.TRANSLATION, (0, 1, 0), 0, 0.1, n)
+    axis2 = Axis("sam_x", "sam_y", TransformationType.TRANSLATION, (1, 0, 0), 0, 0.1, n)
+    return lambda: calculate_scan_points(axis1, axis2, snaked=True)
+
+
+def ssx_fixed_target(wdir: Path, size: int):
+    from nexgen.beamlines.beamline_utils import PumpProbe
+    from nexgen.beamlines.SSX_expt import run_fixed_target
+    from nexgen.nxs_utils import Axis, TransformationType
+
+    # Full chip of 8x8 blocks, with as many windows per block as needed to reach size
+    steps = max(1, int(math.sqrt(size / 64)))
+    chip_info = {
+        "X_NUM_STEPS": [0, steps],
+        "Y_NUM_STEPS": [0, steps],
+        "X_STEP_SIZE": [0, 0.125],
+        "Y_STEP_SIZE": [0, 0.125],
+        "X_START": [0, 0],
+        "Y_START": [0, 0],
+        "Z_START": [0, 0],
+        "X_NUM_BLOCKS": [0, 8],
+        "Y_NUM_BLOCKS": [0, 8],
+        "X_BLOCK_SIZE": [0, 3.175],
+        "Y_BLOCK_SIZE": [0, 3.175],
+        "N_EXPOSURES": [0, 1],
+        "PUMP_REPEAT": [0, 0],
+    }
+    axes = [
+        Axis("omega", ".", TransformationType.ROTATION, (0, 0, -1)),
+        Axis("sam_z", "omega", TransformationType.TRANSLATION, (0, 0, 1)),
+        Axis("sam_y", "sam_z", TransformationType.TRANSLATION, (0, 1, 0)),
+        Axis("sam_x", "sam_y", TransformationType.TRANSLATION, (1, 0, 0)),
+    ]
+    return lambda: run_fixed_target(axes, chip_info, PumpProbe())
+
+
+def copy_nexus_tree(wdir: Path, size: int):
+    from nexgen.nxs_copy.copy_utils import get_nexus_tree
+
+    writer = make_nxmx_writer(wdir / "bench.nxs", size, BENCH_IMAGE_SIZE)
+    writer.write(image_filename="bench_data")
+
+    def run():
+        with (
+            h5py.File(wdir / "bench.nxs", "r") as nxs_in,
+            h5py.File(wdir / "bench_copy.nxs", "w") as nxs_out,
+        ):
+            get_nexus_tree(nxs_in, nxs_out, skip=False)
+
+    return run
+
+
+def mrc_to_hdf5(wdir: Path, size: int):
+    import logging
+
+    import mrcfile
+
+    from nexgen.tools.mrc_tools import to_hdf5_data_file
+
+    mrc_file = wdir / "bench.mrc"
+    with mrcfile.new_mmap(
+        mrc_file, shape=(size, *BENCH_IMAGE_SIZE), mrc_mode=1, overwrite=True
+    ) as mrc:
+        mrc.data[:] = 1
+
+    def run():
+        # The converted file is written to the working directory
+        cwd = os.getcwd()
+        os.chdir(wdir)
+        try:
+            to_hdf5_data_file([str(mrc_file)], logging.getLogger("bench"))
+        finally:
+            os.chdir(cwd)
+
+    return run
+
+
+def meta_file_parsing(wdir: Path, size: int):
+    from nexgen.tools.metafile import DectrisMetafile
+
+    meta_file = wdir / "bench_meta.h5"
+    make_eiger_meta_file(meta_file, size)
+
+    def run():
+        with h5py.File(meta_file, "r") as fh:
+            meta = DectrisMetafile(fh)
+            meta.read_dectris_config()
+            meta.get_full_number_of_images()
+            meta.get_detector_size()
+            meta.get_beam_center()
+            meta.find_mask()
+            meta.find_flatfield()
+
+    return run
+
+
+# Cases, with the largest collection size they're run for
+CASES: dict[str, tuple[Case, int]] = {
+    "nxmx_write": (nxmx_write, 1_000_000),
+    "nxmx_write_vds": (nxmx_write_vds, 1_000_000),
+    "scan_rotation": (scan_rotation, 1_000_000),
+    "scan_grid": (scan_grid, 1_000_000),
+    "ssx_fixed_target": (ssx_fixed_target, 1_000_000),
+    "copy_nexus_tree": (copy_nexus_tree, 1_000_000),
+    # 2 KiB per frame, keep the scratch space needed reasonable
+    "mrc_to_hdf5": (mrc_to_hdf5, 100_000),
+    "meta_file_parsing": (meta_file_parsing, 1_000_000),
+}
+
+
+def run(
+    sizes: list[int] = DEFAULT_SIZES,
+    cases: list[str] | None = None,
+    repeats: int = 3,
+    directory: Path | None = None,
+) -> dict[str, dict[str, dict[str, float]]]:
+    """Run the benchmark cases, returning the best time of each for every size."""
+    results = {}
+    for name in cases if cases else CASES.keys():
+        case, max_size = CASES[name]
+        results[name] = {}
+        for size in sizes:
+            if size > max_size:
+                continue
+            with tempfile.TemporaryDirectory(dir=directory) as tmpdir:
+                t0 = time.perf_counter()
+                fn = case(Path(tmpdir), size)
+                setup_time = time.perf_counter() - t0
+                # Warm up, so that lazy imports and caches don't count
+                fn()
+                times = []
+                for _ in range(repeats):
+                    t0 = time.perf_counter()
+                    fn()
+                    times.append(time.perf_counter() - t0)
+            results[name][str(size)] = {
+                "time_s": min(times),
+                "median_s": float(np.median(times)),
+                "setup_s": setup_time,
+            }
+            print(f"{name:<20}{size:>10}{min(times) * 1e3:>14.2f} ms", flush=True)
+    return results
+
+
+def machine_info() -> dict[str, str]:
+    return {
+        "nexgen": nexgen.__version__,
+        "python": platform.python_version(),
+        "h5py": h5py.version.version,
+        "hdf5": h5py.version.hdf5_version,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def compare(results: dict, reference: dict):
+    """Print the ratio of the current timings to a reference run."""
+    print(f"\n{'case':<20}{'size':>10}{'ref (ms)':>12}{'now (ms)':>12}{'ratio':>8}")
+    for name, by_size in results.items():
+        for size, res in by_size.items():
+            ref = reference.get(name, {}).get(size)
+            if ref is None:
+                continue
+            print(
+                f"{name:<20}{size:>10}{ref['time_s'] * 1e3:>12.2f}"
+                f"{res['time_s'] * 1e3:>12.2f}{res['time_s'] / ref['time_s']:>8.2f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-s",
+        "--sizes",
+        type=lambda s: [int(x) for x in s.split(",")],
+        default=DEFAULT_SIZES,
+        help="Comma separated list of collection sizes, in frames.",
+    )
+    parser.add_argument(
+        "-k", "--cases", nargs="+", choices=list(CASES.keys()), default=None
+    )
+    parser.add_argument("-n", "--repeats", type=int, default=3)
+    parser.add_argument(
+        "-d", "--directory", type=Path, default=None, help="Scratch directory."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=RESULTS_DIR / f"{nexgen.__version__}.json",
+        help="Where to save the results.",
+    )
+    parser.add_argument(
+        "--compare", type=Path, default=None, help="Reference results to compare to."
+    )
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.cases, args.repeats, args.directory)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as fh:
+        json.dump({"machine": machine_info(), "results": results}, fh, indent=2)
+    print(f"Results saved to {args.output}.")
+
+    if args.compare:
+        with open(args.compare) as fh:
+            compare(results, json.load(fh)["results"])
+
+
+if __name__ == "__main__":
+    main()
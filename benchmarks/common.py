@@ -0,0 +1,145 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from nexgen.nxs_utils import (
+    Attenuator,
+    Axis,
+    Beam,
+    Detector,
+    EigerDetector,
+    Goniometer,
+    Source,
+    TransformationType,
+)
+from nexgen.nxs_write.nxmx_writer import NXmxFileWriter
+
+# Small detector used for the collections synthesized with data on disk
+BENCH_IMAGE_SIZE = (32, 32)
+# Frames per data file, as written by the Eiger
+FRAMES_PER_FILE = 1000
+
+
+def make_nxmx_writer(
+    filename: Path,
+    num_frames: int = 3600,
+    image_size: tuple[int, int] = (3262, 3108),
+    **kwargs,
+) -> NXmxFileWriter:
+    gonio = Goniometer(
+        [
+            Axis(
+                "omega",
+                ".",
+                TransformationType.ROTATION,
+                (-1, 0, 0),
+                0.0,
+                360 / num_frames,
+                num_frames,
+            ),
+            Axis("sam_z", "omega", TransformationType.TRANSLATION, (0, -1, 0)),
+            Axis("sam_y", "sam_z", TransformationType.TRANSLATION, (-1, 0, 0)),
+            Axis("sam_x", "sam_y", TransformationType.TRANSLATION, (0, 0, 1)),
+        ],
+    )
+    det = Detector(
+        EigerDetector("Eiger 2X 9M", list(image_size), "CdTe", 50649, -1),
+        [Axis("det_z", ".", TransformationType.TRANSLATION, (0, 0, 1), 500.0)],
+        [1590.7, 1643.7],
+        0.01,
+        [(-1, 0, 0), (0, -1, 0)],
+    )
+    return NXmxFileWriter(
+        filename,
+        gonio,
+        det,
+        Source("I03"),
+        Beam(wavelength=0.6),
+        Attenuator(transmission=10.0),
+        num_frames,
+        **kwargs,
+    )
+
+
+def read_all_metadata(filename: Path):
+    """Visit every object and read all datasets and attributes, as a DIALS-style consumer would."""
+
+    def _read(_name, obj):
+        for v in obj.attrs.values():
+            _ = v
+        if isinstance(obj, h5py.Dataset) and not obj.is_virtual:
+            _ = obj[()]
+
+    with h5py.File(filename, "r") as fh:
+        fh.visititems(_read)
+
+
+def make_image_files(
+    directory: Path,
+    stem: str,
+    num_frames: int,
+    image_size: tuple[int, int] = BENCH_IMAGE_SIZE,
+) -> list[Path]:
+    """Synthesize the data files of an image collection, 1000 frames per file.
+
+    The files are written with h5py only, with no chunk allocated, so that the same \
+    collections can be used to measure older releases of nexgen.
+    """
+    num_files = math.ceil(num_frames / FRAMES_PER_FILE)
+    datafiles = [directory / f"{stem}_{n:06d}.h5" for n in range(1, num_files + 1)]
+    for n, filename in enumerate(datafiles):
+        frames = min(FRAMES_PER_FILE, num_frames - n * FRAMES_PER_FILE)
+        with h5py.File(filename, "w") as fh:
+            fh.create_dataset(
+                "data",
+                shape=(frames, *image_size),
+                dtype=np.uint16,
+                chunks=(1, *image_size),
+            )
+    return datafiles
+
+
+def make_eiger_meta_file(
+    filename: Path,
+    num_frames: int,
+    image_size: tuple[int, int] = BENCH_IMAGE_SIZE,
+):
+    """Synthesize a Dectris-style _meta.h5 file, with the detector configuration and the \
+    per-frame records written by the acquisition for each image."""
+    config = {
+        "nimages": num_frames,
+        "ntrigger": 1,
+        "wavelength": 0.6,
+        "x_pixels_in_detector": image_size[1],
+        "y_pixels_in_detector": image_size[0],
+        "x_pixel_size": 7.5e-05,
+        "y_pixel_size": 7.5e-05,
+        "beam_center_x": image_size[1] / 2,
+        "beam_center_y": image_size[0] / 2,
+        "detector_distance": 0.2,
+        "omega_start": 0.0,
+        "omega_increment": 0.1,
+        "bit_depth_image": 32,
+        "countrate_correction_count_cutoff": 126634,
+        "sensor_material": "CdTe",
+        "sensor_thickness": 7.5e-4,
+        "software_version": "1.8.0",
+        "detector_number": "E-32-0100",
+        "data_collection_date": "2024-01-01T10:00:00.000+01:00",
+    }
+    with h5py.File(filename, "w") as fh:
+        fh["config"] = str(config)
+        for k, v in config.items():
+            fh[f"_dectris/{k}"] = np.array([v.encode() if isinstance(v, str) else v])
+        fh["mask"] = np.zeros(image_size, dtype=np.uint32)
+        fh["flatfield"] = np.ones(image_size, dtype=np.float32)
+        for dset in ["frame", "frame_written", "offset_written", "size"]:
+            fh[dset] = np.arange(num_frames, dtype=np.uint64)
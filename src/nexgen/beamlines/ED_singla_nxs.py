@@ -211,15 +211,17 @@ def singla_nexus_writer(
             ED_cs,
             convert_to_mcstas=convert2mcstas,
         )
-        EDFileWriter.write(datafiles, SINGLA_DATA_ENTRY_KEY, start_time)
-        if vds_writer:
-            EDFileWriter.write_vds(
-                writer_type=vds_writer,
-                data_entry_key=SINGLA_DATA_ENTRY_KEY,
-                datafiles=datafiles,
-            )
-        else:
-            logger.info("VDS won't be written.")
+        # Keep the file open across all steps
+        with EDFileWriter.session():
+            EDFileWriter.write(datafiles, SINGLA_DATA_ENTRY_KEY, start_time)
+            if vds_writer:
+                EDFileWriter.write_vds(
+                    writer_type=vds_writer,
+                    data_entry_key=SINGLA_DATA_ENTRY_KEY,
+                    datafiles=datafiles,
+                )
+            else:
+                logger.info("VDS won't be written.")
         logger.info("NeXus file written correctly.")
     except Exception as err:
         logger.exception(err)
@@ -32,7 +32,7 @@ from ..nxs_utils import (
 from ..nxs_utils.scan_utils import calculate_scan_points, identify_osc_axis
 from ..nxs_write.nxmx_writer import EventNXmxFileWriter, NXmxFileWriter
 from ..tools.meta_reader import define_vds_data_type, update_axes_from_meta
-from ..tools.metafile import DectrisMetafile
+from ..tools.metafile import DectrisMetafile, DectrisStream2Metafile
 from .beamline_utils import GeneralParams, collection_summary_log
 from .I19_2_params import I19_2Eiger, I19_2Tristan
 
@@ -306,8 +306,13 @@ def eiger_writer(
     # Update axes
     if use_meta:
         logger.info("User requested to update metadata using meta file.")
+        meta_reader = (
+            DectrisStream2Metafile
+            if stream_format == EigerStreamFormat.CBOR
+            else DectrisMetafile
+        )
         with h5py.File(TR.metafile, "r", libver="latest", swmr=True) as mh:
-            meta = DectrisMetafile(mh)
+            meta = meta_reader(mh)
             TR.tot_num_images = meta.get_full_number_of_images()
             logger.info(
                 f"Total number of images for this collection found in meta file: {TR.tot_num_images}."
@@ -430,20 +435,22 @@ def eiger_writer(
             TR.tot_num_images,
             sample,
         )
-        NXmx_writer.write(
-            image_filename=image_filename,
-            start_time=timestamps[0],
-            data_entry_key=data_entry_key,
-        )
-        NXmx_writer.write_vds(
-            vds_offset=vds_offset,
-            vds_shape=(n_frames, *detector.detector_params.image_size),
-            vds_dtype=vds_dtype,
-        )
-        if timestamps[1]:
-            NXmx_writer.update_timestamps(timestamps[1], "end_time")
-        if notes:
-            NXmx_writer.add_NXnote(notes)
+        # Keep the file open across all steps
+        with NXmx_writer.session():
+            NXmx_writer.write(
+                image_filename=image_filename,
+                start_time=timestamps[0],
+                data_entry_key=data_entry_key,
+            )
+            NXmx_writer.write_vds(
+                vds_offset=vds_offset,
+                vds_shape=(n_frames, *detector.detector_params.image_size),
+                vds_dtype=vds_dtype,
+            )
+            if timestamps[1]:
+                NXmx_writer.update_timestamps(timestamps[1], "end_time")
+            if notes:
+                NXmx_writer.add_NXnote(notes)
         logger.info(f"The file {master_file} was written correctly.")
     except Exception as err:
         logger.exception(err)
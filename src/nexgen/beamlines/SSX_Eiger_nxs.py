@@ -369,18 +369,20 @@ def ssx_eiger_writer(
             sample,
         )
         image_filename = metafile.as_posix().replace("_meta.h5", "")
-        NXmx_Writer.write(image_filename=image_filename, start_time=timestamps[0])
-        if pump_status is True:
-            logger.info("Write pump information to file.")
-            NXmx_Writer.add_NXnote(
-                notes=pump_info,
-                loc="/entry/source/notes",
+        # Keep the file open across all steps
+        with NXmx_Writer.session():
+            NXmx_Writer.write(image_filename=image_filename, start_time=timestamps[0])
+            if pump_status is True:
+                logger.info("Write pump information to file.")
+                NXmx_Writer.add_NXnote(
+                    notes=pump_info,
+                    loc="/entry/source/notes",
+                )
+            NXmx_Writer.update_timestamps(timestamps[1], "end_time")
+            NXmx_Writer.write_vds(
+                vds_shape=(tot_num_imgs, *detector.detector_params.image_size),
+                vds_dtype=vds_dtype,
             )
-        NXmx_Writer.update_timestamps(timestamps[1], "end_time")
-        NXmx_Writer.write_vds(
-            vds_shape=(tot_num_imgs, *detector.detector_params.image_size),
-            vds_dtype=vds_dtype,
-        )
         logger.info(f"The file {master_file} was written correctly.")
     except Exception as err:
         logger.exception(err)
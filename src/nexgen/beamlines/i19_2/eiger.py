@@ -18,7 +18,7 @@ from nexgen.nxs_utils.scan_utils import calculate_scan_points, identify_osc_axis
 from nexgen.nxs_utils.source import Attenuator, Beam, Source
 from nexgen.nxs_write.nxmx_writer import NXmxFileWriter
 from nexgen.tools.meta_reader import define_vds_data_type, update_axes_from_meta
-from nexgen.tools.metafile import DectrisMetafile
+from nexgen.tools.metafile import DectrisMetafile, DectrisStream2Metafile
 from nexgen.tools.vds_tools import (
     VdsMapping,
     VdsSettings,
@@ -76,15 +76,21 @@ def _check_meta_parameters(
             )
 
 
-def _get_info_from_legacy_metafile(
+def _get_info_from_metafile(
     parameters: CollectionParams,
     gonio_axes: list[Axis],
     det_axes: list[Axis],
     n_frames: int | None,
+    stream_format: EigerStreamFormat = EigerStreamFormat.LEGACY,
 ) -> tuple[DTypeLike, int]:
     logger.info("User requested to update metadata using meta file.")
+    meta_reader = (
+        DectrisStream2Metafile
+        if stream_format == EigerStreamFormat.CBOR
+        else DectrisMetafile
+    )
     with h5py.File(parameters.metafile, "r", libver="latest", swmr=True) as mh:
-        meta = DectrisMetafile(mh)
+        meta = meta_reader(mh)
         parameters.tot_num_images = meta.get_full_number_of_images()
         logger.info(
             f"Total number of images for this collection found in meta file: {parameters.tot_num_images}."
@@ -168,12 +174,9 @@ def eiger_writer(
     # Define Detector axes
     det_axes = I19_2_EIGER.det_axes
 
-    if (
-        eiger_settings.use_meta
-        and eiger_settings.stream_format != EigerStreamFormat.CBOR
-    ):
-        vds_dtype, n_frames = _get_info_from_legacy_metafile(
-            parameters, gonio_axes, det_axes, n_frames
+    if eiger_settings.use_meta:
+        vds_dtype, n_frames = _get_info_from_metafile(
+            parameters, gonio_axes, det_axes, n_frames, eiger_settings.stream_format
         )
     else:
         logger.info(
@@ -282,20 +285,22 @@ def start_writer(
             parameters.tot_num_images,
             nx_objects.sample,
         )
-        NXmx_writer.write(
-            image_filename=image_filename,
-            start_time=parameters.timestamps[0],
-            data_entry_key=eiger_settings.data_entry_key,
-        )
-        NXmx_writer.write_vds(
-            vds_offset=vds_settings.vds_offset,
-            vds_shape=vds_settings.vds_shape,
-            vds_dtype=vds_settings.vds_dtype,
-        )  # TODO add mapping
-        if parameters.timestamps[1]:
-            NXmx_writer.update_timestamps(parameters.timestamps[1], "end_time")
-        if notes:
-            NXmx_writer.add_NXnote(notes)
+        # Keep the file open across all steps
+        with NXmx_writer.session():
+            NXmx_writer.write(
+                image_filename=image_filename,
+                start_time=parameters.timestamps[0],
+                data_entry_key=eiger_settings.data_entry_key,
+            )
+            NXmx_writer.write_vds(
+                vds_offset=vds_settings.vds_offset,
+                vds_shape=vds_settings.vds_shape,
+                vds_dtype=vds_settings.vds_dtype,
+            )  # TODO add mapping
+            if parameters.timestamps[1]:
+                NXmx_writer.update_timestamps(parameters.timestamps[1], "end_time")
+            if notes:
+                NXmx_writer.add_NXnote(notes)
         logger.info(f"The file {eiger_settings.master_file} was written correctly.")
     except Exception as err:
         logger.exception(err)
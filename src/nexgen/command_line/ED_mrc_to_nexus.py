@@ -4,9 +4,14 @@ A script to convert a series of individual MRC images into a Nexus format.
 
 import logging
 import os
-from argparse import ArgumentParser
+import re
+import sys
+import time
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import asdict, dataclass
 from logging import Logger
+from multiprocessing import get_all_start_methods, get_context
 from pathlib import Path
 
 import numpy as np
@@ -364,16 +369,28 @@ def log_dict(logger: Logger, dictionary: dict, skip: list = None) -> None:
     logger.info(msg)
 
 
-def main():
-    args = parse_input_arguments()
-    metadata_template = Metadata(args.input_files)
+def convert_mrc_series(
+    mrc_files: list[str], args: Namespace, output_dir: str | Path | None = None
+) -> Path:
+    """Convert one series of MRC images to a HDF5 data file and a NeXus file.
+
+    Args:
+        mrc_files (list[str]): A single MRC file with a stack of images, or a list of \
+            files containing single images.
+        args (Namespace): Parsed command line arguments.
+        output_dir (str | Path | None, optional): Directory for the output files. \
+            Defaults to None, for the current working directory.
+
+    Returns:
+        Path: The NeXus file.
+    """
+    metadata_template = Metadata(mrc_files)
     logger.info("Starting MRC to Nexus conversion.")
 
-    for file in args.input_files:
+    for file in mrc_files:
         if not file.endswith(".mrc"):
             raise ValueError("Not an MRC file: %s" % file)
 
-    mrc_files = args.input_files
     mrc_metadata = get_metadata(mrc_files[0])
     logger.info("Collecting MRC data into a HDF5 h5 file.")
 
@@ -404,7 +421,13 @@ def main():
 
     goniometer = Goniometer(gonio_axes, scan)
 
-    hdf5_file = to_hdf5_data_file(mrc_files, logger, dtype=metadata_template.data_type)
+    hdf5_file = to_hdf5_data_file(
+        mrc_files,
+        logger,
+        dtype=metadata_template.data_type,
+        max_workers=args.max_workers or 1,
+        output_dir=output_dir,
+    )
 
     det_params = CetaDetector(m.detector_name, [m.pixel_number_x, m.pixel_number_y])
 
@@ -447,12 +470,13 @@ def main():
         [EDCeta.fast_axis, EDCeta.slow_axis],
     )
 
-    path = os.getcwd()
+    path = os.getcwd() if output_dir is None else str(output_dir)
 
-    nexus_file = hdf5_file.replace("h5", "nxs")
+    hdf5_name = os.path.basename(hdf5_file)
+    nexus_file = os.path.splitext(hdf5_name)[0] + ".nxs"
     nexus_path = os.path.join(path, nexus_file)
 
-    data_path = os.path.join(path, hdf5_file)
+    data_path = os.path.join(path, hdf5_name)
     data_path = Path(data_path)
 
     logger.info("Writing Nexus file.")
@@ -473,6 +497,211 @@ def main():
     writer.write([data_path], "/entry/data/data")
     writer.write_vds(vds_dtype=m.data_type, datafiles=[data_path])
     logger.info("MRC images converted to Nexus.")
+    return Path(nexus_path)
+
+
+def find_mrc_series(inputs: list[str]) -> dict[str, list[str]]:
+    """Group MRC files, or all the MRC files found in directories, into series.
+
+    Files ending with an index (e.g. some_basename_00001.mrc) belong to the series \
+    some_basename, any other file is a series on its own. Series with the same name in \
+    different directories are told apart by prefixing as many of their parent directory \
+    names as needed.
+
+    Args:
+        inputs (list[str]): MRC files and directories.
+
+    Raises:
+        ValueError: If two series still end up with the same name.
+
+    Returns:
+        dict[str, list[str]]: Sorted files of each series, by series name.
+    """
+    groups: dict[tuple[str, str], list[str]] = {}
+    for item in inputs:
+        if os.path.isdir(item):
+            files = [str(f) for f in sorted(Path(item).glob("*.mrc"))]
+        else:
+            files = [item]
+        for file in files:
+            name = os.path.basename(file)
+            if re.search(r"_(\d+)\.mrc$", name):
+                name = name.rsplit("_", 1)[0]
+            else:
+                name = name.removesuffix(".mrc")
+            key = (os.path.dirname(os.path.abspath(file)), name)
+            groups.setdefault(key, []).append(file)
+
+    labels = {key: key[1] for key in groups}
+    for name in {name for _, name in groups}:
+        keys = [key for key in groups if key[1] == name]
+        if len(keys) == 1:
+            continue
+        for depth in range(1, max(len(Path(d).parts) for d, _ in keys) + 1):
+            candidates = {key: _series_label(*key, depth) for key in keys}
+            if len(set(candidates.values())) == len(keys):
+                break
+        labels.update(candidates)
+
+    series: dict[str, list[str]] = {}
+    for key, files in groups.items():
+        label = labels[key]
+        if label in series:
+            raise ValueError(
+                f"Unable to tell apart MRC series {label} in {key[0]}, please convert "
+                "them separately."
+            )
+        series[label] = sorted(files)
+    return series
+
+
+def _series_label(directory: str, name: str, depth: int) -> str:
+    """Prefix a series name with the names of its last depth parent directories."""
+    parents = Path(directory).parts[1:]
+    return "_".join([*parents[max(len(parents) - depth, 0) :], name])
+
+
+def _mp_context():
+    # Forking skips importing everything again in the workers, but isn't available on
+    # Windows and not safe on macOS
+    if sys.platform != "darwin" and "fork" in get_all_start_methods():
+        return get_context("fork")
+    return None
+
+
+def _convert_series_job(
+    name: str, mrc_files: list[str], args: Namespace, output_dir: Path
+) -> dict:
+    """Convert one series in its own output directory and time it."""
+    series_dir = output_dir / name
+    series_dir.mkdir(parents=True, exist_ok=True)
+    nbytes = sum(os.path.getsize(f) for f in mrc_files)
+    num_images = len(mrc_files)
+    t0 = time.perf_counter()
+    try:
+        shape = get_metadata(mrc_files[0])["data_shape"]
+        if len(mrc_files) == 1 and len(shape) == 3:
+            num_images = shape[0]
+        nexus_file = convert_mrc_series(mrc_files, args, series_dir)
+        error = None
+    except Exception as err:
+        logger.exception(f"Conversion of {name} failed.")
+        nexus_file, error = None, str(err)
+    return {
+        "series": name,
+        "num_images": num_images,
+        "bytes": nbytes,
+        "time": time.perf_counter() - t0,
+        "nexus_file": str(nexus_file) if nexus_file else None,
+        "error": error,
+    }
+
+
+def batch_convert(
+    inputs: list[str],
+    args: Namespace,
+    output_dir: str | Path,
+    max_workers: int | None = None,
+) -> list[dict]:
+    """Convert many MRC series concurrently, each into its own directory.
+
+    The series are converted by a pool of worker processes, forked from this one where \
+    possible so that the modules are only imported once. A failed series is reported in the summary \
+    without stopping the others.
+
+    Args:
+        inputs (list[str]): MRC files and directories, grouped with find_mrc_series.
+        args (Namespace): Parsed command line arguments, applied to all the series.
+        output_dir (str | Path): Directory in which a subdirectory is created for each \
+            series.
+        max_workers (int | None, optional): Number of series converted in parallel. \
+            Defaults to None, for as many as there are CPUs.
+
+    Returns:
+        list[dict]: Summary of the conversion of each series, in input order.
+    """
+    series = find_mrc_series(inputs)
+    output_dir = Path(output_dir).expanduser().resolve()
+    # Parallelism is across series, each one is converted in a single process
+    args = Namespace(**{**vars(args), "max_workers": 1})
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(min(max_workers, len(series)), 1)
+    logger.info(
+        f"Converting {len(series)} MRC series with {max_workers} workers "
+        f"into {output_dir}."
+    )
+
+    t0 = time.perf_counter()
+    if max_workers == 1:
+        results = [
+            _convert_series_job(name, files, args, output_dir)
+            for name, files in series.items()
+        ]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=_mp_context()
+        ) as pool:
+            futures = [
+                pool.submit(_convert_series_job, name, files, args, output_dir)
+                for name, files in series.items()
+            ]
+            results = [fut.result() for fut in futures]
+    log_batch_summary(results, time.perf_counter() - t0)
+    return results
+
+
+def log_batch_summary(results: list[dict], wall_time: float) -> None:
+    """Log the throughput of each converted series and of the whole batch."""
+    msg = "Batch conversion summary:\n"
+    msg += "%-30s %8s %10s %9s %10s %8s\n" % (
+        "series",
+        "images",
+        "MB",
+        "time (s)",
+        "images/s",
+        "MB/s",
+    )
+    for r in results:
+        mb = r["bytes"] / 1e6
+        status = "" if r["error"] is None else "  FAILED: " + r["error"]
+        msg += "%-30s %8d %10.1f %9.2f %10.1f %8.1f%s\n" % (
+            r["series"],
+            r["num_images"],
+            mb,
+            r["time"],
+            r["num_images"] / r["time"] if r["time"] > 0 else 0.0,
+            mb / r["time"] if r["time"] > 0 else 0.0,
+            status,
+        )
+    done = [r for r in results if r["error"] is None]
+    images = sum(r["num_images"] for r in done)
+    mb = sum(r["bytes"] for r in done) / 1e6
+    msg += "%d/%d series, %d images, %.1f MB converted in %.2f s " % (
+        len(done),
+        len(results),
+        images,
+        mb,
+        wall_time,
+    )
+    msg += "(%.1f images/s, %.1f MB/s)." % (
+        images / wall_time if wall_time > 0 else 0.0,
+        mb / wall_time if wall_time > 0 else 0.0,
+    )
+    logger.info(msg)
+
+
+def main():
+    args = parse_input_arguments()
+    if args.batch:
+        output_dir = args.output_dir if args.output_dir else os.getcwd()
+        results = batch_convert(args.input_files, args, output_dir, args.max_workers)
+        if any(r["error"] for r in results):
+            sys.exit(1)
+        return
+    if args.output_dir:
+        Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    convert_mrc_series(args.input_files, args, args.output_dir)
 
 
 def parse_input_arguments():
@@ -642,6 +871,31 @@ def parse_input_arguments():
         help="Lower limit of the trusted range.",
     )
 
+    parser.add_argument(
+        "-j",
+        "--max-workers",
+        type=int,
+        default=None,
+        help="Number of processes reading and compressing the images in parallel, "
+        "1 by default. In batch mode, number of series converted in parallel, one per "
+        "CPU by default.",
+    )
+
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Batch mode: the input files and directories are grouped into series, "
+        "each converted into its own directory under the output directory.",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        type=str,
+        default=None,
+        help="Output directory. Defaults to the current working directory.",
+    )
+
     des = "List of input files. Can be a single MRC file containing all the "
     des += "images, or a list of files containing single images, "
     des += "usually obtained by global expansion (e.g. *mrc)"
@@ -11,13 +11,6 @@ from pathlib import Path
 from nexgen.utils import get_nexus_filename
 
 from .. import log
-from ..beamlines.I19_2_gda_nxs import write_nxs
-from ..beamlines.I19_2_nxs import (
-    DetAxisPosition,
-    GonioAxisPosition,
-    nexus_writer,
-    serial_nexus_writer,
-)
 from . import version_parser
 
 logger = logging.getLogger("nexgen.I19-2_NeXus_cli")
@@ -33,6 +26,8 @@ def gda_writer(args):
     Write a NeXus file starting from information passed by GDA.
     """
     logger.info("Create a NeXus file for I19-2 interfacing with GDA.")
+    # Only load the writers when needed, to keep start up time down
+    from ..beamlines.I19_2_gda_nxs import write_nxs
 
     write_nxs(
         meta_file=args.meta_file,
@@ -89,6 +84,13 @@ def nexgen_writer(args):
     """
     expt_type = "standard" if args.serial is False else "serial"
     logger.info(f"Create a NeXus file for a {expt_type} I19-2 data collection.")
+    from ..beamlines.I19_2_nxs import (
+        DetAxisPosition,
+        GonioAxisPosition,
+        nexus_writer,
+        serial_nexus_writer,
+    )
+
     parse_input_arguments(args)
 
     axes_list = []
@@ -7,8 +7,6 @@ import logging
 from pathlib import Path
 
 from .. import log
-from ..beamlines.SSX_chip import CHIP_DICT_DEFAULT
-from ..beamlines.SSX_Eiger_nxs import ssx_eiger_writer
 from .parse_utils import ImportCollectAction, version_parser
 
 logger = logging.getLogger("nexgen.SSX_cli")
@@ -21,6 +19,9 @@ parser = argparse.ArgumentParser(
 
 def eiger_collection(args):
     logger.info("Create a NeXus file for SSX collection on Eiger.")
+    # Only load the writers when needed, to keep start up time down
+    from ..beamlines.SSX_chip import CHIP_DICT_DEFAULT
+    from ..beamlines.SSX_Eiger_nxs import ssx_eiger_writer
 
     ssx_eiger_writer(
         Path(args.visitpath).expanduser().resolve(),
@@ -0,0 +1,365 @@
+"""
+Resident NeXus writer service.
+
+Keeps a pool of warm worker processes, with all the heavy imports already done, and accepts \
+collection parameters over a local HTTP endpoint to write the master files.
+
+Endpoints:
+    POST /write/<job_type>: Write a NeXus file. The request body is a JSON payload with the \
+        arguments for the job. Replies once the job is done, with its timing.
+    GET /metrics: Number of jobs run and failed, queue latency and write time statistics.
+    GET /health: Check that the service is up.
+
+Available job types:
+    i19_2: I19-2 collection, payload with "params" (CollectionParams dictionary), "master_file" \
+        and optionally "timestamps", "use_meta", "data_entry_key" and "bit_depth".
+    i19_2_eiger: I19-2 Eiger collection, payload with "params" (CollectionParams dictionary), \
+        "eiger_settings" and optionally "vds_offset", "vds_mapping", "n_frames" and "notes".
+    ssx: Serial collection with an Eiger detector, payload with the ssx_eiger_writer arguments.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+
+from .. import log
+from . import version_parser
+
+logger = logging.getLogger("nexgen.WriterService")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8764
+
+
+def _parse_timestamps(timestamps: list | tuple | None) -> tuple:
+    if not timestamps:
+        return (None, None)
+    return tuple(datetime.fromisoformat(t) if t else None for t in timestamps)
+
+
+def write_i19_2(payload: dict[str, Any]):
+    """Write a NeXus file for a collection on I19-2."""
+    from ..beamlines.I19_2_nxs import nexus_writer
+
+    nexus_writer(
+        payload["params"],
+        Path(payload["master_file"]),
+        _parse_timestamps(payload.get("timestamps")),
+        use_meta=payload.get("use_meta", False),
+        data_entry_key=payload.get("data_entry_key", "data"),
+        bit_depth=payload.get("bit_depth", 32),
+    )
+
+
+def write_i19_2_eiger(payload: dict[str, Any]):
+    """Write a NeXus file for an Eiger collection on I19-2."""
+    from ..beamlines.i19_2.eiger import EigerSettings, eiger_writer
+    from ..beamlines.i19_2.parameters import CollectionParams
+    from ..tools.vds_tools import VdsMapping
+
+    eiger_writer(
+        CollectionParams(**payload["params"]),
+        EigerSettings(**payload["eiger_settings"]),
+        vds_offset=payload.get("vds_offset", 0),
+        vds_mapping=VdsMapping(payload.get("vds_mapping", "blocked")),
+        n_frames=payload.get("n_frames"),
+        notes=payload.get("notes"),
+    )
+
+
+def write_ssx(payload: dict[str, Any]):
+    """Write a NeXus file for a serial collection using an Eiger detector."""
+    from ..beamlines.SSX_Eiger_nxs import ssx_eiger_writer
+
+    payload = dict(payload)
+    for ts in ["start_time", "stop_time"]:
+        if payload.get(ts):
+            payload[ts] = datetime.fromisoformat(payload[ts])
+    ssx_eiger_writer(**payload)
+
+
+JOB_TYPES: dict[str, Callable[[dict[str, Any]], Any]] = {
+    "i19_2": write_i19_2,
+    "i19_2_eiger": write_i19_2_eiger,
+    "ssx": write_ssx,
+}
+
+
+def _warm_up():
+    """Run once in each worker process, so that the jobs don't pay for the imports."""
+    import h5py  # noqa: F401
+    import hdf5plugin  # noqa: F401
+
+    from ..beamlines import I19_2_nxs, SSX_Eiger_nxs  # noqa: F401
+    from ..beamlines.i19_2 import eiger  # noqa: F401
+    from ..utils import units_of_length
+
+    units_of_length("1mm")
+
+
+def _run_job(
+    fn: Callable[[dict[str, Any]], Any], payload: dict[str, Any], submitted: float
+) -> dict[str, float]:
+    """Run a writing job in a worker process and time it."""
+    started = time.time()
+    nexgen_logger = logging.getLogger("nexgen")
+    handlers = list(nexgen_logger.handlers)
+    try:
+        fn(payload)
+    finally:
+        # The writers set up their own log file, don't keep it open for the next job
+        for h in nexgen_logger.handlers:
+            if h not in handlers:
+                nexgen_logger.removeHandler(h)
+                h.close()
+    return {
+        "queue_latency_s": started - submitted,
+        "write_time_s": time.time() - started,
+    }
+
+
+class _Metrics:
+    """Thread-safe aggregated job statistics.
+
+    Only running totals are kept, so that the memory used doesn't grow with the number of \
+    jobs run by the service.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.jobs = 0
+        self.failed = 0
+        self.pending = 0
+        self._stats = {
+            k: {"count": 0, "total": 0.0, "max": 0.0}
+            for k in ["queue_latency_s", "write_time_s"]
+        }
+
+    def start(self):
+        with self._lock:
+            self.pending += 1
+
+    def finish(self, timing: dict[str, float] | None = None):
+        with self._lock:
+            self.pending -= 1
+            self.jobs += 1
+            if timing is None:
+                self.failed += 1
+                return
+            for k, v in timing.items():
+                s = self._stats[k]
+                s["count"] += 1
+                s["total"] += v
+                s["max"] = max(s["max"], v)
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            out = {"jobs": self.jobs, "failed": self.failed, "pending": self.pending}
+            for k, s in self._stats.items():
+                name = k.removesuffix("_s")
+                count = s["count"]
+                out[f"{name}_mean_s"] = s["total"] / count if count else None
+                out[f"{name}_max_s"] = s["max"] if count else None
+            return out
+
+
+class WriterService:
+    """A local NeXus writer service running the jobs on a pool of warm processes.
+
+    Args:
+        host (str, optional): Address to bind to. Defaults to "127.0.0.1".
+        port (int, optional): Port to listen on, 0 picks a free one. Defaults to 8764.
+        num_workers (int, optional): Number of worker processes. Defaults to 2.
+        job_types (dict[str, Callable] | None, optional): Available job types, mapping a \
+            name to a function taking the request payload. Defaults to JOB_TYPES.
+    """
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        num_workers: int = 2,
+        job_types: dict[str, Callable[[dict[str, Any]], Any]] | None = None,
+    ):
+        self.job_types = job_types if job_types else JOB_TYPES
+        self.metrics = _Metrics()
+        self.pool = ProcessPoolExecutor(max_workers=num_workers, initializer=_warm_up)
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+
+    @property
+    def address(self) -> tuple[str, int]:
+        host, port = self.server.server_address[:2]
+        return str(host), int(port)
+
+    def _make_handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, fmt, *args):
+                logger.debug(fmt % args)
+
+            def _reply(self, status: HTTPStatus, body: dict):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/metrics":
+                    self._reply(HTTPStatus.OK, service.metrics.summary())
+                elif self.path == "/health":
+                    self._reply(HTTPStatus.OK, {"status": "ok"})
+                else:
+                    self._reply(HTTPStatus.NOT_FOUND, {"error": "Unknown endpoint."})
+
+            def do_POST(self):
+                job_type = self.path.removeprefix("/write/")
+                if not self.path.startswith("/write/") or (
+                    job_type not in service.job_types.keys()
+                ):
+                    self._reply(
+                        HTTPStatus.NOT_FOUND,
+                        {"error": f"Unknown job type {job_type}."},
+                    )
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError as err:
+                    self._reply(HTTPStatus.BAD_REQUEST, {"error": str(err)})
+                    return
+                status, body = service.run_job(job_type, payload)
+                self._reply(status, body)
+
+        return Handler
+
+    def run_job(
+        self, job_type: str, payload: dict[str, Any]
+    ) -> tuple[HTTPStatus, dict]:
+        """Submit a job to the pool and wait for it to complete."""
+        self.metrics.start()
+        logger.info(f"Received {job_type} job.")
+        try:
+            future = self.pool.submit(
+                _run_job, self.job_types[job_type], payload, time.time()
+            )
+            timing = future.result()
+        except Exception as err:
+            self.metrics.finish(None)
+            logger.error(f"{job_type} job failed: {err!r}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {
+                "status": "failed",
+                "error": repr(err),
+            }
+        self.metrics.finish(timing)
+        logger.info(
+            f"{job_type} job done. Queue latency: {timing['queue_latency_s']:.3f}s, "
+            f"write time: {timing['write_time_s']:.3f}s."
+        )
+        return HTTPStatus.OK, {"status": "done", **timing}
+
+    def serve_forever(self):
+        logger.info(f"NeXus writer service listening on {self.address}.")
+        self.server.serve_forever()
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.pool.shutdown(wait=True)
+
+
+class WriterServiceClient:
+    """Client for a local NeXus writer service.
+
+    Args:
+        host (str, optional): Service address. Defaults to "127.0.0.1".
+        port (int, optional): Service port. Defaults to 8764.
+        timeout (float | None, optional): Request timeout in s. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        timeout: float | None = None,
+    ):
+        self.url = f"http://{host}:{port}"
+        self.timeout = timeout
+
+    def _request(self, endpoint: str, payload: dict | None = None) -> dict:
+        data = (
+            json.dumps(payload, default=str).encode() if payload is not None else None
+        )
+        req = urllib.request.Request(
+            f"{self.url}{endpoint}",
+            data=data,
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return json.loads(resp.read())
+        except urllib.error.HTTPError as err:
+            body = json.loads(err.read() or b"{}")
+            raise RuntimeError(
+                f"Writer service error {err.code}: {body.get('error')}"
+            ) from err
+
+    def write(self, job_type: str, payload: dict[str, Any]) -> dict:
+        """Submit a writing job and wait for it to complete.
+
+        Args:
+            job_type (str): Type of collection, eg. "i19_2", "ssx".
+            payload (dict[str, Any]): Job arguments. Datetimes and paths are sent as strings.
+
+        Raises:
+            RuntimeError: If the job fails.
+
+        Returns:
+            dict: Job status, queue latency and write time.
+        """
+        return self._request(f"/write/{job_type}", payload)
+
+    def metrics(self) -> dict:
+        """Get the service metrics."""
+        return self._request("/metrics")
+
+
+parser = argparse.ArgumentParser(description=__doc__, parents=[version_parser])
+parser.add_argument(
+    "--host", type=str, default=DEFAULT_HOST, help="Address to bind to."
+)
+parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on.")
+parser.add_argument(
+    "-n", "--num-workers", type=int, default=2, help="Number of worker processes."
+)
+
+
+def main():
+    log.config()
+    args = parser.parse_args()
+    service = WriterService(args.host, args.port, args.num_workers)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down the NeXus writer service.")
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
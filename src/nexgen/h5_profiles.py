@@ -0,0 +1,159 @@
+"""
+Named HDF5 file creation/access property profiles, tuned for the filesystem the output files are written to.
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Any
+
+import h5py
+from pydantic.dataclasses import dataclass
+
+__all__ = ["H5Profile", "H5_PROFILES", "get_h5_profile", "open_with_profile"]
+
+logger = logging.getLogger("nexgen.h5_profiles")
+
+# Modes which create a new file, for which the file creation properties can be set
+CREATE_MODES = ["w", "w-", "x"]
+
+KiB = 1024
+MiB = 1024 * KiB
+
+
+@dataclass(frozen=True)
+class H5Profile:
+    """A set of HDF5 file creation and access properties.
+
+    Args:
+        libver (str | tuple[str, str] | None, optional): Library version bounds for the \
+            object formats. Defaults to None.
+        meta_block_size (int | None, optional): Minimum size of the metadata block \
+            aggregation, in bytes. Defaults to None.
+        fs_strategy (str | None, optional): File space handling strategy, eg. "page" for \
+            paged aggregation. Defaults to None.
+        fs_page_size (int | None, optional): File space page size in bytes, only used \
+            with paged aggregation. Defaults to None.
+        page_buf_size (int | None, optional): Page buffer size in bytes, only used with \
+            paged aggregation. Needs to be a multiple of fs_page_size. Defaults to None.
+        alignment_threshold (int, optional): Any object larger than this, in bytes, will \
+            be aligned to alignment_interval. Defaults to 1.
+        alignment_interval (int, optional): Alignment interval, in bytes. Defaults to 1.
+    """
+
+    libver: str | tuple[str, str] | None = None
+    meta_block_size: int | None = None
+    fs_strategy: str | None = None
+    fs_page_size: int | None = None
+    page_buf_size: int | None = None
+    alignment_threshold: int = 1
+    alignment_interval: int = 1
+
+    def get_file_kwargs(self, mode: str = "x") -> dict[str, Any]:
+        """Get the keyword arguments to be passed to h5py.File for the requested mode.
+
+        File creation properties and the page buffer only apply when creating a new file, \
+        when opening an existing one only the access properties are returned.
+
+        Args:
+            mode (str, optional): File opening mode. Defaults to "x".
+
+        Returns:
+            dict[str, Any]: Keyword arguments for h5py.File, with unset values left out.
+        """
+        access = {
+            "libver": self.libver,
+            "alignment_threshold": self.alignment_threshold,
+            "alignment_interval": self.alignment_interval,
+        }
+        if mode in CREATE_MODES:
+            access.update(
+                meta_block_size=self.meta_block_size,
+                fs_strategy=self.fs_strategy,
+                fs_page_size=self.fs_page_size,
+                page_buf_size=self.page_buf_size,
+            )
+        return {k: v for k, v in access.items() if v not in [None, 1]}
+
+
+H5_PROFILES: dict[str, H5Profile] = {
+    # Plain h5py defaults
+    "default": H5Profile(),
+    # Large file system blocks: aggregate all metadata in few, aligned, pages
+    "gpfs": H5Profile(
+        libver=("v110", "latest"),
+        meta_block_size=1 * MiB,
+        fs_strategy="page",
+        fs_page_size=1 * MiB,
+        page_buf_size=4 * MiB,
+        alignment_threshold=64 * KiB,
+        alignment_interval=4 * MiB,
+    ),
+    # Align to the default 1MiB stripe size
+    "lustre": H5Profile(
+        libver=("v110", "latest"),
+        meta_block_size=1 * MiB,
+        fs_strategy="page",
+        fs_page_size=1 * MiB,
+        page_buf_size=4 * MiB,
+        alignment_threshold=64 * KiB,
+        alignment_interval=1 * MiB,
+    ),
+    # Small, random reads are cheap: keep files compact
+    "local-ssd": H5Profile(
+        libver="latest",
+        meta_block_size=64 * KiB,
+    ),
+}
+
+
+def get_h5_profile(profile: H5Profile | str | None) -> H5Profile:
+    """Look up a property profile by name.
+
+    Args:
+        profile (H5Profile | str | None): Profile name or definition. If None, the \
+            default profile is returned.
+
+    Raises:
+        ValueError: If the profile name is not known.
+
+    Returns:
+        H5Profile: The property profile.
+    """
+    if profile is None:
+        return H5_PROFILES["default"]
+    if isinstance(profile, H5Profile):
+        return profile
+    if profile.lower() not in H5_PROFILES.keys():
+        raise ValueError(
+            f"Unknown HDF5 property profile {profile}. Available profiles: {list(H5_PROFILES.keys())}."
+        )
+    return H5_PROFILES[profile.lower()]
+
+
+def open_with_profile(
+    filename: Path | str,
+    mode: str = "r",
+    profile: H5Profile | str | None = None,
+    **kwargs,
+) -> h5py.File:
+    """Open a HDF5 file with the properties defined in the requested profile.
+
+    Args:
+        filename (Path | str): HDF5 file name.
+        mode (str, optional): File opening mode. Defaults to "r".
+        profile (H5Profile | str | None, optional): Property profile, or its name. \
+            Defaults to None.
+
+    Keyword Args:
+        Any additional keyword argument accepted by h5py.File. These take precedence \
+        over the profile settings.
+
+    Returns:
+        h5py.File: Handle to the open file.
+    """
+    file_kwargs = get_h5_profile(profile).get_file_kwargs(mode)
+    file_kwargs.update({k: v for k, v in kwargs.items() if v is not None})
+    logger.debug(f"Opening {filename} in mode {mode} with properties {file_kwargs}.")
+    return h5py.File(filename, mode, **file_kwargs)
@@ -10,6 +10,7 @@ from typing import List
 
 import h5py
 
+from ..h5_profiles import H5Profile, open_with_profile
 from ..nxs_write.write_utils import create_attributes
 from ..utils import get_nexus_filename
 from .copy_utils import get_nexus_tree
@@ -22,6 +23,7 @@ def images_nexus(
     original_nexus: Path | str,
     simple_copy: bool = True,
     skip_group: List[str] = ["NXdata"],
+    h5_profile: H5Profile | str | None = None,
 ) -> str:
     """
     Copy NeXus metadata for images.
@@ -32,6 +34,8 @@ def images_nexus(
         simple_copy (bool, optional): Copy everything from the original NeXus file. Defaults to True.
         skip_group (List[str], optional): If simple_copy is False, list of NX_class objects to skip when copying.
                                         Defaults to ["NXdata"].
+        h5_profile (H5Profile | str | None, optional): HDF5 property profile to apply to the new NeXus file.
+                                        Defaults to None.
 
     Returns:
         nxs_filename (str): Filename of new NeXus file.
@@ -43,7 +47,7 @@ def images_nexus(
     copy_logger.debug(f"New NeXus file name: {nxs_filename}")
     with (
         h5py.File(original_nexus, "r") as nxs_in,
-        h5py.File(nxs_filename, "x") as nxs_out,
+        open_with_profile(nxs_filename, "x", h5_profile) as nxs_out,
     ):
         if simple_copy is True:
             # Copy the whole tree
@@ -79,6 +83,7 @@ def images_nexus(
 def pseudo_events_nexus(
     data_file: List[Path | str],
     original_nexus: Path | str,
+    h5_profile: H5Profile | str | None = None,
 ) -> str:
     """
     Copy NeXus metadata for pseudo event mode data.
@@ -86,6 +91,8 @@ def pseudo_events_nexus(
     Args:
         data_file (List[Path  |  str]): HDF5 with pseud event data.
         original_nexus (Path  |  str): Original NeXus file with experiment metadata.
+        h5_profile (H5Profile | str | None, optional): HDF5 property profile to apply to the new NeXus file.
+                                        Defaults to None.
 
     Returns:
         nxs_filename (str): Filename of new NeXus file.
@@ -97,7 +104,7 @@ def pseudo_events_nexus(
     copy_logger.debug(f"New NeXus file name: {nxs_filename}")
     with (
         h5py.File(original_nexus, "r") as nxs_in,
-        h5py.File(nxs_filename, "x") as nxs_out,
+        open_with_profile(nxs_filename, "x", h5_profile) as nxs_out,
     ):
         nxs_out.attrs["default"] = "entry"
         # Copy the whole tree except for nxdata
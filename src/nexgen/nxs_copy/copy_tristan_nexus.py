@@ -10,6 +10,7 @@ from pathlib import Path
 import h5py
 import numpy as np
 
+from ..h5_profiles import H5Profile, open_with_profile
 from ..nxs_write.write_utils import create_attributes
 from .copy_utils import (
     convert_scan_axis,
@@ -25,6 +26,7 @@ def single_image_nexus(
     tristan_nexus: Path | str,
     write_mode: str = "x",
     pump_probe_bins: int = None,
+    h5_profile: H5Profile | str | None = None,
 ) -> str:
     """
     Create a NeXus file for a single-image or a stationary pump-probe dataset.
@@ -41,6 +43,8 @@ def single_image_nexus(
                         h5py file opening mode. Defaults to "x".
         pump_probe_bins (int, optional): If the NeXus file is be linked to a static pump-probe image stack, pass the number
                         of images the events have been binned into. Deafults to None.
+        h5_profile (H5Profile | str | None, optional): HDF5 property profile to apply to the new NeXus file.
+                        Defaults to None.
 
     Returns:
         nxs_filename (str): The name of the output NeXus file.
@@ -50,7 +54,7 @@ def single_image_nexus(
     nxs_filename = data_file.parent / f"{data_file.stem}.nxs"
     with (
         h5py.File(tristan_nexus, "r") as nxs_in,
-        h5py.File(nxs_filename, write_mode) as nxs_out,
+        open_with_profile(nxs_filename, write_mode, h5_profile) as nxs_out,
     ):
         # Copy the whole tree except for nxdata
         nxentry = get_nexus_tree(nxs_in, nxs_out)
@@ -101,6 +105,7 @@ def multiple_images_nexus(
     write_mode: str = "x",
     osc: float = None,
     nbins: int = None,
+    h5_profile: H5Profile | str | None = None,
 ) -> str:
     """
     Create a NeXus file for a multiple-image dataset or multiple image sequences from a pump-probe collection.
@@ -120,6 +125,8 @@ def multiple_images_nexus(
                         h5py file opening mode. Defaults to "x".
         osc (float, optional): Oscillation angle (degrees). Defaults to None.
         nbins (int, optional): Number of binned images. Defaults to None.
+        h5_profile (H5Profile | str | None, optional): HDF5 property profile to apply to the new NeXus file.
+                        Defaults to None.
 
     Raises:
         ValueError: When osc has been passed instead of nbins for a grid scan collection.
@@ -134,7 +141,7 @@ def multiple_images_nexus(
     nxs_filename = data_file.parent / f"{data_file.stem}.nxs"
     with (
         h5py.File(tristan_nexus, "r") as nxs_in,
-        h5py.File(nxs_filename, write_mode) as nxs_out,
+        open_with_profile(nxs_filename, write_mode, h5_profile) as nxs_out,
     ):
         # Copy the whole tree except for nxdata
         nxentry = get_nexus_tree(nxs_in, nxs_out)
@@ -5,8 +5,10 @@ Object definition for detectors.
 from __future__ import annotations
 
 from enum import StrEnum
+from pathlib import Path
 from typing import Literal, Union
 
+import numpy as np
 from pydantic.dataclasses import Field, dataclass
 
 from ..utils import Point3D
@@ -394,3 +396,48 @@ class Detector:
     def get_module_info(self):
         """Write the module information to a dictionary."""
         return self.module.__dict__
+
+    def set_beam_center_from_data(
+        self,
+        filename: Path | str,
+        data_key: str = "/entry/data/data",
+        roi_half_size: int | None = 100,
+        num_frames: int = 10,
+        subpixel: bool = False,
+    ) -> bool:
+        """Calculate the beam center from a subset of the images and set beam_center, \
+        before writing the NeXus file.
+
+        The pixel_mask in the detector constants is applied if it has been loaded as an \
+        array, otherwise the one in the file is used if found. The beam center is left \
+        unchanged if it can't be found.
+
+        Args:
+            filename (Path | str): Data or NeXus file containing the images.
+            data_key (str, optional): Location of the images, or of their VDS. Defaults \
+                to "/entry/data/data".
+            roi_half_size (int | None, optional): Half size of the region of interest \
+                around the image centre, in pixels. If None, use the whole image. \
+                Defaults to 100.
+            num_frames (int, optional): Number of frames used. Defaults to 10.
+            subpixel (bool, optional): Use an intensity weighted centroid of the beam. \
+                Defaults to False.
+
+        Returns:
+            bool: True if the beam center was updated.
+        """
+        from ..tools.beam_centre import find_beam_centre_from_frames
+
+        mask = self.detector_params.constants.get("pixel_mask")
+        beam_center = find_beam_centre_from_frames(
+            filename,
+            data_key,
+            mask=mask if isinstance(mask, np.ndarray) else None,
+            roi_half_size=roi_half_size,
+            num_frames=num_frames,
+            subpixel=subpixel,
+        )
+        if beam_center is None:
+            return False
+        self.beam_center = list(beam_center)
+        return True
@@ -9,8 +9,6 @@ from enum import IntEnum
 from typing import Dict, List, NamedTuple
 
 from numpy.typing import ArrayLike
-from scanspec.core import Path as ScanPath
-from scanspec.specs import Line
 
 from .axes import Axis
 
@@ -142,6 +140,9 @@ def calculate_scan_points(
     Returns:
         Dict[str, ArrayLike]: A dictionary of ("axis_name": axis_range) key-value pairs.
     """
+    # scanspec is slow to import, only load it when a scan is actually calculated
+    from scanspec.core import Path as ScanPath
+    from scanspec.specs import Line
 
     if rotation is True:
         if axis1.transformation_type != "rotation":
@@ -0,0 +1,162 @@
+"""
+Asynchronous front end to run NeXus writing jobs on a dedicated worker.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+# Logger
+async_logger = logging.getLogger("nexgen.AsyncWriter")
+async_logger.setLevel(logging.DEBUG)
+
+
+class AsyncWriter:
+    """Run NeXus writing jobs in the background on a single dedicated worker thread.
+
+    Jobs are run one at a time, in the order they are submitted, so that the caller, eg. a \
+    beamline control system, can carry on arming the next collection while the HDF5 work \
+    is done. At most max_queue_depth jobs, including the one running, are accepted at any \
+    one time.
+
+    Example:
+        with AsyncWriter(max_queue_depth=2) as worker:
+            future = worker.submit(
+                nexus_writer, params, timestamps=timestamps, on_error=report_error
+            )
+            # ... prepare the next collection
+            future.result()
+
+    Args:
+        max_queue_depth (int, optional): Maximum number of pending jobs. Defaults to 4.
+    """
+
+    def __init__(self, max_queue_depth: int = 4):
+        if max_queue_depth < 1:
+            raise ValueError("The maximum queue depth needs to be at least 1.")
+        self.max_queue_depth = max_queue_depth
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="nexgen-writer"
+        )
+        self._slots = threading.BoundedSemaphore(max_queue_depth)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown(wait=True)
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs queued or running."""
+        with self._lock:
+            return self._pending
+
+    def _on_job_done(
+        self,
+        future: Future,
+        on_done: Callable[[Any], Any] | None = None,
+        on_error: Callable[[BaseException], Any] | None = None,
+    ):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+        if future.cancelled():
+            return
+        err = future.exception()
+        try:
+            if err is not None:
+                async_logger.error(f"Writing job failed: {err!r}")
+                if on_error:
+                    on_error(err)
+            elif on_done:
+                on_done(future.result())
+        except Exception as cb_err:
+            async_logger.exception(f"Error in writing job callback: {cb_err!r}")
+
+    def submit(
+        self,
+        fn: Callable,
+        *args,
+        on_done: Callable[[Any], Any] | None = None,
+        on_error: Callable[[BaseException], Any] | None = None,
+        block: bool = True,
+        timeout: float | None = None,
+        **kwargs,
+    ) -> Future:
+        """Queue a writing job.
+
+        Args:
+            fn (Callable): The function to run, eg. NXmxFileWriter.write or a beamline writer.
+            on_done (Callable[[Any], Any] | None, optional): Called with the return value of \
+                fn once the job completes successfully. Defaults to None.
+            on_error (Callable[[BaseException], Any] | None, optional): Called with the \
+                exception raised by fn if the job fails. Defaults to None.
+            block (bool, optional): If the queue is full, wait for a free slot instead of \
+                failing. Defaults to True.
+            timeout (float | None, optional): Maximum time to wait for a free slot, in s. \
+                Defaults to None.
+
+        Other positional and keyword arguments are passed to fn.
+
+        Raises:
+            queue.Full: If no slot frees up in the queue in time.
+
+        Returns:
+            Future: Future holding the result of the job.
+        """
+        if not self._slots.acquire(blocking=block, timeout=timeout if block else None):
+            raise queue.Full(
+                f"Writer queue full, {self.max_queue_depth} jobs already pending."
+            )
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(
+            partial(self._on_job_done, on_done=on_done, on_error=on_error)
+        )
+        async_logger.debug(f"Writing job {getattr(fn, '__name__', fn)} queued.")
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Asyncio-friendly version of submit, awaiting the result of the job.
+
+        Waiting for a free slot in the queue doesn't block the event loop.
+
+        Args:
+            fn (Callable): The function to run.
+
+        Other positional and keyword arguments are passed to submit.
+
+        Returns:
+            Any: The return value of fn.
+        """
+        loop = asyncio.get_running_loop()
+        future = await loop.run_in_executor(
+            None, partial(self.submit, fn, *args, **kwargs)
+        )
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        """Stop accepting jobs and release the worker.
+
+        Args:
+            wait (bool, optional): Wait for the queued jobs to complete. Defaults to True.
+            cancel_pending (bool, optional): Cancel the jobs which haven't started yet. \
+                Defaults to False.
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_pending)
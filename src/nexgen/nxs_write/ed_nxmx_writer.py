@@ -5,15 +5,18 @@ A writer for NXmx-like NeXus files for electron diffraction.
 from __future__ import annotations
 
 import logging
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List
 
-import h5py
 import numpy as np
 from numpy.typing import DTypeLike
 
+from ..h5_profiles import H5Profile, get_h5_profile, open_with_profile
 from ..nxs_utils import Attenuator, Beam, Detector, Goniometer, Source
+from ..timings import Timings, timed_method
 from ..tools.vds_w_tools import image_vds_writer, vds_file_writer
 from ..utils import coord2mcstas
 from .nxclass_writers import (
@@ -42,6 +45,8 @@ class EDNXmxFileWriter:
             It should at least contain the convention, origin and base vectors.
         convert_to_mcstas (bool, optional): If true, convert the vectors to mcstas. \
             Defaults to False.
+        h5_profile (H5Profile | str | None, optional): HDF5 property profile to apply to \
+            the output files, eg. "gpfs". Defaults to None.
     """
 
     def __init__(
@@ -55,6 +60,7 @@ class EDNXmxFileWriter:
         tot_num_imgs: int,
         ED_coord_system: Dict,
         convert_to_mcstas: bool = False,
+        h5_profile: H5Profile | str | None = None,
     ):
         self.filename = Path(filename).expanduser().resolve()
         self.goniometer = goniometer
@@ -65,6 +71,54 @@ class EDNXmxFileWriter:
         self.tot_num_imgs = tot_num_imgs
         self.ED_coord_system = ED_coord_system
         self.convert_cs = convert_to_mcstas
+        self.h5_profile = get_h5_profile(h5_profile)
+        self._session = None
+        self.timings = Timings()
+
+    def _get_handle(self, write_mode: str):
+        """Get the handle to the NeXus file: the one kept open by the current session if \
+        there is one, otherwise open the file in the requested mode."""
+        if self._session is not None:
+            return nullcontext(self._session)
+        return open_with_profile(self.filename, write_mode, self.h5_profile)
+
+    @contextmanager
+    def session(self, write_mode: str = "x") -> Iterator[EDNXmxFileWriter]:
+        """Keep the NeXus file open across write and write_vds, flushing and closing it \
+        only once on exit.
+
+        Args:
+            write_mode (str, optional): String indicating writing mode for the output \
+                NeXus file. Accepts any valid h5py file opening mode. Defaults to "x".
+
+        Raises:
+            RuntimeError: If a session is already open.
+
+        Yields:
+            Iterator[EDNXmxFileWriter]: The writer itself.
+        """
+        if self._session is not None:
+            raise RuntimeError(f"A session on {self.filename} is already open.")
+        with open_with_profile(self.filename, write_mode, self.h5_profile) as nxs:
+            self._session = nxs
+            try:
+                yield self
+            finally:
+                self._session = None
+
+    def save_timings(self, filename: Path | str | None = None) -> Path:
+        """Save the timings of the writing phases run so far to a JSON sidecar file.
+
+        Args:
+            filename (Path | str | None, optional): Output file. Defaults to \
+                <nexus filename>.timings.json next to the NeXus file.
+
+        Returns:
+            Path: The sidecar file.
+        """
+        if filename is None:
+            filename = self.filename.with_suffix(".timings.json")
+        return self.timings.save(filename, nexus_file=self.filename)
 
     def _check_coordinate_frame(self):
         """Checks the coordinate frame and converts to mcstas if requested."""
@@ -96,6 +150,7 @@ class EDNXmxFileWriter:
         """Returns total collection time."""
         return self.detector.exp_time * self.tot_num_imgs
 
+    @timed_method
     def write(
         self,
         image_datafiles: List | None = None,
@@ -108,6 +163,7 @@ class EDNXmxFileWriter:
         This function calls the writers for the main NXclass objects.
         Additionally, it performs a few checks on the coordinate frame of the input vectors \
         and then calls the writers for the relevant NeXus base classes.
+        If called inside a session, the session file handle is used and write_mode is ignored.
 
         Args:
             image_datafiles (List | None, optional): List of image data files. If not \
@@ -138,7 +194,7 @@ class EDNXmxFileWriter:
         # NXcoordinate_system_set: /entry/coordinate_system_set
         base_vectors = {k: self.ED_coord_system.get(k) for k in ["x", "y", "z"]}
 
-        with h5py.File(self.filename, write_mode) as nxs:
+        with self._get_handle(write_mode) as nxs:
             # NXentry and NXmx definition
             write_NXentry(nxs)
 
@@ -200,6 +256,7 @@ class EDNXmxFileWriter:
                 osc,
             )
 
+    @timed_method
     def write_vds(
         self,
         vds_dtype: DTypeLike = np.uint16,
@@ -224,7 +281,7 @@ class EDNXmxFileWriter:
                 f"Writer type {writer_type} unknown. Will default to dataset."
             )
             writer_type = "dataset"
-        with h5py.File(self.filename, "r+") as nxs:
+        with self._get_handle("r+") as nxs:
             if writer_type == "dataset":
                 edwriter_logger.debug(
                     "Writing vds dataset as /entry/data/data in nexus file."
@@ -250,4 +307,5 @@ class EDNXmxFileWriter:
                     (self.tot_num_imgs, *self.detector.detector_params.image_size),
                     vds_dtype,
                     data_entry_key,
+                    h5_profile=self.h5_profile,
                 )
@@ -22,14 +22,16 @@ from ..nxs_utils import (
     EigerDetector,
     Source,
 )
+from ..timings import timed
 from ..utils import (
     MAX_SUFFIX_DIGITS,
     get_iso_timestamp,
+    get_unit_registry,
     units_of_length,
     units_of_time,
-    ureg,
 )
 from .write_utils import (
+    NXfields,
     TSdset,
     add_sample_axis_groups,
     calculate_origin,
@@ -37,6 +39,7 @@ from .write_utils import (
     mask_and_flatfield_writer,
     mask_and_flatfield_writer_for_event_data,
     set_dependency,
+    write_small_dataset,
 )
 
 NXclass_logger = logging.getLogger("nexgen.NXclass_writers")
@@ -47,6 +50,7 @@ DETECTOR_SPECIFIC_PARAMS = ["eiger_fw_version", "data_collection_date", "ntrigge
 
 
 # NXentry writer
+@timed
 def write_NXentry(nxsfile: h5py.File, definition: str = "NXmx") -> h5py.Group:
     """
     Write NXentry group at top level of the NeXus file.
@@ -74,6 +78,7 @@ def write_NXentry(nxsfile: h5py.File, definition: str = "NXmx") -> h5py.Group:
 
 
 # NXdata writer
+@timed
 def write_NXdata(
     nxsfile: h5py.File,
     datafiles: list[Path],
@@ -148,6 +153,7 @@ def write_NXdata(
 
 
 # NXtransformations
+@timed
 def write_NXtransformations(
     parent_group: h5py.Group,
     axes: list[Axis],
@@ -211,6 +217,7 @@ def write_NXtransformations(
 
 
 # NXsample
+@timed
 def write_NXsample(
     nxsfile: h5py.File,
     goniometer_axes: list[Axis],
@@ -291,12 +298,15 @@ def write_NXsample(
 
 
 # NXinstrument
+@timed
 def write_NXinstrument(
     nxsfile: h5py.File,
     beam: Beam,
     attenuator: Attenuator,
     source: Source,
     reset_instrument_name: bool = False,
+    compact: bool = False,
+    fields: NXfields = "all",
 ):
     """
     Write NXinstrument group at /entry/instrument.
@@ -308,59 +318,73 @@ def write_NXinstrument(
         source (Source): Source definition, containing the facility information.
         reset_instrument_name (bool, optional): If True, a string with the name of the \
             instrument used. Otherwise, it will be set to 'DIAMOND BEAMLINE Ixx'. Defaults to False.
+        compact (bool, optional): Store small datasets with compact layout. Defaults to False.
+        fields (NXfields, optional): Which fields to write. "static" only writes the \
+            instrument name, "dynamic" only the attenuator and beam groups. Defaults to "all".
     """
     NXclass_logger.debug("Start writing NXinstrument.")
     # Create NXinstrument group, unless it already exists, in which case just open it.
     nxinstrument = nxsfile.require_group("/entry/instrument")
-    create_attributes(
-        nxinstrument,
-        ("NX_class",),
-        ("NXinstrument",),
-    )
 
-    # Write /name field and relative attribute
-    NXclass_logger.debug(f"{source.facility.short_name} {source.beamline}")
-    name_str = (
-        source.set_instrument_name
-        if reset_instrument_name
-        else f"DIAMOND BEAMLINE {source.beamline}"
-    )
-    nxinstrument.create_dataset("name", data=np.bytes_(name_str))
-    create_attributes(
-        nxinstrument["name"],
-        ("short_name",),
-        (f"{source.facility.short_name} {source.beamline}",),
-    )
+    if fields != "dynamic":
+        create_attributes(
+            nxinstrument,
+            ("NX_class",),
+            ("NXinstrument",),
+        )
+
+        # Write /name field and relative attribute
+        NXclass_logger.debug(f"{source.facility.short_name} {source.beamline}")
+        name_str = (
+            source.set_instrument_name
+            if reset_instrument_name
+            else f"DIAMOND BEAMLINE {source.beamline}"
+        )
+        write_small_dataset(nxinstrument, "name", np.bytes_(name_str), compact=compact)
+        create_attributes(
+            nxinstrument["name"],
+            ("short_name",),
+            (f"{source.facility.short_name} {source.beamline}",),
+        )
 
-    NXclass_logger.debug("Write NXattenuator and NXbeam.")
-    # Write NXattenuator group: entry/instrument/attenuator
-    write_NXattenuator(nxinstrument, attenuator)
-    # Write NXbeam group: entry/instrument/beam
-    write_NXbeam(nxinstrument, beam)
+    if fields != "static":
+        NXclass_logger.debug("Write NXattenuator and NXbeam.")
+        # Write NXattenuator group: entry/instrument/attenuator
+        write_NXattenuator(nxinstrument, attenuator, compact)
+        # Write NXbeam group: entry/instrument/beam
+        write_NXbeam(nxinstrument, beam, compact)
 
 
-def write_NXattenuator(nxinstrument: h5py.Group, attenuator: Attenuator):
+@timed
+def write_NXattenuator(
+    nxinstrument: h5py.Group, attenuator: Attenuator, compact: bool = False
+):
     """Write the NXattenuator group in /entry/instrument/attenuator.
 
     Args:
         nxinstrument (h5py.Group): HDF5 Nxinstrument group handle.
         attenuator (Attenuator):  Attenuator definition, with transmission.
+        compact (bool, optional): Store small datasets with compact layout. Defaults to False.
     """
     nxatt = nxinstrument.require_group("attenuator")
     create_attributes(nxatt, ("NX_class",), ("NXattenuator",))
     if attenuator.transmission:
-        nxatt.create_dataset(
+        write_small_dataset(
+            nxatt,
             "attenuator_transmission",
-            data=attenuator.transmission,
+            attenuator.transmission,
+            compact=compact,
         )
 
 
-def write_NXbeam(nxinstrument: h5py.Group, beam: Beam):
+@timed
+def write_NXbeam(nxinstrument: h5py.Group, beam: Beam, compact: bool = False):
     """Write the NXbeam group in /entry/instrument/beam.
 
     Args:
         nxinstrument (h5py.Group): HDF5 Nxinstrument group handle.
         beam (Beam):  Beam definition with wavelength and flux.
+        compact (bool, optional): Store small datasets with compact layout. Defaults to False.
     """
     nxbeam = nxinstrument.require_group("beam")
     create_attributes(nxbeam, ("NX_class",), ("NXbeam",))
@@ -369,30 +393,37 @@ def write_NXbeam(nxinstrument: h5py.Group, beam: Beam):
         if not isinstance(beam.wavelength, list)
         else np.array(beam.wavelength)
     )
-    wl = nxbeam.create_dataset("incident_wavelength", data=_wavelength)
+    wl = write_small_dataset(
+        nxbeam, "incident_wavelength", _wavelength, compact=compact
+    )
     create_attributes(wl, ("units",), ("angstrom",))
     if isinstance(beam.wavelength, list) and beam.wavelength_weights:
         if len(beam.wavelength) != len(beam.wavelength_weights):
             msg = "Cannot write wavelength weights dataset as length doesn't match number of wavelengths."
             NXclass_logger.error(msg)
             raise ValueError(msg)
-        nxbeam.create_dataset(
-            "incident_wavelength_weights", data=np.array(beam.wavelength_weights)
+        write_small_dataset(
+            nxbeam,
+            "incident_wavelength_weights",
+            np.array(beam.wavelength_weights),
+            compact=compact,
         )
 
     if beam.flux:
-        flux = nxbeam.create_dataset("total_flux", data=beam.flux)
+        flux = write_small_dataset(nxbeam, "total_flux", beam.flux, compact=compact)
         create_attributes(flux, ("units"), ("Hz",))
 
 
 # NXsource
-def write_NXsource(nxsfile: h5py.File, source: Source):
+@timed
+def write_NXsource(nxsfile: h5py.File, source: Source, compact: bool = False):
     """
     Write NXsource group /in entry/source.
 
     Args:
         nxsfile (h5py.File): NeXus file handle.
         source (Source): Source definition, containing the facility information.
+        compact (bool, optional): Store small datasets with compact layout. Defaults to False.
     """
     NXclass_logger.debug("Start writing NXsource.")
     nxsource = nxsfile.require_group("/entry/source")
@@ -402,19 +433,26 @@ def write_NXsource(nxsfile: h5py.File, source: Source):
         ("NXsource",),
     )
 
-    nxsource.create_dataset("name", data=np.bytes_(source.facility.name))
+    write_small_dataset(
+        nxsource, "name", np.bytes_(source.facility.name), compact=compact
+    )
     create_attributes(nxsource["name"], ("short_name",), (source.facility.short_name,))
-    nxsource.create_dataset("type", data=np.bytes_(source.facility.type))
+    write_small_dataset(
+        nxsource, "type", np.bytes_(source.facility.type), compact=compact
+    )
     if source.probe:
-        nxsource.create_dataset("probe", data=np.bytes_(source.probe))
+        write_small_dataset(nxsource, "probe", np.bytes_(source.probe), compact=compact)
 
 
 # NXdetector writer
+@timed
 def write_NXdetector(
     nxsfile: h5py.File,
     detector: Detector,
     num_images: int = None,
     meta: Path = None,
+    compact: bool = False,
+    fields: NXfields = "all",
 ):
     """
     Write_NXdetector group at /entry/instrument/detector.
@@ -424,26 +462,34 @@ def write_NXdetector(
         detector (Detector): Detector definition.
         num_images (int, optional): Total number of images in collections. Defaults to None
         meta (Path, optional): Path to _meta.h5 file. Defaults to None.
+        compact (bool, optional): Store small datasets with compact layout. Defaults to False.
+        fields (NXfields, optional): Which fields to write. "static" only writes the fields \
+            which depend on the detector definition alone, "dynamic" the ones depending on \
+            the collection (beam center, exposure time, distance, axes, links to the meta file). \
+            Defaults to "all".
     """
     NXclass_logger.debug("Start writing NXdetector.")
     # Create NXdetector group, unless it already exists, in which case just open it.
     nxdetector = nxsfile.require_group("/entry/instrument/detector")
-    create_attributes(
-        nxdetector,
-        ("NX_class",),
-        ("NXdetector",),
-    )
-
-    # Detector description
-    nxdetector.create_dataset(
-        "description", data=np.bytes_(detector.detector_params.description)
-    )
-    nxdetector.create_dataset(
-        "type", data=np.bytes_(detector.detector_params.detector_type)
-    )
 
     collection_mode = detector.get_detector_mode()
 
+    if fields != "dynamic":
+        _write_NXdetector_static_fields(
+            nxdetector, detector, collection_mode, compact=compact
+        )
+
+    if fields == "static":
+        # Write_NXcollection
+        write_NXcollection(
+            nxdetector,
+            detector.detector_params,
+            collection_mode,
+            compact=compact,
+            fields="static",
+        )
+        return
+
     # If there is a meta file, a lot of information will be linked instead of copied
     if isinstance(detector.detector_params, EigerDetector):
         if meta:
@@ -465,97 +511,58 @@ def write_NXdetector(
                 No links will be written. Pixel mask and flatfield information missing.
                 """
             )
-    else:
+    elif collection_mode == "events":
         # If it's an eiger mask and flatfield will be in the links along with other info.
         # If it isn't, the mask and flatfield info still needs to go in
         NXclass_logger.info("Gathering and writing pixel_mask and flatfield to file.")
         pixel_mask_file = detector.detector_params.constants["pixel_mask"]
         flatfield_file = detector.detector_params.constants["flatfield"]
-        if collection_mode == "events":
-            wd = Path(nxsfile.filename).parent
-            # Bad pixel mask
-            mask_and_flatfield_writer_for_event_data(
-                nxdetector,
-                "pixel_mask",
-                pixel_mask_file,
-                detector.detector_params.constants["pixel_mask_applied"],
-                wd,
-                detector.detector_params.description.lower(),
-            )
-            # Flatfield
-            mask_and_flatfield_writer_for_event_data(
-                nxdetector,
-                "flatfield",
-                flatfield_file,
-                detector.detector_params.constants["flatfield_applied"],
-                wd,
-                detector.detector_params.description.lower(),
-            )
-        else:
-            # Flatfield
-            mask_and_flatfield_writer(
-                nxdetector,
-                "flatfield",
-                detector.detector_params.constants["flatfield"],
-                detector.detector_params.constants["flatfield_applied"],
-            )
-            # Bad pixel mask
-            mask_and_flatfield_writer(
-                nxdetector,
-                "pixel_mask",
-                detector.detector_params.constants["pixel_mask"],
-                detector.detector_params.constants["pixel_mask_applied"],
-            )
+        wd = Path(nxsfile.filename).parent
+        # Bad pixel mask
+        mask_and_flatfield_writer_for_event_data(
+            nxdetector,
+            "pixel_mask",
+            pixel_mask_file,
+            detector.detector_params.constants["pixel_mask_applied"],
+            wd,
+            detector.detector_params.description.lower(),
+        )
+        # Flatfield
+        mask_and_flatfield_writer_for_event_data(
+            nxdetector,
+            "flatfield",
+            flatfield_file,
+            detector.detector_params.constants["flatfield_applied"],
+            wd,
+            detector.detector_params.description.lower(),
+        )
 
     # Beam center
-    beam_center_x = nxdetector.create_dataset(
-        "beam_center_x", data=detector.beam_center[0]
+    beam_center_x = write_small_dataset(
+        nxdetector, "beam_center_x", detector.beam_center[0], compact=compact
     )
     create_attributes(beam_center_x, ("units",), ("pixels",))
-    beam_center_y = nxdetector.create_dataset(
-        "beam_center_y", data=detector.beam_center[1]
+    beam_center_y = write_small_dataset(
+        nxdetector, "beam_center_y", detector.beam_center[1], compact=compact
     )
     create_attributes(beam_center_y, ("units",), ("pixels",))
 
-    # Pixel size in m
-    x_pix = units_of_length(detector.detector_params.pixel_size[0], True)
-    x_pix_size = nxdetector.create_dataset("x_pixel_size", data=x_pix.magnitude)
-    create_attributes(x_pix_size, ("units",), (format(x_pix.units, "~"),))
-    y_pix = units_of_length(detector.detector_params.pixel_size[1], True)
-    y_pix_size = nxdetector.create_dataset("y_pixel_size", data=y_pix.magnitude)
-    create_attributes(y_pix_size, ("units",), (format(y_pix.units, "~"),))
-
-    # Sensor material, sensor thickness in m
-    nxdetector.create_dataset(
-        "sensor_material", data=np.bytes_(detector.detector_params.sensor_material)
-    )
-    sensor_thickness = units_of_length(detector.detector_params.sensor_thickness, True)
-    nxdetector.create_dataset("sensor_thickness", data=sensor_thickness.magnitude)
-    create_attributes(
-        nxdetector["sensor_thickness"],
-        ("units",),
-        (format(sensor_thickness.units, "~"),),
-    )
-
     # Count time
     exp_time = units_of_time(detector.exp_time)
-    nxdetector.create_dataset("count_time", data=exp_time.magnitude)
+    write_small_dataset(nxdetector, "count_time", exp_time.magnitude, compact=compact)
     create_attributes(
         nxdetector["count_time"], ("units",), (format(exp_time.units, "~"),)
     )
 
-    # If detector mode is images write overload and underload
-    if collection_mode == "images":
-        nxdetector.create_dataset(
-            "saturation_value", data=detector.detector_params.overload
-        )
-        nxdetector.create_dataset(
-            "underload_value", data=detector.detector_params.underload
-        )
-
     # Write_NXcollection
     write_NXcollection(
-        nxdetector, detector.detector_params, collection_mode, num_images, meta
+        nxdetector,
+        detector.detector_params,
+        collection_mode,
+        num_images,
+        meta,
+        compact=compact,
+        fields="all" if fields == "all" else "dynamic",
     )
 
     # Write NXtransformations: entry/instrument/detector/transformations/detector_z and two_theta
@@ -565,7 +572,7 @@ def write_NXdetector(
         detector.detector_axes[-1].name,
         path="/entry/instrument/detector/transformations",
     )
-    nxdetector.create_dataset("depends_on", data=det_dep)
+    write_small_dataset(nxdetector, "depends_on", det_dep, compact=compact)
 
     # Just a det_z check
     if "det_z" not in list(nxdetector["transformations"].keys()):
@@ -590,19 +597,116 @@ def write_NXdetector(
     ][0]
     dist = units_of_length(str(detector.detector_axes[det_z_idx].start_pos) + "mm")
 
-    nxdetector.create_dataset("distance", data=dist.to("m").magnitude)
+    write_small_dataset(nxdetector, "distance", dist.to("m").magnitude, compact=compact)
     create_attributes(
         nxdetector["distance"], ("units",), (format(dist.to("m").units, "~"))
     )
 
 
+def _write_NXdetector_static_fields(
+    nxdetector: h5py.Group,
+    detector: Detector,
+    collection_mode: str,
+    compact: bool = False,
+):
+    """Write the NXdetector fields which only depend on the detector definition."""
+    create_attributes(
+        nxdetector,
+        ("NX_class",),
+        ("NXdetector",),
+    )
+
+    # Detector description
+    write_small_dataset(
+        nxdetector,
+        "description",
+        np.bytes_(detector.detector_params.description),
+        compact=compact,
+    )
+    write_small_dataset(
+        nxdetector,
+        "type",
+        np.bytes_(detector.detector_params.detector_type),
+        compact=compact,
+    )
+
+    # For an Eiger, mask and flatfield are linked from the meta file.
+    # For images from any other detector, write them here
+    if (
+        not isinstance(detector.detector_params, EigerDetector)
+        and collection_mode != "events"
+    ):
+        NXclass_logger.info("Gathering and writing pixel_mask and flatfield to file.")
+        # Flatfield
+        mask_and_flatfield_writer(
+            nxdetector,
+            "flatfield",
+            detector.detector_params.constants["flatfield"],
+            detector.detector_params.constants["flatfield_applied"],
+        )
+        # Bad pixel mask
+        mask_and_flatfield_writer(
+            nxdetector,
+            "pixel_mask",
+            detector.detector_params.constants["pixel_mask"],
+            detector.detector_params.constants["pixel_mask_applied"],
+        )
+
+    # Pixel size in m
+    x_pix = units_of_length(detector.detector_params.pixel_size[0], True)
+    x_pix_size = write_small_dataset(
+        nxdetector, "x_pixel_size", x_pix.magnitude, compact=compact
+    )
+    create_attributes(x_pix_size, ("units",), (format(x_pix.units, "~"),))
+    y_pix = units_of_length(detector.detector_params.pixel_size[1], True)
+    y_pix_size = write_small_dataset(
+        nxdetector, "y_pixel_size", y_pix.magnitude, compact=compact
+    )
+    create_attributes(y_pix_size, ("units",), (format(y_pix.units, "~"),))
+
+    # Sensor material, sensor thickness in m
+    write_small_dataset(
+        nxdetector,
+        "sensor_material",
+        np.bytes_(detector.detector_params.sensor_material),
+        compact=compact,
+    )
+    sensor_thickness = units_of_length(detector.detector_params.sensor_thickness, True)
+    write_small_dataset(
+        nxdetector, "sensor_thickness", sensor_thickness.magnitude, compact=compact
+    )
+    create_attributes(
+        nxdetector["sensor_thickness"],
+        ("units",),
+        (format(sensor_thickness.units, "~"),),
+    )
+
+    # If detector mode is images write overload and underload
+    if collection_mode == "images":
+        write_small_dataset(
+            nxdetector,
+            "saturation_value",
+            detector.detector_params.overload,
+            compact=compact,
+        )
+        write_small_dataset(
+            nxdetector,
+            "underload_value",
+            detector.detector_params.underload,
+            compact=compact,
+        )
+
+
 # NXdetector_module writer
+@timed
 def write_NXdetector_module(
     nxsfile: h5py.File,
     module: dict,
     image_size: list | tuple,
     pixel_size: list | tuple,
     beam_center: Optional[list | tuple] = None,
+    compact: bool = False,
+    fields: NXfields = "all",
 ):
     """
     Write NXdetector_module group at /entry/instrument/detector/module.
@@ -613,19 +717,13 @@ def write_NXdetector_module(
         image_size (list | tuple): Size of the detector, in pixels, passed in the order (slow, fast) axis.
         pixel_size (list | tuple): Size of the single pixels in fast and slow direction, in mm.
         beam_center (Optional[list | tuple], optional): Beam center position, needed only if origin needs to be calculated. Defaults to None.
+        compact (bool, optional): Store small datasets with compact layout. Defaults to False.
+        fields (NXfields, optional): Which fields to write. "dynamic" only writes the module_offset, \
+            which depends on the beam center, "static" everything else. Defaults to "all".
     """
     NXclass_logger.debug("Start writing NXdetector_module.")
     # Create NXdetector_module group, unless it already exists, in which case just open it.
     nxmodule = nxsfile.require_group("/entry/instrument/detector/module")
-    create_attributes(
-        nxmodule,
-        ("NX_class",),
-        ("NXdetector_module",),
-    )
-
-    nxmodule.create_dataset("data_origin", data=np.array([0, 0]), dtype=np.uint32)
-    nxmodule.create_dataset("data_size", data=image_size, dtype=np.uint32)
-    nxmodule.create_dataset("data_stride", data=np.array([1, 1]), dtype=np.uint32)
 
     # Write fast_ and slow_ pixel_direction
     fast_axis = module["fast_axis"]
@@ -637,48 +735,76 @@ def write_NXdetector_module(
         offsets = [(0, 0, 0), (0, 0, 0)]
 
     x_pix = units_of_length(pixel_size[0], True)
-    fast_pixel = nxmodule.create_dataset("fast_pixel_direction", data=x_pix.magnitude)
-    create_attributes(
-        fast_pixel,
-        (
-            "depends_on",
-            "offset",
-            "offset_units",
-            "transformation_type",
-            "units",
-            "vector",
-        ),
-        (
-            "/entry/instrument/detector/transformations/det_z",
-            offsets[0],
-            "mm",
-            "translation",
-            format(x_pix.units, "~"),
-            fast_axis,
-        ),
-    )
-
     y_pix = units_of_length(pixel_size[1], True)
-    slow_pixel = nxmodule.create_dataset("slow_pixel_direction", data=y_pix.magnitude)
-    create_attributes(
-        slow_pixel,
-        (
-            "depends_on",
-            "offset",
-            "offset_units",
-            "transformation_type",
-            "units",
-            "vector",
-        ),
-        (
-            "/entry/instrument/detector/module/fast_pixel_direction",
-            offsets[1],
-            "mm",
-            "translation",
-            format(y_pix.units, "~"),
-            slow_axis,
-        ),
-    )
+
+    if fields != "dynamic":
+        create_attributes(
+            nxmodule,
+            ("NX_class",),
+            ("NXdetector_module",),
+        )
+
+        write_small_dataset(
+            nxmodule, "data_origin", np.array([0, 0]), np.uint32, compact=compact
+        )
+        write_small_dataset(
+            nxmodule, "data_size", image_size, np.uint32, compact=compact
+        )
+        write_small_dataset(
+            nxmodule, "data_stride", np.array([1, 1]), np.uint32, compact=compact
+        )
+
+        fast_pixel = write_small_dataset(
+            nxmodule, "fast_pixel_direction", x_pix.magnitude, compact=compact
+        )
+        create_attributes(
+            fast_pixel,
+            (
+                "depends_on",
+                "offset",
+                "offset_units",
+                "transformation_type",
+                "units",
+                "vector",
+            ),
+            (
+                "/entry/instrument/detector/transformations/det_z",
+                offsets[0],
+                "mm",
+                "translation",
+                format(x_pix.units, "~"),
+                fast_axis,
+            ),
+        )
+
+        slow_pixel = write_small_dataset(
+            nxmodule, "slow_pixel_direction", y_pix.magnitude, compact=compact
+        )
+        create_attributes(
+            slow_pixel,
+            (
+                "depends_on",
+                "offset",
+                "offset_units",
+                "transformation_type",
+                "units",
+                "vector",
+            ),
+            (
+                "/entry/instrument/detector/module/fast_pixel_direction",
+                offsets[1],
+                "mm",
+                "translation",
+                format(y_pix.units, "~"),
+                slow_axis,
+            ),
+        )
+
+    if fields == "static":
+        return
+
+    fast_pixel = nxmodule["fast_pixel_direction"]
+    slow_pixel = nxmodule["slow_pixel_direction"]
 
     # If module_offset is set to 1 or 2, calculate accordinlgy and write the field
     if "module_offset" not in module.keys():
@@ -701,7 +827,9 @@ def write_NXdetector_module(
             slow_axis,
             mode=module["module_offset"],
         )
-        module_offset = nxmodule.create_dataset("module_offset", data=offset_val)
+        module_offset = write_small_dataset(
+            nxmodule, "module_offset", offset_val, compact=compact
+        )
         create_attributes(
             module_offset,
             (
@@ -729,12 +857,15 @@ def write_NXdetector_module(
 
 
 # NXCollection writer (detectorSpecific)
+@timed
 def write_NXcollection(
     nxdetector: h5py.Group,
     detector_params: DetectorType,
     collection_mode: str = "images",
     num_images: int = None,
     meta: Path = None,
+    compact: bool = False,
+    fields: NXfields = "all",
 ):
     """
     Write a NXcollection group inside NXdetector as detectorSpecific.
@@ -745,39 +876,77 @@ def write_NXcollection(
         collection_mode (str, optional): Data type collected by detector. Defaults to "images".
         num_images (int, optional): Total number of images collected. Defaults to None.
         meta (Path, optional): Path to _meta.h5 file. Defaults to None.
+        compact (bool, optional): Store small datasets with compact layout. Defaults to False.
+        fields (NXfields, optional): Which fields to write. "static" only writes the \
+            detector constants, "dynamic" the number of images and the links to the meta \
+            file. Defaults to "all".
     """
     NXclass_logger.debug("Start writing detectorSpecific group as NXcollection.")
     # Create detectorSpecific group
     grp = nxdetector.require_group("detectorSpecific")
-    grp.create_dataset(
-        "x_pixels", data=detector_params.image_size[1], dtype=np.uint32
-    )  # fast axis
-    grp.create_dataset(
-        "y_pixels", data=detector_params.image_size[0], dtype=np.uint32
-    )  # slow axis
-    # Write these non-spec fields as well because of autoPROC:
-    grp.create_dataset(
-        "x_pixels_in_detector", data=detector_params.image_size[1], dtype=np.uint32
-    )  # fast axis
-    grp.create_dataset(
-        "y_pixels_in_detector", data=detector_params.image_size[0], dtype=np.uint32
-    )  # slow axis
+    if fields != "dynamic":
+        write_small_dataset(
+            grp, "x_pixels", detector_params.image_size[1], np.uint32, compact=compact
+        )  # fast axis
+        write_small_dataset(
+            grp, "y_pixels", detector_params.image_size[0], np.uint32, compact=compact
+        )  # slow axis
+        # Write these non-spec fields as well because of autoPROC:
+        write_small_dataset(
+            grp,
+            "x_pixels_in_detector",
+            detector_params.image_size[1],
+            np.uint32,
+            compact=compact,
+        )  # fast axis
+        write_small_dataset(
+            grp,
+            "y_pixels_in_detector",
+            detector_params.image_size[0],
+            np.uint32,
+            compact=compact,
+        )  # slow axis
+        if "TRISTAN" in detector_params.description.upper():
+            ureg = get_unit_registry()
+            tick = ureg.Quantity(detector_params.constants["detector_tick"])
+            write_small_dataset(grp, "detector_tick", tick.magnitude, compact=compact)
+            grp["detector_tick"].attrs["units"] = np.bytes_(format(tick.units, "~"))
+            freq = ureg.Quantity(detector_params.constants["detector_frequency"])
+            write_small_dataset(
+                grp, "detector_frequency", freq.magnitude, compact=compact
+            )
+            grp["detector_frequency"].attrs["units"] = np.bytes_(
+                format(freq.units, "~")
+            )
+            write_small_dataset(
+                grp,
+                "timeslice_rollover_bits",
+                detector_params.constants["timeslice_rollover"],
+                compact=compact,
+            )
+    if fields == "static":
+        return
+
     if collection_mode == "images":
-        grp.create_dataset("nimages", data=num_images)
+        write_small_dataset(grp, "nimages", num_images, compact=compact)
     if "software_version" in list(detector_params.constants.keys()):
         if not detector_params.hasMeta or collection_mode == "events":
-            grp.create_dataset(
+            write_small_dataset(
+                grp,
                 "software_version",
-                data=np.bytes_(detector_params.constants["software_version"]),
+                np.bytes_(detector_params.constants["software_version"]),
+                compact=compact,
             )
         elif detector_params.hasMeta and meta:
             grp["software_version"] = h5py.ExternalLink(
                 meta.name, detector_params.constants["software_version"]
             )
         else:
-            grp.create_dataset(
+            write_small_dataset(
+                grp,
                 "software_version",
-                data=np.bytes_(detector_params.constants["software_version"]),
+                np.bytes_(detector_params.constants["software_version"]),
+                compact=compact,
             )
     if "EIGER" in detector_params.description.upper() and meta:
         for field in DETECTOR_SPECIFIC_PARAMS:
@@ -786,20 +955,10 @@ def write_NXcollection(
                 grp[field] = h5py.ExternalLink(
                     meta.name, detector_params.constants[field]
                 )
-    elif "TRISTAN" in detector_params.description.upper():
-        tick = ureg.Quantity(detector_params.constants["detector_tick"])
-        grp.create_dataset("detector_tick", data=tick.magnitude)
-        grp["detector_tick"].attrs["units"] = np.bytes_(format(tick.units, "~"))
-        freq = ureg.Quantity(detector_params.constants["detector_frequency"])
-        grp.create_dataset("detector_frequency", data=freq.magnitude)
-        grp["detector_frequency"].attrs["units"] = np.bytes_(format(freq.units, "~"))
-        grp.create_dataset(
-            "timeslice_rollover_bits",
-            data=detector_params.constants["timeslice_rollover"],
-        )
 
 
 # NXdatetime writer
+@timed
 def write_NXdatetime(
     nxsfile: h5py.File,
     timestamp: datetime | str,
@@ -835,6 +994,7 @@ def write_NXdatetime(
 
 # NXnote writer
 # To be used e.g. as a place to store pump-probe info such as pump delay/width
+@timed
 def write_NXnote(nxsfile: h5py.File, loc: str, info: dict):
     """
     Write any additional information as a NXnote class in a specified location in the NeXus file.
@@ -862,6 +1022,7 @@ def write_NXnote(nxsfile: h5py.File, loc: str, info: dict):
             NXclass_logger.debug(f"{k} dataset written in {loc}.")
 
 
+@timed
 def write_NXcoordinate_system_set(
     nxsfile: h5py.File,
     convention: str,
@@ -6,17 +6,23 @@ from __future__ import annotations
 
 import logging
 import math
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import h5py
 import numpy as np
-from numpy.typing import DTypeLike
+from numpy.typing import ArrayLike, DTypeLike
 
+from ..h5_profiles import H5Profile, get_h5_profile
 from ..nxs_utils.detector import Detector
 from ..nxs_utils.goniometer import Goniometer
 from ..nxs_utils.sample import Sample
 from ..nxs_utils.source import Attenuator, Beam, Source
+from ..timings import Timings, timed_method
 from ..tools.vds_w_tools import (
     clean_unused_links,
     image_vds_writer,
@@ -26,6 +32,7 @@ from ..utils import (
     MAX_FRAMES_PER_DATASET,
     MAX_SUFFIX_DIGITS,
     get_filename_template,
+    get_iso_timestamp,
 )
 from .nxclass_writers import (
     write_NXdata,
@@ -38,12 +45,24 @@ from .nxclass_writers import (
     write_NXsample,
     write_NXsource,
 )
-from .write_utils import TSdset, calculate_estimated_end_time
+from .templates import NXmxTemplateCache
+from .write_utils import (
+    TSdset,
+    calculate_estimated_end_time,
+    create_attributes,
+    open_in_memory,
+)
+
+if TYPE_CHECKING:
+    from ..tools.tristan_tools.statistics import EventStatistics
 
 # Logger
 nxmx_logger = logging.getLogger("nexgen.NXmxFileWriter")
 nxmx_logger.setLevel(logging.DEBUG)
 
+# Location of the per-frame metadata updated during a live collection
+FRAME_METADATA_LOC = "/entry/instrument/detector/frame_metadata"
+
 
 class NXmxFileWriter:
     """A class to generate NXmx format NeXus files."""
@@ -58,6 +77,7 @@ class NXmxFileWriter:
         attenuator: Attenuator,
         tot_num_imgs: int,  # | None = None,
         sample: Sample | None = None,
+        h5_profile: H5Profile | str | None = None,
     ):
         self.filename = Path(filename).expanduser().resolve()
         self.goniometer = goniometer
@@ -67,6 +87,9 @@ class NXmxFileWriter:
         self.attenuator = attenuator
         self.tot_num_imgs = tot_num_imgs
         self.sample = sample
+        self.h5_profile = get_h5_profile(h5_profile)
+        self._session: h5py.File | None = None
+        self.timings = Timings()
 
     def _get_meta_file(self, image_filename: str = None) -> Path | None:
         """Get filename_meta.h5 file in directory if it's supposed to exist."""
@@ -78,6 +101,80 @@ class NXmxFileWriter:
         else:
             return self.filename.parent / f"{self.filename.stem}_meta.h5"
 
+    def _open_for_writing(self, write_mode: str, in_memory: bool = False, **kwargs):
+        """Open the NeXus file for writing, either directly on disk or as an in-memory image \
+        to be flushed to disk in one go when closed. The HDF5 properties defined in the \
+        writer's profile are applied, unless overridden by the keyword arguments."""
+        file_kwargs = self.h5_profile.get_file_kwargs(write_mode)
+        file_kwargs.update({k: v for k, v in kwargs.items() if v is not None})
+        if in_memory:
+            nxmx_logger.debug(f"Building {self.filename.name} in memory.")
+            return open_in_memory(self.filename, write_mode, **file_kwargs)
+        return h5py.File(self.filename, write_mode, **file_kwargs)
+
+    def _get_handle(self, write_mode: str, in_memory: bool = False, **kwargs):
+        """Get the handle to the NeXus file: the one kept open by the current session if \
+        there is one, otherwise open the file in the requested mode."""
+        if self._session is not None:
+            return nullcontext(self._session)
+        return self._open_for_writing(write_mode, in_memory, **kwargs)
+
+    @contextmanager
+    def session(
+        self, write_mode: str = "x", in_memory: bool = False, **kwargs
+    ) -> Iterator[NXmxFileWriter]:
+        """Keep the NeXus file open across all the writing steps of a collection.
+
+        Inside the session, write, write_vds, update_timestamps and add_NXnote all use the \
+        same file handle instead of reopening the file each time, and the file is flushed \
+        and closed only once on exit.
+
+        Example:
+            with writer.session() as s:
+                s.write(image_filename=image_filename, start_time=start_time)
+                s.write_vds(vds_dtype=vds_dtype)
+                s.update_timestamps(end_time, "end_time")
+
+        Args:
+            write_mode (str, optional): String indicating writing mode for the output NeXus file. \
+                Accepts any valid h5py file opening mode. Defaults to "x".
+            in_memory (bool, optional): Build the whole file in memory and flush it to disk \
+                with a single write and atomic rename at the end of the session. Defaults to False.
+
+        Keyword Args:
+            Any additional keyword argument accepted by h5py.File, eg. libver.
+
+        Raises:
+            RuntimeError: If a session is already open.
+
+        Yields:
+            Iterator[NXmxFileWriter]: The writer itself.
+        """
+        if self._session is not None:
+            raise RuntimeError(f"A session on {self.filename} is already open.")
+        with self._open_for_writing(write_mode, in_memory, **kwargs) as nxs:
+            self._session = nxs
+            nxmx_logger.debug(f"Session on {self.filename} open.")
+            try:
+                yield self
+            finally:
+                self._session = None
+        nxmx_logger.debug(f"Session on {self.filename} closed.")
+
+    def save_timings(self, filename: Path | str | None = None) -> Path:
+        """Save the timings of the writing phases run so far to a JSON sidecar file.
+
+        Args:
+            filename (Path | str | None, optional): Output file. Defaults to \
+                <nexus filename>.timings.json next to the NeXus file.
+
+        Returns:
+            Path: The sidecar file.
+        """
+        if filename is None:
+            filename = self.filename.with_suffix(".timings.json")
+        return self.timings.save(filename, nexus_file=self.filename)
+
     def _get_collection_time(self) -> float:
         """_Returns total collection time."""
         return self.detector.exp_time * self.tot_num_imgs
@@ -107,6 +204,7 @@ class NXmxFileWriter:
         nxmx_logger.debug(f"Number of datafiles to be written: {len(datafiles)}.")
         return datafiles
 
+    @timed_method
     def update_timestamps(
         self, timestamp: datetime | str, dset_name: TSdset = "end_time"
     ):
@@ -117,10 +215,11 @@ class NXmxFileWriter:
             dset_name (TSdset, optional): Name of dataset to write to nexus file.\
                 Allowed values: ["start_time", "end_time", "end_time_estimated". Defaults to "end_time".
         """
-        with h5py.File(self.filename, "r+") as nxs:
+        with self._get_handle("r+") as nxs:
             write_NXdatetime(nxs, timestamp, dset_name)
         nxmx_logger.info(f"{dset_name} timestamp for collection updated.")
 
+    @timed_method
     def add_NXnote(self, notes: dict, loc: str = "/entry/notes"):
         """Save any additional information as NXnote at the end of the collection.
 
@@ -130,10 +229,11 @@ class NXmxFileWriter:
             loc (str, optional): Location in the NeXus file to save metadata. \
                 Defaults to "/entry/notes".
         """
-        with h5py.File(self.filename, "r+") as nxs:
+        with self._get_handle("r+") as nxs:
             write_NXnote(nxs, loc, notes)
         nxmx_logger.debug(f"Notes saved in {loc}.")
 
+    @timed_method
     def write(
         self,
         image_datafiles: list | None = None,
@@ -143,10 +243,15 @@ class NXmxFileWriter:
         write_mode: str = "x",
         add_non_standard: bool = True,
         data_entry_key: str = "data",
+        compact_layout: bool = False,
+        in_memory: bool = False,
+        template_cache: NXmxTemplateCache | None = None,
     ):
         """Write the NXmx format NeXus file.
 
         This function calls the writers for the main NXclass objects.
+        If called inside a session, the session file handle is used and write_mode and \
+        in_memory are ignored.
 
         Args:
             image_datafiles (list | None, optional): List of image data files. If not passed, \
@@ -164,6 +269,15 @@ class NXmxFileWriter:
             add_non_standard (bool, optional): Flag if non-standard NXsample fields should be added \
                 for processing to work. Defaults to True, will change in the future.
             data_entry_key (str, optional): Dataset entry key in datafiles. Defaults to data.
+            compact_layout (bool, optional): Store the small metadata datasets with HDF5 compact \
+                layout and open the file with the latest library version object headers. \
+                Defaults to False.
+            in_memory (bool, optional): Build the whole file in memory and flush it to disk \
+                with a single write and atomic rename once complete. Only valid for write modes \
+                creating a new file. Defaults to False.
+            template_cache (NXmxTemplateCache | None, optional): If passed, copy the static \
+                instrument, detector and source groups from the cached template for this \
+                configuration and only write the fields specific to the collection. Defaults to None.
         """
         metafile = self._get_meta_file(image_filename)
         if metafile:
@@ -179,7 +293,8 @@ class NXmxFileWriter:
 
         osc, transl = self.goniometer.define_scan_from_goniometer_axes()
 
-        with h5py.File(self.filename, write_mode) as nxs:
+        libver = "latest" if compact_layout else None
+        with self._get_handle(write_mode, in_memory, libver=libver) as nxs:
             # NXentry and NXmx definition
             write_NXentry(nxs)
 
@@ -198,12 +313,21 @@ class NXmxFileWriter:
                 nxs, datafiles, "images", list(osc.keys())[0], entry_key=data_entry_key
             )
 
+            # Static groups: entry/source and entry/instrument
+            if template_cache:
+                template_cache.stamp(
+                    nxs, self.source, self.detector, compact=compact_layout
+                )
+            fields = "dynamic" if template_cache else "all"
+
             # NXinstrument: entry/instrument
             write_NXinstrument(
                 nxs,
                 self.beam,
                 self.attenuator,
                 self.source,
+                compact=compact_layout,
+                fields=fields,
             )
 
             # NXdetector: entry/instrument/detector
@@ -212,6 +336,8 @@ class NXmxFileWriter:
                 self.detector,
                 self.tot_num_imgs,
                 metafile,
+                compact=compact_layout,
+                fields=fields,
             )
 
             # NXmodule: entry/instrument/detector/module
@@ -221,10 +347,13 @@ class NXmxFileWriter:
                 self.detector.detector_params.image_size,
                 self.detector.detector_params.pixel_size,
                 beam_center=self.detector.beam_center,
+                compact=compact_layout,
+                fields=fields,
             )
 
             # NXsource: entry/source
-            write_NXsource(nxs, self.source)
+            if not template_cache:
+                write_NXsource(nxs, self.source, compact=compact_layout)
 
             # NXsample: entry/sample
             sample_dep = self.sample.depends_on if self.sample else None
@@ -240,6 +369,7 @@ class NXmxFileWriter:
                 add_nonstandard_fields=add_non_standard,
             )
 
+    @timed_method
     def write_vds(
         self,
         vds_offset: int = 0,
@@ -277,7 +407,7 @@ class NXmxFileWriter:
 
         nxmx_logger.debug(f"VDS shape set to {vds_shape}.")
 
-        with h5py.File(self.filename, "r+") as nxs:
+        with self._get_handle("r+") as nxs:
             # For a coming ticket - for now write a separate file
             # Here will be better to have a match-case for VDS mapping. Default is the same as blocked.
             if "jungfrau" in self.detector.detector_params.description.lower():
@@ -323,6 +453,7 @@ class EventNXmxFileWriter(NXmxFileWriter):
         attenuator: Attenuator,
         axis_end_position: float | None = None,
         sample: Sample | None = None,
+        h5_profile: H5Profile | str | None = None,
     ):
         super().__init__(
             filename,
@@ -333,9 +464,11 @@ class EventNXmxFileWriter(NXmxFileWriter):
             attenuator,
             None,
             sample,
+            h5_profile,
         )
         self.end_pos = axis_end_position
 
+    @timed_method
     def write(
         self,
         image_filename: str | None = None,
@@ -343,10 +476,15 @@ class EventNXmxFileWriter(NXmxFileWriter):
         write_mode: str = "x",
         add_non_standard: bool = False,
         data_entry_key: str = "data",
+        compact_layout: bool = False,
+        in_memory: bool = False,
+        template_cache: NXmxTemplateCache | None = None,
     ):
         """Write a NXmx-like NeXus file for event mode data collections.
 
         This method overrides the write() method of NXmxFileWriter, from which thsi class inherits.
+        If called inside a session, the session file handle is used and write_mode and \
+        in_memory are ignored.
 
         Args:
             start_time (datetime | str, optional): Collection estimated end time if available, in the \
@@ -359,6 +497,15 @@ class EventNXmxFileWriter(NXmxFileWriter):
             add_non_standard (bool, optional): Flag if non-standard NXsample fields should be added \
                 for processing to work. Defaults to False.
             data_entry_key (str, optional): Dataset entry key in datafiles. Defaults to data.
+            compact_layout (bool, optional): Store the small metadata datasets with HDF5 compact \
+                layout and open the file with the latest library version object headers. \
+                Defaults to False.
+            in_memory (bool, optional): Build the whole file in memory and flush it to disk \
+                with a single write and atomic rename once complete. Only valid for write modes \
+                creating a new file. Defaults to False.
+            template_cache (NXmxTemplateCache | None, optional): If passed, copy the static \
+                instrument, detector and source groups from the cached template for this \
+                configuration and only write the fields specific to the collection. Defaults to None.
         """
         # Get metafile
         # No data files, just link to meta
@@ -370,7 +517,8 @@ class EventNXmxFileWriter(NXmxFileWriter):
         # Here no scan, just get (start, stop) from omega/phi as osc and None as transl
         osc, _ = self.goniometer.define_scan_axes_for_event_mode(self.end_pos)
 
-        with h5py.File(self.filename, write_mode) as nxs:
+        libver = "latest" if compact_layout else None
+        with self._get_handle(write_mode, in_memory, libver=libver) as nxs:
             # NXentry and NXmx definition
             write_NXentry(nxs)
 
@@ -387,12 +535,21 @@ class EventNXmxFileWriter(NXmxFileWriter):
                 entry_key=data_entry_key,
             )
 
+            # Static groups: entry/source and entry/instrument
+            if template_cache:
+                template_cache.stamp(
+                    nxs, self.source, self.detector, compact=compact_layout
+                )
+            fields = "dynamic" if template_cache else "all"
+
             # NXinstrument: entry/instrument
             write_NXinstrument(
                 nxs,
                 self.beam,
                 self.attenuator,
                 self.source,
+                compact=compact_layout,
+                fields=fields,
             )
 
             # NXdetector: entry/instrument/detector
@@ -400,6 +557,8 @@ class EventNXmxFileWriter(NXmxFileWriter):
                 nxs,
                 self.detector,
                 meta=metafile,
+                compact=compact_layout,
+                fields=fields,
             )
 
             # NXmodule: entry/instrument/detector/module
@@ -409,10 +568,13 @@ class EventNXmxFileWriter(NXmxFileWriter):
                 self.detector.detector_params.image_size,
                 self.detector.detector_params.pixel_size,
                 beam_center=self.detector.beam_center,
+                compact=compact_layout,
+                fields=fields,
             )
 
             # NXsource: entry/source
-            write_NXsource(nxs, self.source)
+            if not template_cache:
+                write_NXsource(nxs, self.source, compact=compact_layout)
 
             # NXsample: entry/sample
             sample_dep = self.sample.depends_on if self.sample else None
@@ -426,3 +588,324 @@ class EventNXmxFileWriter(NXmxFileWriter):
                 sample_details=sample_info,
                 add_nonstandard_fields=add_non_standard,
             )
+
+    @timed_method
+    def add_event_statistics(
+        self,
+        image_filename: str | None = None,
+        rate_bin_width: float = 0.1,
+        max_workers: int | None = None,
+        save_index: bool = True,
+    ) -> EventStatistics:
+        """Scan the event files once the collection is finished and save the events per \
+        module, time span, shutter cues and count rate in \
+        /entry/instrument/detector/event_statistics.
+
+        The count_time of the detector is updated with the actual time the shutter was open, \
+        or the time span of the events if the shutter cues weren't recorded.
+
+        Args:
+            image_filename (str | None, optional): Filename stem to use to look for the meta \
+                file, if it doesn't match the NeXus file name. Defaults to None.
+            rate_bin_width (float, optional): Width of the count rate bins, in s. \
+                Defaults to 0.1.
+            max_workers (int | None, optional): Number of event files scanned in parallel. \
+                Defaults to None, for as many as there are files, up to the number of CPUs.
+            save_index (bool, optional): Save the timestamp index of the event files, built \
+                during the scan, next to the meta file if there isn't one already. \
+                Defaults to True.
+
+        Returns:
+            EventStatistics: Statistics of the collection.
+        """
+        # Imported here to keep the event tools out of the writer start up time
+        from ..tools.tristan_tools.statistics import (
+            collect_event_statistics,
+            write_event_statistics,
+        )
+
+        metafile = super()._get_meta_file(image_filename=image_filename)
+        stats = collect_event_statistics(
+            metafile, rate_bin_width, max_workers, save_index=save_index
+        )
+        with self._get_handle("r+") as nxs:
+            write_event_statistics(nxs, stats)
+            nxdetector = nxs["/entry/instrument/detector"]
+            if "count_time" in nxdetector:
+                del nxdetector["count_time"]
+            nxdetector.create_dataset("count_time", data=stats.collection_time)
+            create_attributes(nxdetector["count_time"], ("units",), ("s",))
+        nxmx_logger.info(
+            f"Event statistics saved, collection time {stats.collection_time} s."
+        )
+        return stats
+
+
+class SWMRNXmxFileWriter(NXmxFileWriter):
+    """A class to generate NXmx format NeXus files for live collections, which can be \
+    followed by readers using HDF5 Single Writer Multiple Reader (SWMR) mode.
+
+    The master file is written at the start of the collection and kept open in SWMR mode \
+    until the collection is finished. As no new objects can be created once SWMR mode is on, \
+    all the fields updated during the collection are created beforehand: the end_time \
+    timestamp, a frame counter and any per-frame metadata field requested, which are saved in \
+    /entry/instrument/detector/frame_metadata. The VDS is defined at the start over the full \
+    expected size of the collection, so its content grows with the data files.
+
+    Readers should open the file with `h5py.File(filename, "r", swmr=True)` and call refresh() \
+    on the datasets they follow.
+
+    Requires a couple of additional arguments compared to a standard NXmxFileWriter:
+        per_frame_fields (dict[str, DTypeLike] | None, optional): Names and types of the \
+            per-frame metadata fields to be appended during the collection. Defaults to None.
+        flush_interval (float, optional): Minimum interval, in s, between two flushes of \
+            the appended data. Defaults to 1.0.
+    """
+
+    def __init__(
+        self,
+        filename: Path | str,
+        goniometer: Goniometer,
+        detector: Detector,
+        source: Source,
+        beam: Beam,
+        attenuator: Attenuator,
+        tot_num_imgs: int,
+        sample: Sample | None = None,
+        h5_profile: H5Profile | str | None = None,
+        per_frame_fields: dict[str, DTypeLike] | None = None,
+        flush_interval: float = 1.0,
+    ):
+        super().__init__(
+            filename,
+            goniometer,
+            detector,
+            source,
+            beam,
+            attenuator,
+            tot_num_imgs,
+            sample,
+            h5_profile,
+        )
+        self.per_frame_fields = per_frame_fields if per_frame_fields else {}
+        self.flush_interval = flush_interval
+        self._nxs: h5py.File | None = None
+        self._last_flush = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self.is_live:
+            self.finish()
+
+    @property
+    def is_live(self) -> bool:
+        """True if the collection has started and the file is open in SWMR mode."""
+        return self._nxs is not None
+
+    def _open_for_writing(self, write_mode: str, in_memory: bool = False, **kwargs):
+        # SWMR requires the latest file format
+        kwargs["libver"] = "latest"
+        return super()._open_for_writing(write_mode, in_memory, **kwargs)
+
+    def _check_not_live(self, action: str):
+        if self.is_live:
+            raise RuntimeError(
+                f"Unable to {action} while the file is open in SWMR mode, no new objects can be created."
+            )
+
+    @timed_method
+    def start(
+        self,
+        image_datafiles: list | None = None,
+        image_filename: str | None = None,
+        start_time: datetime | str | None = None,
+        est_end_time: datetime | str | None = None,
+        write_mode: str = "x",
+        add_non_standard: bool = True,
+        data_entry_key: str = "data",
+        write_vds: bool = True,
+        vds_dtype: DTypeLike = np.uint16,
+    ):
+        """Write the NXmx master file at the start of the collection, create the fields \
+        to be updated while it runs and switch to SWMR mode.
+
+        Args:
+            image_datafiles (list | None, optional): List of image data files. If not passed, \
+                the program will look for files with the stem_######.h5 in the target directory. \
+                Defaults to None.
+            image_filename (str | None, optional): Filename stem to use to look for image files. \
+                Needed in case it doesn't match the NeXus file name. Format: filename_runnumber. \
+                Defaults to None.
+            start_time (datetime | str, optional): Collection start time if available, in the \
+                format "%Y-%m-%dT%H:%M:%SZ". Defaults to None.
+            est_end_time (datetime | str, optional): Collection estimated end time if available, \
+                in the format "%Y-%m-%dT%H:%M:%SZ". Defaults to None.
+            write_mode (str, optional): String indicating writing mode for the output NeXus file. \
+                Accepts any valid h5py file opening mode. Defaults to "x".
+            add_non_standard (bool, optional): Flag if non-standard NXsample fields should be added \
+                for processing to work. Defaults to True.
+            data_entry_key (str, optional): Dataset entry key in datafiles. Defaults to data.
+            write_vds (bool, optional): Write the VDS for the full collection. Defaults to True.
+            vds_dtype (DTypeLike, optional): The type of the input data. Defaults to np.uint16.
+        """
+        self._check_not_live("start a new collection")
+        if self._session is not None:
+            raise RuntimeError("A SWMR collection can't be started inside a session.")
+        self.write(
+            image_datafiles,
+            image_filename,
+            start_time,
+            est_end_time,
+            write_mode,
+            add_non_standard,
+            data_entry_key,
+        )
+        if write_vds:
+            self.write_vds(vds_dtype=vds_dtype)
+
+        nxs = self._open_for_writing("r+")
+        try:
+            # Fixed length timestamp to be filled in at the end, as 'YYYY-MM-DDThh:mm:ssZ'
+            if "end_time" not in nxs["/entry"].keys():
+                nxs["/entry"].create_dataset("end_time", shape=(), dtype="S20")
+            grp = nxs.require_group(FRAME_METADATA_LOC)
+            create_attributes(grp, ("NX_class",), ("NXcollection",))
+            grp.create_dataset("nframes", data=0, dtype=np.int64)
+            chunk = min(self.tot_num_imgs, MAX_FRAMES_PER_DATASET)
+            for name, dtype in self.per_frame_fields.items():
+                grp.create_dataset(
+                    name,
+                    shape=(0,),
+                    maxshape=(None,),
+                    chunks=(max(chunk, 1),),
+                    dtype=dtype,
+                )
+            nxs.swmr_mode = True
+        except Exception:
+            nxs.close()
+            raise
+        self._nxs = nxs
+        self._last_flush = time.monotonic()
+        nxmx_logger.info(f"{self.filename} open in SWMR mode.")
+
+    def flush(self):
+        """Flush all the appended data to disk, making it visible to the readers."""
+        if self.is_live:
+            self._nxs.flush()
+            self._last_flush = time.monotonic()
+
+    @timed_method
+    def append_frames(self, num_frames: int, **metadata: ArrayLike):
+        """Record that new frames have been collected, along with their metadata.
+
+        The data is flushed to disk if the flush interval has passed since the last flush.
+
+        Args:
+            num_frames (int): Number of frames collected since the last call.
+
+        Keyword Args:
+            Per-frame metadata values, one for each of the new frames, for any of the \
+            fields defined in per_frame_fields.
+
+        Raises:
+            RuntimeError: If the collection hasn't started.
+            ValueError: If a metadata field is unknown or its length doesn't match the \
+                number of frames.
+        """
+        if not self.is_live:
+            raise RuntimeError("Collection not started, please call start() first.")
+        grp = self._nxs[FRAME_METADATA_LOC]
+        for name, values in metadata.items():
+            if name not in self.per_frame_fields.keys():
+                raise ValueError(
+                    f"Unknown per frame field {name}, please pass one of {list(self.per_frame_fields.keys())}."
+                )
+            values = np.atleast_1d(values)
+            if len(values) != num_frames:
+                raise ValueError(
+                    f"Got {len(values)} values of {name} for {num_frames} frames."
+                )
+            dset = grp[name]
+            start = dset.shape[0]
+            dset.resize((start + num_frames,))
+            dset[start:] = values
+        grp["nframes"][()] = grp["nframes"][()] + num_frames
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def update_timestamps(
+        self, timestamp: datetime | str, dset_name: TSdset = "end_time"
+    ):
+        """Save timestamps for start and/or end collection.
+
+        While the collection is running, only the timestamps already present in the file \
+        can be updated.
+
+        Args:
+            timestamp (datetime | str): Timestamp, as datetime or str.
+            dset_name (TSdset, optional): Name of dataset to write to nexus file.\
+                Allowed values: ["start_time", "end_time", "end_time_estimated". Defaults to "end_time".
+
+        Raises:
+            RuntimeError: If the file is in SWMR mode and the timestamp dataset doesn't exist.
+        """
+        if not self.is_live:
+            return super().update_timestamps(timestamp, dset_name)
+        if dset_name not in self._nxs["/entry"].keys():
+            self._check_not_live(f"write {dset_name}")
+        if type(timestamp) is datetime:
+            timestamp = timestamp.strftime("%Y-%m-%dT%H:%M:%S")
+        self._nxs["/entry"][dset_name][()] = np.bytes_(get_iso_timestamp(timestamp))
+        self.flush()
+        nxmx_logger.info(f"{dset_name} timestamp for collection updated.")
+
+    def add_NXnote(self, notes: dict, loc: str = "/entry/notes"):
+        """Save any additional information as NXnote at the end of the collection.
+
+        Args:
+            notes (dict): Dictionary of (key, value) pairs where key represents the \
+                dataset name and value its data.
+            loc (str, optional): Location in the NeXus file to save metadata. \
+                Defaults to "/entry/notes".
+
+        Raises:
+            RuntimeError: If the file is still open in SWMR mode.
+        """
+        self._check_not_live("add a NXnote")
+        super().add_NXnote(notes, loc)
+
+    def write_vds(self, *args, **kwargs):
+        """Write a Virtual Dataset. See NXmxFileWriter.write_vds.
+
+        Raises:
+            RuntimeError: If the file is already open in SWMR mode.
+        """
+        self._check_not_live("write a VDS")
+        super().write_vds(*args, **kwargs)
+
+    @timed_method
+    def finish(self, end_time: datetime | str | None = None):
+        """Write the end time if passed, flush and close the file at the end of the collection.
+
+        If no end time was written during the collection either, the empty end_time \
+        placeholder created by start is removed, as it isn't a valid timestamp.
+
+        Args:
+            end_time (datetime | str | None, optional): Collection end time. Defaults to None.
+        """
+        if not self.is_live:
+            nxmx_logger.warning("Collection not started, nothing to finish.")
+            return
+        if end_time:
+            self.update_timestamps(end_time, "end_time")
+        end_time_missing = self._nxs["/entry/end_time"][()] == b""
+        self._nxs.close()
+        self._nxs = None
+        if end_time_missing:
+            # Objects can't be deleted in SWMR mode, so reopen the file to do it
+            with self._open_for_writing("r+") as nxs:
+                del nxs["/entry/end_time"]
+            nxmx_logger.warning("No end_time written for the collection.")
+        nxmx_logger.info(f"Collection finished, {self.filename} closed.")
@@ -0,0 +1,185 @@
+"""
+Cache of the static parts of NXmx master files, to be stamped into each new file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from dataclasses import asdict
+from pathlib import Path
+
+import h5py
+
+from ..nxs_utils.detector import Detector
+from ..nxs_utils.source import Source
+from ..timings import timed
+from .nxclass_writers import (
+    write_NXdetector,
+    write_NXdetector_module,
+    write_NXinstrument,
+    write_NXsource,
+)
+from .write_utils import open_in_memory
+
+# Logger
+template_logger = logging.getLogger("nexgen.NXmxTemplateCache")
+template_logger.setLevel(logging.DEBUG)
+
+# Groups saved in the template, relative to /entry
+TEMPLATE_GROUPS = ["source", "instrument"]
+
+
+class NXmxTemplateCache:
+    """A cache of the NeXus groups which don't change between collections using the \
+    same beamline and detector configuration.
+
+    For each configuration, the static fields written by write_NXsource, write_NXinstrument, \
+    write_NXdetector and write_NXdetector_module are built once into a template file, \
+    identified by a hash of their content. Each new master file then gets a copy of the \
+    template groups, and only the fields depending on the collection need to be written.
+
+    Args:
+        cache_dir (Path | str | None, optional): Directory where to save the templates, so \
+            that they can be reused between processes. If not passed, the templates are kept \
+            in memory. Defaults to None.
+    """
+
+    def __init__(self, cache_dir: Path | str | None = None):
+        self.cache_dir = Path(cache_dir).expanduser().resolve() if cache_dir else None
+        self._templates: dict[str, h5py.File] = {}
+
+    @staticmethod
+    def get_key(
+        source: Source,
+        detector: Detector,
+        reset_instrument_name: bool = False,
+        compact: bool = False,
+    ) -> str:
+        """Calculate the hash identifying the template for a configuration.
+
+        Args:
+            source (Source): Source definition.
+            detector (Detector): Detector definition. Only the detector parameters and \
+                module definition are used.
+            reset_instrument_name (bool, optional): Instrument name setting, as passed to \
+                write_NXinstrument. Defaults to False.
+            compact (bool, optional): Whether small datasets are stored with compact layout. \
+                Defaults to False.
+
+        Returns:
+            str: Hex digest of the configuration content.
+        """
+        content = {
+            "source": asdict(source),
+            "detector_params": asdict(detector.detector_params),
+            "detector_constants": detector.detector_params.constants,
+            "module": asdict(detector.module),
+            "reset_instrument_name": reset_instrument_name,
+            "compact": compact,
+        }
+        encoded = json.dumps(content, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _build_template(
+        self,
+        nxsfile: h5py.File,
+        source: Source,
+        detector: Detector,
+        reset_instrument_name: bool = False,
+        compact: bool = False,
+    ):
+        """Write the static groups into the template file."""
+        write_NXsource(nxsfile, source, compact=compact)
+        write_NXinstrument(
+            nxsfile,
+            None,
+            None,
+            source,
+            reset_instrument_name,
+            compact=compact,
+            fields="static",
+        )
+        write_NXdetector(nxsfile, detector, compact=compact, fields="static")
+        write_NXdetector_module(
+            nxsfile,
+            detector.get_module_info(),
+            detector.detector_params.image_size,
+            detector.detector_params.pixel_size,
+            compact=compact,
+            fields="static",
+        )
+
+    def get_template(
+        self,
+        source: Source,
+        detector: Detector,
+        reset_instrument_name: bool = False,
+        compact: bool = False,
+    ) -> h5py.File:
+        """Get the template file for a configuration, building it if it doesn't exist yet.
+
+        Args:
+            source (Source): Source definition.
+            detector (Detector): Detector definition.
+            reset_instrument_name (bool, optional): Instrument name setting, as passed to \
+                write_NXinstrument. Defaults to False.
+            compact (bool, optional): Store small datasets with compact layout. Defaults to False.
+
+        Returns:
+            h5py.File: Handle to the template file.
+        """
+        key = self.get_key(source, detector, reset_instrument_name, compact)
+        if key in self._templates:
+            return self._templates[key]
+
+        if self.cache_dir is None:
+            template_logger.debug(f"Building template {key} in memory.")
+            template = h5py.File(f"{key}.h5", "w", driver="core", backing_store=False)
+            self._build_template(
+                template, source, detector, reset_instrument_name, compact
+            )
+        else:
+            template_file = self.cache_dir / f"nxmx_template_{key}.h5"
+            if not template_file.exists():
+                template_logger.debug(f"Building template {template_file}.")
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                with open_in_memory(template_file, "w") as fh:
+                    self._build_template(
+                        fh, source, detector, reset_instrument_name, compact
+                    )
+            template = h5py.File(template_file, "r")
+        self._templates[key] = template
+        return template
+
+    @timed(name="NXmxTemplateCache.stamp")
+    def stamp(
+        self,
+        nxsfile: h5py.File,
+        source: Source,
+        detector: Detector,
+        reset_instrument_name: bool = False,
+        compact: bool = False,
+    ):
+        """Copy the static groups for a configuration into a NeXus file.
+
+        Args:
+            nxsfile (h5py.File): NeXus file handle.
+            source (Source): Source definition.
+            detector (Detector): Detector definition.
+            reset_instrument_name (bool, optional): Instrument name setting, as passed to \
+                write_NXinstrument. Defaults to False.
+            compact (bool, optional): Store small datasets with compact layout. Defaults to False.
+        """
+        template = self.get_template(source, detector, reset_instrument_name, compact)
+        nxentry = nxsfile.require_group("/entry")
+        for grp in TEMPLATE_GROUPS:
+            template.copy(template[f"/entry/{grp}"], nxentry, grp)
+        template_logger.debug("Static groups copied from template.")
+
+    def clear(self):
+        """Close all the open templates and empty the cache. Templates saved to disk are kept."""
+        for template in self._templates.values():
+            template.close()
+        self._templates = {}
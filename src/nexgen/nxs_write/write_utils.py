@@ -6,14 +6,18 @@ from __future__ import annotations
 
 import logging
 import math
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Literal
+from typing import Any, Literal
+from uuid import uuid4
 
 import h5py  # isort: skip
 import numpy as np
 from hdf5plugin import Bitshuffle, Blosc
-from numpy.typing import ArrayLike
+from numpy.typing import ArrayLike, DTypeLike
 
 from ..nxs_utils import Axis
 
@@ -24,6 +28,14 @@ NXclassUtils_logger.setLevel(logging.DEBUG)
 # Define Timestamp dataset names
 TSdset = Literal["start_time", "end_time", "end_time_estimated"]
 
+# Define which fields of a NXclass group to write: those which don't change between
+# collections with the same instrument configuration, those which do, or both
+NXfields = Literal["all", "static", "dynamic"]
+
+# Upper limit (in bytes) for a dataset to be stored with compact layout.
+# HDF5 keeps compact raw data inside the object header, which is capped at 64KiB.
+COMPACT_LAYOUT_MAX_SIZE = 16384
+
 
 def create_attributes(nxs_obj: h5py.Group | h5py.Dataset, names: tuple, values: tuple):
     """
@@ -45,6 +57,57 @@ def create_attributes(nxs_obj: h5py.Group | h5py.Dataset, names: tuple, values:
         h5py.AttributeManager.create(nxs_obj, name=n, data=v)
 
 
+def write_small_dataset(
+    nxgroup: h5py.Group,
+    dset_name: str,
+    data: Any,
+    dtype: DTypeLike | None = None,
+    compact: bool = False,
+) -> h5py.Dataset:
+    """
+    Write a small (scalar, string or short vector) dataset in the requested group.
+
+    When compact is True and the data fits within COMPACT_LAYOUT_MAX_SIZE, the \
+    dataset is created with HDF5 compact layout, so that the values are stored \
+    directly in the object header instead of a separate data block. This saves \
+    one extra read per dataset for consumers walking the whole metadata tree. \
+    Otherwise, the default contiguous layout is used.
+
+    Args:
+        nxgroup (h5py.Group): Handle to HDF5 group.
+        dset_name (str): Name of the new dataset to be written.
+        data (Any): Data to be written to the dataset.
+        dtype (DTypeLike | None, optional): Data type of the new dataset. If not \
+            passed, it will be inferred from the data. Defaults to None.
+        compact (bool, optional): Use compact layout for the dataset. Defaults to False.
+
+    Returns:
+        h5py.Dataset: The new dataset.
+    """
+    if not compact or data is None:
+        return nxgroup.create_dataset(dset_name, data=data, dtype=dtype)
+
+    arr = np.asarray(data, dtype=dtype)
+    if arr.dtype.kind == "O" or arr.nbytes > COMPACT_LAYOUT_MAX_SIZE:
+        NXclassUtils_logger.debug(
+            f"{dset_name} can't be stored with compact layout, using contiguous layout."
+        )
+        return nxgroup.create_dataset(dset_name, data=data, dtype=dtype)
+
+    space = (
+        h5py.h5s.create(h5py.h5s.SCALAR)
+        if arr.shape == ()
+        else h5py.h5s.create_simple(arr.shape)
+    )
+    tid = h5py.h5t.py_create(arr.dtype, logical=True)
+    dcpl = h5py.h5p.create(h5py.h5p.DATASET_CREATE)
+    dcpl.set_layout(h5py.h5d.COMPACT)
+    dcpl.set_obj_track_times(False)
+    dsid = h5py.h5d.create(nxgroup.id, dset_name.encode(), tid, space, dcpl=dcpl)
+    dsid.write(h5py.h5s.ALL, h5py.h5s.ALL, arr)
+    return h5py.Dataset(dsid)
+
+
 def set_dependency(dep_info: str, path: str = None) -> np.bytes_:
     """
     Define value for "depends_on" attribute.
@@ -347,3 +410,76 @@ def add_sample_axis_groups(nxsample: h5py.Group, axis_list: list[Axis]):
             nx_ax[f"{ax.name}_end"] = nxtransf[f"{ax.name}_end"]
         if f"{ax.name}_increment_set" in nxtransf.keys():
             nx_ax[f"{ax.name}_increment_set"] = nxtransf[f"{ax.name}_increment_set"]
+
+
+@contextmanager
+def open_in_memory(
+    filename: Path | str,
+    write_mode: str = "x",
+    **kwargs,
+) -> Iterator[h5py.File]:
+    """
+    Build a new HDF5 file entirely in memory using the core driver and flush it to \
+    disk in a single sequential write once the context exits without errors.
+
+    The image is first written to a hidden temporary file in the target directory and \
+    then atomically renamed onto the final filename, so readers never see a partially \
+    written file. For the "w-" and "x" modes the temporary file is hard linked to the \
+    final filename instead, which fails if a file was created there in the meantime. \
+    If an exception is raised inside the context, nothing is written.
+
+    Args:
+        filename (Path | str): Target filename. Also used by the in-memory file to \
+            work out relative external links.
+        write_mode (str, optional): Writing mode for the target file. Only modes that \
+            create a new file are accepted: "w", "w-" or "x". Defaults to "x".
+
+    Keyword Args:
+        Any additional keyword argument accepted by h5py.File, eg. libver.
+
+    Raises:
+        ValueError: If the write mode would require reading an existing file.
+        FileExistsError: If the write mode is "w-" or "x" and the target file already exists.
+
+    Yields:
+        Iterator[h5py.File]: Handle to the in-memory HDF5 file.
+    """
+    filename = Path(filename)
+    if write_mode not in ["w", "w-", "x"]:
+        raise ValueError(
+            f"Write mode {write_mode} not supported for in-memory files. Please use one of w, w-, x."
+        )
+    if write_mode != "w" and filename.exists():
+        raise FileExistsError(f"Unable to create {filename}, file already exists.")
+
+    nxs = h5py.File(filename, "w", driver="core", backing_store=False, **kwargs)
+    try:
+        yield nxs
+        # The file image is only complete after a flush
+        nxs.flush()
+        image = nxs.id.get_file_image()
+    finally:
+        nxs.close()
+
+    tmp_file = filename.parent / f".{filename.name}.{uuid4().hex}.tmp"
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(image)
+            fh.flush()
+            os.fsync(fh.fileno())
+        if write_mode == "w":
+            os.replace(tmp_file, filename)
+        else:
+            # Unlike a rename, linking never replaces an existing file
+            os.link(tmp_file, filename)
+            tmp_file.unlink()
+    except FileExistsError:
+        tmp_file.unlink(missing_ok=True)
+        raise FileExistsError(f"Unable to create {filename}, file already exists.")
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+    NXclassUtils_logger.debug(
+        f"In-memory file image of {len(image)} bytes flushed to {filename}."
+    )
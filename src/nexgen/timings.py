@@ -0,0 +1,216 @@
+"""
+Timing instrumentation for the phases of NeXus file writing.
+
+Functions decorated with `timed`, or blocks run inside `phase`, emit a debug record on the \
+"nexgen.timings" logger with the phase name and duration, and add it to any collector \
+activated with `record_timings`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable
+
+__all__ = [
+    "PhaseTiming",
+    "Timings",
+    "phase",
+    "record_timings",
+    "timed",
+    "timed_method",
+]
+
+timings_logger = logging.getLogger("nexgen.timings")
+timings_logger.setLevel(logging.DEBUG)
+
+# Active collectors and name of the phase currently running, per thread/task
+_collectors: ContextVar[tuple[Timings, ...]] = ContextVar(
+    "nexgen_timings_collectors", default=()
+)
+_current_phase: ContextVar[str | None] = ContextVar(
+    "nexgen_timings_phase", default=None
+)
+
+
+@dataclass
+class PhaseTiming:
+    """Timing of a single run of a phase.
+
+    Args:
+        phase (str): Phase name.
+        start (float): Start time, in s since the epoch.
+        duration_s (float): Duration, in s.
+        parent (str | None, optional): Name of the phase this one ran inside of. Defaults to None.
+    """
+
+    phase: str
+    start: float
+    duration_s: float
+    parent: str | None = None
+
+
+class Timings:
+    """Collector of phase timings.
+
+    The records are aggregated by phase as they are added, and only the most recent \
+    ones are kept, so that long running writers, eg. appending frames to a live \
+    collection, don't grow the collector without limit.
+
+    Args:
+        max_records (int, optional): Number of individual records kept. Defaults to 1000.
+    """
+
+    def __init__(self, max_records: int = 1000):
+        self.records: deque[PhaseTiming] = deque(maxlen=max_records)
+        self._summary: dict[str, dict[str, float]] = {}
+        self._total_s = 0.0
+
+    def add(self, record: PhaseTiming):
+        self.records.append(record)
+        s = self._summary.setdefault(
+            record.phase, {"count": 0, "total_s": 0.0, "max_s": 0.0}
+        )
+        s["count"] += 1
+        s["total_s"] += record.duration_s
+        s["max_s"] = max(s["max_s"], record.duration_s)
+        if record.parent is None:
+            self._total_s += record.duration_s
+
+    def clear(self):
+        self.records.clear()
+        self._summary = {}
+        self._total_s = 0.0
+
+    @property
+    def total_s(self) -> float:
+        """Total time spent in the outermost phases."""
+        return self._total_s
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Aggregate the records by phase.
+
+        Returns:
+            dict[str, dict[str, float]]: Number of runs, total and maximum duration of each phase.
+        """
+        return {k: dict(v) for k, v in self._summary.items()}
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "total_s": self.total_s,
+            "phases": self.summary(),
+            "records": [asdict(r) for r in self.records],
+        }
+
+    def save(self, filename: Path | str, **extra: Any) -> Path:
+        """Write the timings to a JSON file.
+
+        Args:
+            filename (Path | str): Output file.
+
+        Other keyword arguments are added to the top level of the JSON document.
+
+        Returns:
+            Path: The output file.
+        """
+        filename = Path(filename).expanduser().resolve()
+        with open(filename, "w") as fh:
+            json.dump({**extra, **self.to_dict()}, fh, indent=2, default=str)
+        timings_logger.debug(f"Timings saved to {filename}.")
+        return filename
+
+
+@contextmanager
+def record_timings(timings: Timings | None = None) -> Iterator[Timings]:
+    """Collect the timings of all the phases run inside the context.
+
+    Collectors can be nested, each one receives all the records produced while it's active. \
+    Activating a collector that is already active has no effect, so that its records \
+    aren't added more than once.
+
+    Args:
+        timings (Timings | None, optional): Collector to add the records to. If not passed, \
+            a new one is created. Defaults to None.
+
+    Yields:
+        Timings: The collector.
+    """
+    timings = timings if timings is not None else Timings()
+    active = _collectors.get()
+    if any(c is timings for c in active):
+        yield timings
+        return
+    token = _collectors.set(active + (timings,))
+    try:
+        yield timings
+    finally:
+        _collectors.reset(token)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a block of code as a named phase.
+
+    Args:
+        name (str): Phase name.
+    """
+    parent = _current_phase.get()
+    token = _current_phase.set(name)
+    start = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - t0
+        _current_phase.reset(token)
+        timings_logger.debug(
+            f"{name} took {duration * 1e3:.3f} ms.",
+            extra={"phase": name, "duration_s": duration, "parent": parent},
+        )
+        collectors = _collectors.get()
+        if collectors:
+            record = PhaseTiming(name, start, duration, parent)
+            for c in collectors:
+                c.add(record)
+
+
+def timed(fn: Callable | None = None, *, name: str | None = None) -> Callable:
+    """Decorator timing each call of a function as a phase.
+
+    Can be used bare, `@timed`, or with a phase name, `@timed(name="vds")`. By default the \
+    phase is named after the function.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        phase_name = name if name else func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(phase_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator(fn) if fn is not None else decorator
+
+
+def timed_method(method: Callable) -> Callable:
+    """Decorator for the methods of the NeXus writers, timing each call as a phase named \
+    after the class and method, and collecting it, together with all the phases it runs, \
+    into the `timings` attribute of the instance."""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with record_timings(self.timings):
+            with phase(f"{type(self).__name__}.{method.__name__}"):
+                return method(self, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,217 @@
+"""
+Find the beam centre position from the images of a collection.
+
+A strided subset of the frames is read around the expected beam position with a single \
+hyperslab selection, which also works on a virtual dataset, and the direct beam position is \
+worked out on all the frames at once. Frames that disagree with the others, eg. blank \
+images, are discarded before averaging.
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+import h5py
+import hdf5plugin  # noqa: F401
+import numpy as np
+from numpy.typing import ArrayLike
+
+logger = logging.getLogger("nexgen.tools.BeamCentre")
+logger.setLevel(logging.DEBUG)
+
+__all__ = [
+    "centroid_max_frames",
+    "centroid_weighted_frames",
+    "read_frame_subset",
+    "find_beam_centre_from_frames",
+]
+
+PIXEL_MASK_LOCATIONS = (
+    "/entry/instrument/detector/pixel_mask",
+    "/entry/instrument/detector/detectorSpecific/pixel_mask",
+)
+
+
+def _pixel_coordinates(shape: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+    return np.arange(shape[1], dtype=np.float64), np.arange(shape[0], dtype=np.float64)
+
+
+def centroid_max_frames(images: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+    """Find the centre of gravity of the maximum pixels of each frame.
+
+    Args:
+        images (ArrayLike): Stack of images, of shape (num_frames, slow, fast).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Centroid x (fast) and y (slow) positions of each \
+            frame, in pixels.
+    """
+    images = np.asarray(images)
+    n = images.shape[0]
+    is_max = images == images.reshape(n, -1).max(axis=1)[:, None, None]
+    count = is_max.sum(axis=(1, 2))
+    xs, ys = _pixel_coordinates(images.shape[1:])
+    x = is_max.sum(axis=1) @ xs / count
+    y = is_max.sum(axis=2) @ ys / count
+    return x, y
+
+
+def centroid_weighted_frames(
+    images: ArrayLike, threshold: float = 0.5
+) -> tuple[np.ndarray, np.ndarray]:
+    """Find the sub-pixel centroid of the beam in each frame, weighting the pixels above \
+    threshold times the maximum of the frame by how much they exceed it.
+
+    Args:
+        images (ArrayLike): Stack of images, of shape (num_frames, slow, fast).
+        threshold (float, optional): Fraction of the maximum below which pixels are \
+            ignored. Defaults to 0.5.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Centroid x (fast) and y (slow) positions of each \
+            frame, in pixels. NaN for blank frames.
+    """
+    images = np.asarray(images, dtype=np.float64)
+    n = images.shape[0]
+    level = threshold * images.reshape(n, -1).max(axis=1)
+    weights = np.clip(images - level[:, None, None], 0, None)
+    total = weights.sum(axis=(1, 2))
+    xs, ys = _pixel_coordinates(images.shape[1:])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x = weights.sum(axis=1) @ xs / total
+        y = weights.sum(axis=2) @ ys / total
+    return x, y
+
+
+def read_frame_subset(
+    dset: h5py.Dataset,
+    num_frames: int = 10,
+    roi: tuple[slice, slice] = (slice(None), slice(None)),
+) -> np.ndarray:
+    """Read num_frames frames evenly spread through the dataset, with a single strided \
+    selection.
+
+    Args:
+        dset (h5py.Dataset): Image dataset, or virtual dataset, of shape \
+            (num_images, slow, fast).
+        num_frames (int, optional): Maximum number of frames to read. Defaults to 10.
+        roi (tuple[slice, slice], optional): Region of interest, as (slow, fast) slices. \
+            Defaults to the whole image.
+
+    Returns:
+        np.ndarray: The frames read.
+    """
+    num_images = dset.shape[0]
+    num_frames = max(min(num_frames, num_images), 1)
+    stride = max(num_images // num_frames, 1)
+    return dset[0 : stride * num_frames : stride, roi[0], roi[1]]
+
+
+def _robust_mean(
+    x: np.ndarray, y: np.ndarray, max_deviation: float
+) -> tuple[float, float] | None:
+    """Average the positions within max_deviation pixels of the median."""
+    ok = np.isfinite(x) & np.isfinite(y)
+    if not ok.any():
+        return None
+    med_x, med_y = np.median(x[ok]), np.median(y[ok])
+    with np.errstate(invalid="ignore"):
+        ok &= (np.abs(x - med_x) < max_deviation) & (np.abs(y - med_y) < max_deviation)
+    return float(np.mean(x[ok])), float(np.mean(y[ok]))
+
+
+def _find_image_dataset(fh: h5py.File, data_key: str) -> h5py.Dataset:
+    if data_key in fh:
+        return fh[data_key]
+    # NXmx files linking to the data files without a VDS: use the first one
+    nxdata = fh[data_key.rsplit("/", 1)[0]]
+    keys = sorted(k for k in nxdata.keys() if k.startswith("data_"))
+    if not keys:
+        raise KeyError(f"No image data found in {fh.filename} at {data_key}.")
+    return nxdata[keys[0]]
+
+
+def _find_pixel_mask(fh: h5py.File, roi: tuple[slice, slice]) -> np.ndarray | None:
+    """Read the region of interest of the pixel mask, if there is one in the file."""
+    for loc in PIXEL_MASK_LOCATIONS:
+        if loc in fh:
+            return fh[loc][roi]
+    return None
+
+
+def find_beam_centre_from_frames(
+    filename: Path | str,
+    data_key: str = "/entry/data/data",
+    mask: ArrayLike | None = None,
+    roi_half_size: int | None = 100,
+    roi_centre: tuple[int, int] | None = None,
+    num_frames: int = 10,
+    subpixel: bool = False,
+    max_deviation: float = 5.0,
+    skip_blank: bool = True,
+) -> tuple[float, float] | None:
+    """Calculate the beam centre from a subset of the images of a collection.
+
+    Works on a data file or on a NXmx file, for any detector, reading the images from \
+    data_key, which can be a virtual dataset. For NXmx files without a VDS, the first \
+    data_###### link of the NXdata group is used instead.
+
+    Args:
+        filename (Path | str): Data or NeXus file.
+        data_key (str, optional): Location of the images. Defaults to "/entry/data/data".
+        mask (ArrayLike | None, optional): Pixel mask, non-zero pixels are ignored. \
+            Defaults to None, to look for a pixel_mask in the file.
+        roi_half_size (int | None, optional): Half size of the region of interest, in \
+            pixels. Defaults to 100. If None, use the whole image.
+        roi_centre (tuple[int, int] | None, optional): Centre of the region of interest, \
+            as (fast, slow) pixels. Defaults to None, for the centre of the image.
+        num_frames (int, optional): Number of frames used. Defaults to 10.
+        subpixel (bool, optional): Use an intensity weighted centroid of the beam instead \
+            of the centre of the maximum pixels. Defaults to False.
+        max_deviation (float, optional): Frames whose beam position is further than this \
+            from the median, in pixels, are ignored. Defaults to 5.0.
+        skip_blank (bool, optional): Ignore the frames with a flat intensity, which \
+            otherwise give the centre of the region of interest. Defaults to True.
+
+    Returns:
+        tuple[float, float] | None: Beam centre position (fast, slow) on the detector, in \
+            pixels. None if it couldn't be found in any frame.
+    """
+    with h5py.File(filename, "r") as fh:
+        dset = _find_image_dataset(fh, data_key)
+        slow, fast = dset.shape[-2:]
+        xc, yc = roi_centre if roi_centre else (fast // 2, slow // 2)
+        if roi_half_size is None:
+            x0, x1, y0, y1 = 0, fast, 0, slow
+        else:
+            x0, x1 = max(xc - roi_half_size, 0), min(xc + roi_half_size, fast)
+            y0, y1 = max(yc - roi_half_size, 0), min(yc + roi_half_size, slow)
+        roi = (slice(y0, y1), slice(x0, x1))
+        if mask is None:
+            roi_mask = _find_pixel_mask(fh, roi)
+        else:
+            roi_mask = np.asarray(mask)[roi]
+        frames = read_frame_subset(dset, num_frames, roi)
+
+    if roi_mask is not None:
+        frames[:, roi_mask != 0] = 0
+
+    if subpixel:
+        x, y = centroid_weighted_frames(frames)
+    else:
+        x, y = centroid_max_frames(frames)
+    if skip_blank:
+        flat = np.ptp(frames.reshape(len(frames), -1), axis=1) == 0
+        x[flat], y[flat] = np.nan, np.nan
+    centre = _robust_mean(x, y, max_deviation)
+    if centre is None:
+        logger.warning(f"Unable to find the beam centre in {filename}.")
+        return None
+
+    # Correct for offset of the ROI and shift to centre pixel
+    fast_pos, slow_pos = x0 + centre[0] + 0.5, y0 + centre[1] + 0.5
+    logger.debug(
+        f"Beam centre found at ({fast_pos}, {slow_pos}) from {len(frames)} frames."
+    )
+    return fast_pos, slow_pos
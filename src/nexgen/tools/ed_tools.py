@@ -15,6 +15,9 @@ import hdf5plugin  # noqa: F401
 import numpy as np
 from numpy.typing import ArrayLike
 
+from .beam_centre import centroid_max_frames, find_beam_centre_from_frames
+from .metafile import PathIndex
+
 logger = logging.getLogger("nexgen.EDtools.Singla")
 logger.setLevel(logging.DEBUG)
 
@@ -45,19 +48,21 @@ class SinglaMaster:
         return self._handle[key]
 
     @cached_property
+    def index(self) -> PathIndex:
+        return PathIndex(self._handle)
+
+    @property
     def walk(self) -> list[str]:
-        obj_list = []
-        self._handle.visit(obj_list.append)
-        return obj_list
+        return self.index.paths
 
     def get_number_of_images(self) -> int:
-        _loc = [obj for obj in self.walk if "nimages" in obj]
+        _loc = self.index.find("nimages")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[()]
 
     def get_number_of_triggers(self) -> int:
-        _loc = [obj for obj in self.walk if "ntriggers" in obj]
+        _loc = self.index.find("ntriggers")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[()]
@@ -66,13 +71,13 @@ class SinglaMaster:
         return self.get_number_of_images() * self.get_number_of_triggers()
 
     def get_trigger_mode(self) -> str:
-        _loc = [obj for obj in self.walk if "trigger_mode" in obj]
+        _loc = self.index.find("trigger_mode")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[()]
 
     def get_mask(self) -> tuple[bool, ArrayLike]:
-        M = [obj for obj in self.walk if "pixel_mask" in obj]
+        M = self.index.find("pixel_mask")
         if len(M) > 0:
             mask_path = [_loc for _loc in M if _loc.split("/")[-1] == "pixel_mask"]
             mask_applied_path = [_loc for _loc in M if "applied" in _loc]
@@ -86,7 +91,7 @@ class SinglaMaster:
         return (False, None)
 
     def get_flatfield(self) -> tuple[bool, ArrayLike]:
-        F = [obj for obj in self.walk if "flatfield" in obj]
+        F = self.index.find("flatfield")
         if len(F) > 0:
             flatfield_path = [_loc for _loc in F if _loc.split("/")[-1] == "flatfield"]
             flatfield_applied_path = [_loc for _loc in F if "applied" in _loc]
@@ -104,55 +109,55 @@ class SinglaMaster:
         return (False, None)
 
     def get_bit_bepth_readout(self) -> int:
-        _loc = [obj for obj in self.walk if "bit_depth_readout" in obj]
+        _loc = self.index.find("bit_depth_readout")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[()]  # type SCALAR
 
     def get_bit_bepth_image(self) -> int:
-        _loc = [obj for obj in self.walk if "bit_depth_image" in obj]
+        _loc = self.index.find("bit_depth_image")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[()]
 
     def get_detector_number(self) -> str:
-        _loc = [obj for obj in self.walk if "detector_number" in obj]
+        _loc = self.index.find("detector_number")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[()]
 
     def get_detector_readout_time(self) -> float:
-        _loc = [obj for obj in self.walk if "detector_readout_time" in obj]
+        _loc = self.index.find("detector_readout_time")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[()]
 
     def get_exposure_time(self) -> float:
-        _loc = [obj for obj in self.walk if "count_time" in obj]
+        _loc = self.index.find("count_time")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[()]
 
     def get_photon_energy(self) -> float:
-        _loc = [obj for obj in self.walk if "photon_energy" in obj]
+        _loc = self.index.find("photon_energy")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[()]
 
     def get_countrate_correction(self) -> int:
-        _loc = [obj for obj in self.walk if "countrate_correction_applied" in obj]
+        _loc = self.index.find("countrate_correction_applied")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[()]
 
     def get_software_version(self) -> bytes:
-        _loc = [obj for obj in self.walk if "software_version" in obj]
+        _loc = self.index.find("software_version")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[()]
 
     def get_data_collection_date(self) -> str:
-        _loc = [obj for obj in self.walk if "data_collection_date" in obj]
+        _loc = self.index.find("data_collection_date")
         if len(_loc) == 0:
             return None
         else:
@@ -258,12 +263,16 @@ def centroid_max(image: ArrayLike) -> tuple[float, float]:
         tuple[float, float]: Centroid (x,y) position.
     """
 
-    y, x = np.where(image == np.amax(image))
-    return np.mean(x), np.mean(y)
+    x, y = centroid_max_frames(np.asarray(image)[None])
+    return x[0], y[0]
 
 
 def find_beam_centre(
-    master: Path | str, data: Path | str, data_entry_key: str = "/entry/data/data"
+    master: Path | str,
+    data: Path | str,
+    data_entry_key: str = "/entry/data/data",
+    num_frames: int = 10,
+    subpixel: bool = False,
 ) -> tuple[float, float]:
     """
     Calculate the beam center position for Electron Diffraction data collected on Singla detector.
@@ -272,6 +281,8 @@ def find_beam_centre(
         master (Path | str): Path to Singla master file.
         data (Path | str): Path to data file.
         data_entry_key (str, optional): Key for the location of the images inside the Singla data file. Defaults to "/entry/data/data".
+        num_frames (int, optional): Number of frames used. Defaults to 10.
+        subpixel (bool, optional): Use an intensity weighted centroid of the beam. Defaults to False.
 
     Returns:
         fast, slow (tuple[float, float]): Beam center position (fast, slow) on the detector. \
@@ -286,37 +297,13 @@ def find_beam_centre(
     if pixel_mask is None:
         return None
 
-    # Set the ROI to be +/- 100 pixels around the image centre
-    yc, xc = (e // 2 for e in pixel_mask.shape)
-    x0 = xc - 100
-    x1 = xc + 100
-    y0 = yc - 100
-    y1 = yc + 100
-
-    # Bool selection for masked pixels in the ROI
-    pixel_mask = pixel_mask[y0:y1, x0:x1] == 1
-
-    images = []
-    with h5py.File(data, "r") as fh:
-        data = fh[data_entry_key]
-        num_images = data.shape[0]
-        for i in range(0, num_images, num_images // min(num_images, 10)):
-            image = data[i, y0:y1, x0:x1]
-            image[pixel_mask] = 0
-            images.append(image)
-
-    beam_centres = [centroid_max(im) for im in images]
-    x, y = zip(*beam_centres)
-
-    # For robustness against blank images, remove any value more than 5 px
-    # from the median
-    med_x = np.median(x)
-    med_y = np.median(y)
-    x = [e for e in x if abs(e - med_x) < 5]
-    y = [e for e in y if abs(e - med_y) < 5]
-
-    # Correct for offset of the ROI and shift to centre pixel
-    fast = xc - 100 + np.mean(x) + 0.5
-    slow = yc - 100 + np.mean(y) + 0.5
-
-    return fast, slow
+    # Use a ROI of +/- 100 pixels around the image centre
+    return find_beam_centre_from_frames(
+        data,
+        data_entry_key,
+        mask=pixel_mask,
+        roi_half_size=100,
+        num_frames=num_frames,
+        subpixel=subpixel,
+        skip_blank=False,
+    )
@@ -10,6 +10,7 @@ import numpy as np
 from numpy.typing import DTypeLike
 
 from ..nxs_utils import Axis
+from ..timings import timed
 from ..utils import units_of_length
 from .metafile import DectrisMetafile
 
@@ -18,6 +19,7 @@ overwrite_logger = logging.getLogger("nexgen.MetaReader")
 overwrite_logger.setLevel(logging.DEBUG)
 
 
+@timed
 def define_vds_data_type(meta_file: DectrisMetafile) -> DTypeLike:
     """Define the data type for the VDS from the bit_depth defined in the meta file.
 
@@ -40,6 +42,7 @@ def define_vds_data_type(meta_file: DectrisMetafile) -> DTypeLike:
         return np.uint16
 
 
+@timed
 def update_axes_from_meta(
     meta_file: DectrisMetafile,
     axes_list: list[Axis],
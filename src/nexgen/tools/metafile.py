@@ -4,15 +4,133 @@ Define a Metafile object to describe the _meta.h5 file and get the necessary inf
 
 from __future__ import annotations
 
+import ast
+import json
 import re
 from functools import cached_property
+from typing import Any
 
 import h5py
+import numpy as np
 
-__all__ = ["Metafile", "DectrisMetafile", "TristanMetafile"]
+from ..timings import timed
+
+__all__ = [
+    "parse_config_string",
+    "PathIndex",
+    "Metafile",
+    "DectrisMetafile",
+    "DectrisStream2Metafile",
+    "TristanMetafile",
+]
 
 tristan_pattern = re.compile(r"ts_qty_module\d{2}")
 
+# Largest _dectris dataset read along with the detector configuration, bigger ones are
+# only read on demand
+MAX_CONFIG_VALUE_SIZE = 1024
+
+
+def parse_config_string(config: str | bytes) -> dict:
+    """Parse the string saved in the config dataset of a Dectris meta file.
+
+    The string is read as a Python literal, or as JSON if that fails, so that nothing in \
+    the file is ever executed.
+
+    Args:
+        config (str | bytes): Config string.
+
+    Raises:
+        ValueError: If the string can't be parsed as a dictionary.
+
+    Returns:
+        dict: The config values.
+    """
+    if isinstance(config, bytes):
+        config = config.decode()
+    try:
+        parsed = ast.literal_eval(config)
+    except (ValueError, SyntaxError):
+        try:
+            parsed = json.loads(config)
+        except json.JSONDecodeError:
+            raise ValueError("Unable to parse the config dataset in the meta file.")
+    if not isinstance(parsed, dict):
+        raise ValueError("The config dataset in the meta file is not a dictionary.")
+    return parsed
+
+
+class PathIndex:
+    """Index of all the object paths in a HDF5 file, built with a single visit.
+
+    Paths can be looked up by exact name, case-insensitively, or by substring, the \
+    latter returning the same as the `[obj for obj in paths if key in obj]` search the \
+    readers used to do. Substring searches run over all the paths joined in a single \
+    string, and their results are cached.
+
+    Args:
+        handle (h5py.File | h5py.Group): File or group to index.
+    """
+
+    def __init__(self, handle: h5py.File | h5py.Group):
+        self.paths: list[str] = []
+        handle.visit(self.paths.append)
+        self._found: dict[str, list[str]] = {}
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._path_set
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @cached_property
+    def _path_set(self) -> set[str]:
+        return set(self.paths)
+
+    @cached_property
+    def _text(self) -> str:
+        # All the paths, one per line
+        return "\n" + "\n".join(self.paths) + "\n"
+
+    @cached_property
+    def _by_name(self) -> dict[str, list[str]]:
+        by_name: dict[str, list[str]] = {}
+        for p in self.paths:
+            by_name.setdefault(p.rsplit("/", 1)[-1], []).append(p)
+        return by_name
+
+    @cached_property
+    def _lower(self) -> dict[str, list[str]]:
+        lower: dict[str, list[str]] = {}
+        for p in self.paths:
+            lower.setdefault(p.lower(), []).append(p)
+        return lower
+
+    def find(self, key: str) -> list[str]:
+        """All the paths containing key, in visit order."""
+        if key in self._found:
+            return list(self._found[key])
+        if "\n" in key or not key:
+            found = [p for p in self.paths if key in p]
+        else:
+            text = self._text
+            found = []
+            i = text.find(key)
+            while i >= 0:
+                end = text.find("\n", i + len(key))
+                found.append(text[text.rfind("\n", 0, i) + 1 : end])
+                i = text.find(key, end)
+        self._found[key] = found
+        return list(found)
+
+    def find_name(self, name: str) -> list[str]:
+        """All the paths to objects called name."""
+        return list(self._by_name.get(name, []))
+
+    def find_path_ci(self, path: str) -> list[str]:
+        """All the paths matching path, ignoring case."""
+        return list(self._lower.get(path.lower(), []))
+
 
 class Metafile:
     def __init__(self, handle: h5py.File):
@@ -28,23 +146,53 @@ class Metafile:
         return f"File {self._handle.filename} opened in '{self._handle.mode}' mode."
 
     @cached_property
+    @timed(name="Metafile.index")
+    def index(self) -> PathIndex:
+        return PathIndex(self._handle)
+
+    @property
     def walk(self) -> list[str]:
-        obj_list = []
-        self._handle.visit(obj_list.append)
-        return obj_list
+        return list(self.index.paths)
 
     @cached_property
     def hasMask(self):
-        if "mask" in self.walk:
+        if "mask" in self._handle:
             return True
         return False
 
     @cached_property
     def hasFlatfield(self):
-        if "flatfield" in self.walk:
+        if "flatfield" in self._handle:
             return True
         return False
 
+    def _find(self, key: str) -> list[str]:
+        """Paths containing key, looking at the top level of the file first and only \
+        visiting the whole file if nothing is found there."""
+        found = [k for k in self._handle.keys() if key in k]
+        return found if found else self.index.find(key)
+
+    def _find_top_level_ci(self, name: str) -> list[str]:
+        return [k for k in self._handle.keys() if k.lower() == name]
+
+    def _read_into(self, path: str, out: np.ndarray | None = None) -> np.ndarray:
+        """Read a dataset into a preallocated buffer, one chunk at a time if it's chunked."""
+        dset = self._handle[path]
+        if out is None:
+            out = np.empty(dset.shape, dtype=dset.dtype)
+        elif out.shape != dset.shape:
+            raise ValueError(
+                f"Buffer of shape {out.shape} can't hold {path} of shape {dset.shape}."
+            )
+        if dset.size == 0:
+            return out
+        if dset.chunks and out.dtype == dset.dtype:
+            for sel in dset.iter_chunks():
+                dset.read_direct(out, sel, sel)
+        else:
+            dset.read_direct(out)
+        return out
+
 
 class DectrisMetafile(Metafile):
     """
@@ -68,9 +216,13 @@ class DectrisMetafile(Metafile):
             return True
         return False
 
-    def read_dectris_config(self) -> dict:
+    @cached_property
+    @timed(name="DectrisMetafile.read_dectris_config")
+    def _dectris_config(self) -> dict:
         config = {}
         for k, v in self._handle["_dectris"].items():
+            if not isinstance(v, h5py.Dataset) or v.size > MAX_CONFIG_VALUE_SIZE:
+                continue
             v = v[()]
             if len(v) == 1:
                 v = v[0]
@@ -79,16 +231,51 @@ class DectrisMetafile(Metafile):
             config[k] = v
         return config
 
+    @cached_property
+    @timed(name="DectrisMetafile.read_config_dset")
+    def _config_dset(self) -> dict:
+        return parse_config_string(self._handle["config"][()])
+
+    @cached_property
+    def _dectris_large_datasets(self) -> list[str]:
+        """Names of the datasets in the _dectris group left out of the configuration."""
+        names = []
+
+        def _check(name: str, obj: h5py.Group | h5py.Dataset):
+            if isinstance(obj, h5py.Dataset) and obj.size > MAX_CONFIG_VALUE_SIZE:
+                names.append(name)
+
+        self._handle["_dectris"].visititems(_check)
+        return names
+
+    def read_dectris_config(self) -> dict:
+        """Values in the _dectris group, read from the file on the first call only.
+
+        Datasets with more than MAX_CONFIG_VALUE_SIZE values, eg. a copy of the pixel mask, \
+        are left out: use read_mask and read_flatfield to read those.
+        """
+        return dict(self._dectris_config)
+
     def read_config_dset(self) -> dict:
-        config = eval(self._handle["config"][()])
-        return config
+        """Values in the config dataset, parsed on the first call only."""
+        return dict(self._config_dset)
+
+    def _find(self, key: str) -> list[str]:
+        """Paths containing key. If the _dectris group is there, only that and the top \
+        level of the file are searched, without visiting the whole file."""
+        if not self.hasDectrisGroup:
+            return super()._find(key)
+        names = [*self._dectris_config.keys(), *self._dectris_large_datasets]
+        found = [f"_dectris/{k}" for k in names if key in k]
+        found += [k for k in self._handle.keys() if key in k and k != "_dectris"]
+        return found
 
     def get_number_of_images(self) -> int:
         if self.hasDectrisGroup:
             config = self.read_dectris_config()
             return config["nimages"]
         else:
-            _loc = [obj for obj in self.walk if "nimages" in obj]
+            _loc = self._find("nimages")
             return self.__getitem__(_loc[0])[0]
 
     def get_number_of_triggers(self) -> int:
@@ -96,7 +283,7 @@ class DectrisMetafile(Metafile):
             config = self.read_dectris_config()
             return config["ntrigger"]
         else:
-            _loc = [obj for obj in self.walk if "ntrigger" in obj]
+            _loc = self._find("ntrigger")
             return self.__getitem__(_loc[0])[0]
 
     def get_full_number_of_images(self) -> int:
@@ -105,7 +292,7 @@ class DectrisMetafile(Metafile):
     def get_detector_size(self) -> tuple:
         # NB. returns (fast, slow) but data_size in nxs file shoud be recorded (slow, fast)
         # => det_size[::-1]
-        _loc = [obj for obj in self.walk if "pixels_in_detector" in obj]
+        _loc = self._find("pixels_in_detector")
         det_size = []
         for i in _loc:
             det_size.append(self.__getitem__(i)[0])
@@ -114,7 +301,7 @@ class DectrisMetafile(Metafile):
         return tuple(det_size[::-1])
 
     def get_pixel_size(self) -> list:
-        _loc = [obj for obj in self.walk if "pixel_size" in obj]
+        _loc = self._find("pixel_size")
         pix = []
         for i in _loc:
             pix.append(self.__getitem__(i)[0])
@@ -123,7 +310,7 @@ class DectrisMetafile(Metafile):
         return pix
 
     def get_beam_center(self) -> list:
-        _loc = [obj for obj in self.walk if "beam_center" in obj]
+        _loc = self._find("beam_center")
         bc = []
         for i in _loc:
             bc.append(self.__getitem__(i)[0])
@@ -132,34 +319,34 @@ class DectrisMetafile(Metafile):
         return bc
 
     def get_wavelength(self) -> float:
-        _loc = [obj for obj in self.walk if "wavelength" in obj]
+        _loc = self._find("wavelength")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[0]
 
     def get_detector_distance(self) -> float:
         # Distance in Dectris meta file is in m.
-        _loc = [obj for obj in self.walk if "detector_distance" in obj]
+        _loc = self._find("detector_distance")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[0]
 
     def get_saturation_value(self) -> float:
-        _loc = [obj for obj in self.walk if "countrate_correction_count_cutoff" in obj]
+        _loc = self._find("countrate_correction_count_cutoff")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[0]
 
     def get_sensor_information(self) -> tuple[bytes, float]:
-        _loc_material = [obj for obj in self.walk if "sensor_material" in obj]
-        _loc_thickness = [obj for obj in self.walk if "sensor_thickness" in obj]
+        _loc_material = self._find("sensor_material")
+        _loc_thickness = self._find("sensor_thickness")
         return (
             self.__getitem__(_loc_material[0])[0],
             self.__getitem__(_loc_thickness[0])[0],
         )
 
     def get_bit_depth_image(self) -> int:
-        _loc = [obj for obj in self.walk if "bit_depth_image" in obj]
+        _loc = self._find("bit_depth_image")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[0]
@@ -171,7 +358,7 @@ class DectrisMetafile(Metafile):
         if self.hasConfig:
             config = self.read_config_dset()
             return config["data_collection_date"]
-        _loc = [obj for obj in self.walk if "data_collection_date" in obj]
+        _loc = self._find("data_collection_date")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[0]
@@ -183,7 +370,7 @@ class DectrisMetafile(Metafile):
         if self.hasConfig:
             config = self.read_config_dset()
             return config["eiger_fw_version"]
-        _loc = [obj for obj in self.walk if "eiger_fw_version" in obj]
+        _loc = self._find("eiger_fw_version")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[0]
@@ -196,15 +383,15 @@ class DectrisMetafile(Metafile):
         if self.hasConfig:
             config = self.read_config_dset()
             return config["detector_number"]
-        _loc = [obj for obj in self.walk if "detector_number" in obj]
+        _loc = self._find("detector_number")
         if len(_loc) == 0:
             return None
         return self.__getitem__(_loc[0])[0]
 
     def find_mask(self) -> tuple[str, str]:
         if self.hasMask:
-            mask_path = [obj for obj in self.walk if obj.lower() == "mask"]
-            mask_applied_path = [obj for obj in self.walk if "mask_applied" in obj]
+            mask_path = self._find_top_level_ci("mask")
+            mask_applied_path = self._find("mask_applied")
             if len(mask_applied_path) == 0:
                 return (mask_path[0], None)
             return (mask_path[0], mask_applied_path[0])
@@ -212,52 +399,205 @@ class DectrisMetafile(Metafile):
 
     def find_flatfield(self) -> tuple[str, str]:
         if self.hasFlatfield:
-            flatfield_path = [obj for obj in self.walk if obj.lower() == "flatfield"]
-            flatfield_applied_path = [
-                obj for obj in self.walk if "flatfield_correction_applied" in obj
-            ]
+            flatfield_path = self._find_top_level_ci("flatfield")
+            flatfield_applied_path = self._find("flatfield_correction_applied")
             if len(flatfield_applied_path) == 0:
                 return (flatfield_path[0], None)
             return (flatfield_path[0], flatfield_applied_path[0])
         return (None, None)
 
+    def read_mask(self, out: np.ndarray | None = None) -> np.ndarray | None:
+        """Read the pixel mask.
+
+        Args:
+            out (np.ndarray | None, optional): Buffer to read the mask into. If not passed, \
+                a new array is allocated. Defaults to None.
+
+        Returns:
+            np.ndarray | None: The mask, or None if the meta file doesn't have one.
+        """
+        mask_path, _ = self.find_mask()
+        if mask_path is None:
+            return None
+        return self._read_into(mask_path, out)
+
+    def read_flatfield(self, out: np.ndarray | None = None) -> np.ndarray | None:
+        """Read the flatfield.
+
+        Args:
+            out (np.ndarray | None, optional): Buffer to read the flatfield into. If not \
+                passed, a new array is allocated. Defaults to None.
+
+        Returns:
+            np.ndarray | None: The flatfield, or None if the meta file doesn't have one.
+        """
+        flatfield_path, _ = self.find_flatfield()
+        if flatfield_path is None:
+            return None
+        return self._read_into(flatfield_path, out)
+
     def find_software_version(self) -> str:
-        _loc = [obj for obj in self.walk if "software_version" in obj]
+        _loc = self._find("software_version")
         if len(_loc) == 0:
             return None
         return _loc[0]
 
     def find_threshold_energy(self) -> str:
-        _loc = [obj for obj in self.walk if "threshold_energy" in obj]
+        _loc = self._find("threshold_energy")
         if len(_loc) == 0:
             return None
         return _loc[0]
 
     def find_bit_depth_readout(self) -> str:
-        _loc = [obj for obj in self.walk if "bit_depth_readout" in obj]
+        _loc = self._find("bit_depth_readout")
         if len(_loc) == 0:
             return None
         return _loc[0]
 
     def find_bit_depth_image(self) -> str:
-        _loc = [obj for obj in self.walk if "bit_depth_image" in obj]
+        _loc = self._find("bit_depth_image")
         if len(_loc) == 0:
             return None
         return _loc[0]
 
     def find_detector_number(self) -> str:
-        _loc = [obj for obj in self.walk if "detector_number" in obj]
+        _loc = self._find("detector_number")
         if len(_loc) == 0:
             return None
         return _loc[0]
 
     def find_detector_readout_time(self) -> str:
-        _loc = [obj for obj in self.walk if "detector_readout_time" in obj]
+        _loc = self._find("detector_readout_time")
         if len(_loc) == 0:
             return None
         return _loc[0]
 
 
+class DectrisStream2Metafile(DectrisMetafile):
+    """
+    Describes a _meta.h5 file for a Dectris Eiger detector running in stream2 (CBOR) mode.
+
+    The values from the start message are saved in the _dectris group with the stream2 \
+    names, with nested groups for the goniometer axes and the thresholds. They're all read \
+    with a single pass over the group, and also stored under the names used by the legacy \
+    meta files (eg. nimages, omega_start) so that the same readers can be used.
+    """
+
+    # Legacy name -> stream2 name
+    LEGACY_NAMES = {
+        "nimages": "number_of_images",
+        "ntrigger": "number_of_triggers",
+        "wavelength": "incident_wavelength",
+        "x_pixels_in_detector": "image_size_x",
+        "y_pixels_in_detector": "image_size_y",
+        "x_pixel_size": "pixel_size_x",
+        "y_pixel_size": "pixel_size_y",
+        "detector_number": "detector_serial_number",
+        "data_collection_date": "arm_date",
+        "countrate_correction_count_cutoff": "saturation_value",
+    }
+
+    @cached_property
+    @timed(name="DectrisStream2Metafile.read_dectris_config")
+    def _dectris_config(self) -> dict:
+        config = {}
+
+        def _read(name: str, obj: h5py.Group | h5py.Dataset):
+            if not isinstance(obj, h5py.Dataset):
+                return
+            if obj.size > MAX_CONFIG_VALUE_SIZE:
+                return
+            v = obj[()]
+            if np.ndim(v) == 1 and len(v) == 1:
+                v = v[0]
+            if isinstance(v, bytes):
+                v = v.decode()
+            config[name] = v
+
+        self._handle["_dectris"].visititems(_read)
+
+        for legacy, name in self.LEGACY_NAMES.items():
+            if name in config and legacy not in config:
+                config[legacy] = config[name]
+        for name in list(config.keys()):
+            # goniometer/<axis>/start -> <axis>_start
+            parts = name.split("/")
+            if len(parts) == 3 and parts[0] == "goniometer":
+                config.setdefault(f"{parts[1]}_{parts[2]}", config[name])
+        if "detector_distance" not in config and "detector_translation" in config:
+            # Translation of the detector along (x, y, z), in m
+            config["detector_distance"] = float(config["detector_translation"][2])
+        if "bit_depth_image" not in config and "image_dtype" in config:
+            config["bit_depth_image"] = np.dtype(config["image_dtype"]).itemsize * 8
+        return config
+
+    def _config_value(self, key: str) -> Any:
+        return self._dectris_config.get(key, None)
+
+    def get_number_of_images(self) -> int:
+        return self._config_value("nimages")
+
+    def get_number_of_triggers(self) -> int:
+        ntrigger = self._config_value("ntrigger")
+        return ntrigger if ntrigger is not None else 1
+
+    def get_detector_size(self) -> tuple:
+        return (
+            self._config_value("y_pixels_in_detector"),
+            self._config_value("x_pixels_in_detector"),
+        )
+
+    def get_pixel_size(self) -> list:
+        return [self._config_value("x_pixel_size"), self._config_value("y_pixel_size")]
+
+    def get_beam_center(self) -> list:
+        return [
+            self._config_value("beam_center_x"),
+            self._config_value("beam_center_y"),
+        ]
+
+    def get_wavelength(self) -> float:
+        return self._config_value("wavelength")
+
+    def get_detector_distance(self) -> float:
+        return self._config_value("detector_distance")
+
+    def get_saturation_value(self) -> float:
+        return self._config_value("countrate_correction_count_cutoff")
+
+    def get_sensor_information(self) -> tuple[str, float]:
+        return (
+            self._config_value("sensor_material"),
+            self._config_value("sensor_thickness"),
+        )
+
+    def get_bit_depth_image(self) -> int:
+        return self._config_value("bit_depth_image")
+
+    def get_data_collection_date(self) -> str:
+        return self._config_value("data_collection_date")
+
+    def get_fw_version(self) -> str:
+        return self._config_value("eiger_fw_version")
+
+    def get_serial_number(self) -> str:
+        return self._config_value("detector_number")
+
+    def get_axes_positions(self) -> dict[str, tuple[float, float]]:
+        """Start and increment of each of the goniometer axes in the start message.
+
+        Returns:
+            dict[str, tuple[float, float]]: Start and increment, by axis name.
+        """
+        positions = {}
+        for name, v in self._dectris_config.items():
+            parts = name.split("/")
+            if len(parts) == 3 and parts[0] == "goniometer" and parts[2] == "start":
+                inc = self._dectris_config.get(f"goniometer/{parts[1]}/increment", 0.0)
+                positions[parts[1]] = (v, inc)
+        return positions
+
+
 class TristanMetafile(Metafile):
     """
     Describes a _meta.h5 file for a Tristan detector.
@@ -279,13 +619,13 @@ class TristanMetafile(Metafile):
         return len(n_modules)
 
     def find_software_version(self) -> str:
-        _loc = [obj for obj in self.walk if "software_version" in obj]
+        _loc = self._find("software_version")
         if len(_loc) == 0:
             return None
         return _loc[0]
 
     def find_meta_version(self) -> str:
-        _loc = [obj for obj in self.walk if "meta_version" in obj]
+        _loc = self._find("meta_version")
         if len(_loc) == 0:
             return None
         return _loc[0]
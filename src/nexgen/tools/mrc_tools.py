@@ -1,16 +1,22 @@
 """Helper functions for the MRC to Nexus converter"""
 
+import io
 import logging
 import os
 import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
 from math import sqrt
 from pathlib import Path
-from typing import Union
+from typing import Callable, Union
 
 import h5py
 import hdf5plugin
 import mrcfile
 import numpy as np
+from mrcfile.utils import data_dtype_from_header, data_shape_from_header
 
 
 def cal_wavelength(V0: float) -> float:
@@ -59,13 +65,21 @@ def get_metadata(mrc_image: Union[str, Path], verbatim: bool = True) -> dict:
         A dictionary containing metadata from the MRC file.
 
     The function extracts data from the MRC header and extended header
-    dictionaries.
+    dictionaries, including the shape and type of the data, without reading
+    the data block. The result is cached for each file, as long as its
+    modification time and size do not change.
     """
-    hd = {}  # Header dictionary
+    st = os.stat(mrc_image)
+    return dict(_read_header(os.path.abspath(mrc_image), st.st_mtime_ns, st.st_size))
+
 
-    test_file = mrcfile.open(mrc_image, mode="r")
-    hd["data_shape"] = test_file.data.shape
-    hd["original_data_type"] = test_file.data.dtype
+@lru_cache(maxsize=256)
+def _read_header(mrc_image: str, mtime_ns: int, size: int) -> dict:
+    """
+    Parse the header and extended header of an MRC file. The modification
+    time and size of the file are only used as cache keys.
+    """
+    hd = {}  # Header dictionary
 
     with mrcfile.open(mrc_image, header_only=True) as mrc:
         h = mrc.header
@@ -75,6 +89,9 @@ def get_metadata(mrc_image: Union[str, Path], verbatim: bool = True) -> dict:
             # For mrcfile versions older than 1.5.0
             xh = mrc.extended_header
 
+        hd["data_shape"] = data_shape_from_header(h)
+        hd["original_data_type"] = data_dtype_from_header(h)
+
         hd["nx"] = h["nx"]
         hd["ny"] = h["ny"]
         hd["nz"] = h["nz"]
@@ -134,9 +151,127 @@ def get_metadata(mrc_image: Union[str, Path], verbatim: bool = True) -> dict:
         return hd
 
 
+def _create_data_file(
+    hdf5_file: h5py.File,
+    dataset_shape: tuple[int, int, int],
+    dtype: np.dtype,
+    compression: dict,
+) -> h5py.Dataset:
+    """
+    Create the NXentry/NXdata groups and the compressed '/entry/data/data'
+    dataset, chunked by image so that each batch of frames written only
+    touches whole chunks.
+    """
+    group = hdf5_file.create_group("entry")
+    group.attrs["NX_class"] = np.bytes_("NXentry")
+    data_group = group.create_group("data")
+    data_group.attrs["NX_class"] = np.bytes_("NXdata")
+
+    return hdf5_file.create_dataset(
+        "/entry/data/data",
+        shape=dataset_shape,
+        dtype=dtype,
+        chunks=(1, dataset_shape[1], dataset_shape[2]),
+        **compression,
+    )
+
+
+def _convert_frames(data: np.ndarray, start: int, stop: int, dtype) -> np.ndarray:
+    """Convert the images start:stop of an already memory-mapped MRC stack."""
+    return np.asarray(data[start:stop], dtype=dtype)
+
+
+def _read_stack_frames(
+    mrc_file: Union[str, Path], start: int, stop: int, dtype
+) -> np.ndarray:
+    """Read and convert the images start:stop of an MRC stack."""
+    with mrcfile.mmap(mrc_file, mode="r") as mrc:
+        return _convert_frames(mrc.data, start, stop, dtype)
+
+
+def _read_image_frames(mrc_files: list[Union[str, Path]], dtype) -> np.ndarray:
+    """Read and convert a batch of single image MRC files."""
+    frames = []
+    for file in mrc_files:
+        with mrcfile.mmap(file, mode="r") as mrc:
+            if len(mrc.data.shape) > 2:
+                msg = "MRC file contains more than a single image\n"
+                msg += f"  File: {file}"
+                raise ValueError(msg)
+            frames.append(np.asarray(mrc.data, dtype=dtype))
+    return np.stack(frames)
+
+
+def _compress_frames(reader, args: tuple, compression: dict) -> list[tuple[int, bytes]]:
+    """
+    Read a batch of images and compress each of them as one chunk, by passing
+    them through the HDF5 filter pipeline of an in-memory file. Returns the
+    filter mask and compressed bytes of each chunk, ready to be written with
+    write_direct_chunk.
+    """
+    frames = reader(*args)
+    with h5py.File(io.BytesIO(), "w") as fh:
+        dset = fh.create_dataset(
+            "data",
+            data=frames,
+            chunks=(1, *frames.shape[1:]),
+            **compression,
+        )
+        return [dset.id.read_direct_chunk((i, 0, 0)) for i in range(len(frames))]
+
+
+def _write_batches(
+    dset: h5py.Dataset,
+    jobs: list[tuple[int, int, Callable[..., np.ndarray], tuple]],
+    compression: dict,
+    max_workers: int,
+    logger: logging.Logger,
+):
+    """
+    Run the (start, stop, reader, args) jobs and write the images they return
+    to dset[start:stop]. With several workers, the images are read and
+    compressed in parallel and the compressed chunks are written directly,
+    keeping at most two batches per worker in flight.
+    """
+    if max_workers <= 1 or len(jobs) <= 1:
+        for start, stop, reader, args in jobs:
+            logger.info("Reading images %d to %d" % (start, stop - 1))
+            dset[start:stop] = reader(*args)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        pending: deque[tuple[int, int, Future]] = deque()
+        for start, stop, reader, args in jobs:
+            pending.append(
+                (start, stop, pool.submit(_compress_frames, reader, args, compression))
+            )
+            if len(pending) < 2 * max_workers:
+                continue
+            _write_chunks(dset, *pending.popleft(), logger)
+        while pending:
+            _write_chunks(dset, *pending.popleft(), logger)
+
+
+def _write_chunks(
+    dset: h5py.Dataset,
+    start: int,
+    stop: int,
+    future: Future,
+    logger: logging.Logger,
+):
+    for i, (filter_mask, chunk) in enumerate(future.result()):
+        dset.id.write_direct_chunk((start + i, 0, 0), chunk, filter_mask)
+    logger.info("Images %d to %d written" % (start, stop - 1))
+
+
 def to_hdf5_data_file(
-    files: list[Union[str, Path]], logger: logging.Logger, dtype: str = None
-) -> tuple[int, str, np.ndarray, np.dtype]:
+    files: list[Union[str, Path]],
+    logger: logging.Logger,
+    dtype: str | None = None,
+    batch_size: int = 16,
+    max_workers: int | None = 1,
+    output_dir: str | Path | None = None,
+) -> str:
     """
     Extracts data from an MRC format into HDF5
 
@@ -150,11 +285,20 @@ def to_hdf5_data_file(
                     'float32', 'float64'.
             Default is None, in which case the original data type will be
             preserved during conversion.
+        batch_size : int, optional
+            Number of images converted and written at once. Default is 16.
+        max_workers : int, optional
+            Number of processes reading and compressing batches of images in
+            parallel. If None, use as many as there are CPUs. Default is 1,
+            in which case everything runs in this process.
+        output_dir : string or path, optional
+            Directory in which to write the HDF5 file. Default is None, for
+            the current working directory.
 
     Returns
     -------
         hdf5_file :  string
-            Name of the output HDF5 file.
+            Name of the output HDF5 file, including output_dir if passed.
 
     Converts MRC data to HDF5. The input can be either a list of individual
     MRC images, or a single MRC file with a stack of images. In the first
@@ -164,6 +308,12 @@ def to_hdf5_data_file(
     input file) the function only replaces the '.mrc' extension with '.h5'.
     The HDF5 output contains a 3D array (saved in the field
     '/entry/data/data'), where the first index enumerates the images.
+
+    The MRC files are memory-mapped and the images are streamed into the
+    compressed dataset in batches of batch_size, so that memory use does not
+    depend on the size of the stack. With several workers, each batch is
+    read, converted and compressed in a separate process and the compressed
+    chunks are written directly to the file.
     """
 
     # Remove everything after the last '_' from the file name (the indexing)
@@ -176,6 +326,9 @@ def to_hdf5_data_file(
     else:
         out_file = out_file.replace(".mrc", ".h5")
 
+    if output_dir is not None:
+        out_file = os.path.join(output_dir, out_file)
+
     mrc_files = []
 
     # Filter only MRC files from the input
@@ -185,87 +338,72 @@ def to_hdf5_data_file(
             mrc_files.append(file)
 
     n = len(mrc_files)
+    batch_size = max(batch_size, 1)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
 
-    test_file = mrcfile.open(mrc_files[0], mode="r")
-    data_shape = test_file.data.shape
-
+    header = get_metadata(mrc_files[0])
+    data_shape = header["data_shape"]
     if not dtype:
-        dtype = test_file.data.dtype
+        data_dtype = header["original_data_type"]
     else:
-        dtype = np.dtype(dtype)  # Convert the string to dtype
-
-    test_file.close()
-
-    # Input is a single MRC file with a stack of images
-    if (len(data_shape) == 3) and (n == 1):
-        with h5py.File(out_file, "w") as hdf5_file:
-            mrc = mrcfile.open(files[0], mode="r")
-
-            bs = hdf5plugin.Bitshuffle
-            dataset_shape = (data_shape[0], data_shape[1], data_shape[2])
-            dataset = hdf5_file.create_dataset(
-                "data_temp",
-                shape=dataset_shape,
-                dtype=dtype,
-                **bs(clevel=3, cname="lz4"),
-            )
-
-            group = hdf5_file.create_group("entry")
-            group.attrs["NX_class"] = np.bytes_("NXentry")
-            data_group = group.create_group("data")
-            data_group.attrs["NX_class"] = np.bytes_("NXdata")
-
-            compressed_data = hdf5_file.create_dataset(
-                "/entry/data/data",
-                shape=dataset_shape,
-                dtype=dtype,
-                **bs(clevel=3, cname="lz4"),
-            )
-
-            dataset[:, :, :] = mrc.data
-            mrc.close()
-
-            compressed_data[...] = dataset[...]
-            del hdf5_file["data_temp"]
-
-            return out_file
-
-    # Input is a list of MRC files containing single images
-    elif (len(data_shape) == 2) and (n >= 1):
-        with h5py.File(out_file, "w") as hdf5_file:
+        data_dtype = np.dtype(dtype)  # Convert the string to dtype
+
+    jobs: list[tuple[int, int, Callable[..., np.ndarray], tuple]]
+    with ExitStack() as resources:
+        # Input is a single MRC file with a stack of images
+        if (len(data_shape) == 3) and (n == 1):
+            dataset_shape = data_shape
+            compression = dict(hdf5plugin.Bitshuffle(clevel=3, cname="lz4"))
+            batches = [
+                (start, min(start + batch_size, data_shape[0]))
+                for start in range(0, data_shape[0], batch_size)
+            ]
+            if max_workers <= 1 or len(batches) <= 1:
+                # Memory-map the stack once and slice it in this process
+                stack = resources.enter_context(mrcfile.mmap(files[0], mode="r"))
+                jobs = [
+                    (
+                        start,
+                        stop,
+                        _convert_frames,
+                        (stack.data, start, stop, data_dtype),
+                    )
+                    for start, stop in batches
+                ]
+            else:
+                jobs = [
+                    (
+                        start,
+                        stop,
+                        _read_stack_frames,
+                        (files[0], start, stop, data_dtype),
+                    )
+                    for start, stop in batches
+                ]
+
+        # Input is a list of MRC files containing single images
+        elif (len(data_shape) == 2) and (n >= 1):
             dataset_shape = (n, data_shape[0], data_shape[1])
-            dataset = hdf5_file.create_dataset(
-                "data_temp", shape=dataset_shape, dtype=dtype
-            )
+            compression = dict(hdf5plugin.LZ4())
+            jobs = [
+                (
+                    start,
+                    min(start + batch_size, n),
+                    _read_image_frames,
+                    (mrc_files[start : start + batch_size], data_dtype),
+                )
+                for start in range(0, n, batch_size)
+            ]
+        else:
+            msg = "The converter expects either a list of MRC images\n"
+            msg += "or a single MRC file with a stack of images."
+            raise ValueError(msg)
 
-            group = hdf5_file.create_group("entry")
-            group.attrs["NX_class"] = np.bytes_("NXentry")
-            data_group = group.create_group("data")
-            data_group.attrs["NX_class"] = np.bytes_("NXdata")
-
-            field = "/entry/data/data"
-            compressed_data = hdf5_file.create_dataset(
-                field, shape=dataset_shape, dtype=dtype, **hdf5plugin.LZ4()
+        with h5py.File(out_file, "w") as hdf5_file:
+            compressed_data = _create_data_file(
+                hdf5_file, dataset_shape, data_dtype, compression
             )
+            _write_batches(compressed_data, jobs, compression, max_workers, logger)
 
-            for i, file in enumerate(mrc_files):
-                logger.info("Reading image %d:  %s" % (i, file))
-                mrc = mrcfile.open(file, mode="r")
-                data = np.array(mrc.data, dtype=dtype)
-
-                if len(data.shape) > 2:
-                    msg = "MRC file contains more than a single image\n"
-                    msg += f"  File: {file}"
-                    raise ValueError(msg)
-
-                dataset[i, :, :] = data
-                mrc.close()
-
-            compressed_data[...] = dataset[...]
-            del hdf5_file["data_temp"]
-
-            return out_file
-    else:
-        msg = "The converter expects either a list of MRC images\n"
-        msg += "or a single MRC file with a stack of images."
-        raise ValueError(msg)
+    return out_file
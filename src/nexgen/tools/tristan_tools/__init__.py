@@ -0,0 +1,63 @@
+from nexgen.tools.tristan_tools.binning import (
+    bin_events,
+    bin_events_to_file,
+    bin_module_events,
+    bin_tristan_images,
+    rotation_bin_edges,
+    time_bin_edges,
+    write_binned_images,
+)
+from nexgen.tools.tristan_tools.events import (
+    TristanCue,
+    decode_event_positions,
+    find_event_files,
+    find_shutter_times,
+    iter_event_chunks,
+    read_cues,
+)
+from nexgen.tools.tristan_tools.pump_probe import (
+    bin_pump_probe,
+    bin_pump_probe_images,
+    find_trigger_times,
+)
+from nexgen.tools.tristan_tools.statistics import (
+    EventStatistics,
+    collect_event_statistics,
+    write_event_statistics,
+)
+from nexgen.tools.tristan_tools.timestamp_index import (
+    ChunkTimeIndex,
+    build_timestamp_index,
+    get_timestamp_index,
+    iter_events_in_range,
+    load_timestamp_index,
+    save_timestamp_index,
+)
+
+__all__ = [
+    "TristanCue",
+    "decode_event_positions",
+    "find_event_files",
+    "find_shutter_times",
+    "iter_event_chunks",
+    "read_cues",
+    "bin_events",
+    "bin_events_to_file",
+    "bin_module_events",
+    "bin_tristan_images",
+    "rotation_bin_edges",
+    "time_bin_edges",
+    "write_binned_images",
+    "bin_pump_probe",
+    "bin_pump_probe_images",
+    "find_trigger_times",
+    "ChunkTimeIndex",
+    "build_timestamp_index",
+    "get_timestamp_index",
+    "iter_events_in_range",
+    "load_timestamp_index",
+    "save_timestamp_index",
+    "EventStatistics",
+    "collect_event_statistics",
+    "write_event_statistics",
+]
@@ -0,0 +1,474 @@
+"""
+Bin the events recorded by a Tristan detector into images.
+
+The events of each module file are streamed one chunk at a time and histogrammed with \
+np.bincount into a stack of images, one per time slice. The modules are processed in \
+parallel, a block of time slices at a time so that the memory used doesn't grow with the \
+number of images, and each block is written to a HDF5 data file that can be passed to the \
+Tristan copy tools to write the NeXus file.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+from hdf5plugin import Bitshuffle
+
+from ...h5_profiles import H5Profile, open_with_profile
+from .events import (
+    EVENT_ID,
+    EVENT_TIME,
+    decode_event_positions,
+    find_event_files,
+    find_shutter_times,
+)
+from .timestamp_index import (
+    ChunkTimeIndex,
+    get_timestamp_index,
+    index_time_range,
+    iter_events_in_range,
+)
+
+logger = logging.getLogger("nexgen.tools.TristanBinning")
+logger.setLevel(logging.DEBUG)
+
+# Largest stack of images binned at once, by each worker process and by the parent
+MAX_BLOCK_BYTES = 512 * 1024**2
+
+__all__ = [
+    "time_bin_edges",
+    "rotation_bin_edges",
+    "bin_module_events",
+    "bin_events",
+    "bin_events_to_file",
+    "write_binned_images",
+    "bin_tristan_images",
+]
+
+
+def time_bin_edges(t_start: float, t_end: float, nbins: int) -> np.ndarray:
+    """Edges of nbins equal time slices between t_start and t_end.
+
+    Args:
+        t_start (float): Start time, in clock ticks.
+        t_end (float): End time, in clock ticks.
+        nbins (int): Number of time slices.
+
+    Returns:
+        np.ndarray: nbins + 1 edges, in clock ticks.
+    """
+    if nbins < 1:
+        raise ValueError("The number of bins must be at least 1.")
+    if t_end <= t_start:
+        raise ValueError(f"Invalid time range ({t_start}, {t_end}).")
+    return np.linspace(t_start, t_end, nbins + 1)
+
+
+def rotation_bin_edges(
+    t_start: float,
+    t_end: float,
+    scan_range: tuple[float, float],
+    osc: float | None = None,
+    nbins: int | None = None,
+) -> np.ndarray:
+    """Edges of the time slices for images of osc degrees, or nbins images, of a rotation \
+    collection, assuming constant rotation speed while the shutter is open.
+
+    The images correspond to the angles calculated by multiple_images_nexus from the same \
+    osc or nbins.
+
+    Args:
+        t_start (float): Time at which the rotation starts, in clock ticks.
+        t_end (float): Time at which the rotation ends, in clock ticks.
+        scan_range (tuple[float, float]): Start and stop angles of the rotation.
+        osc (float | None, optional): Oscillation angle of each image. Defaults to None.
+        nbins (int | None, optional): Number of images. Defaults to None.
+
+    Raises:
+        ValueError: If both or neither of osc and nbins are passed.
+
+    Returns:
+        np.ndarray: Edges, in clock ticks.
+    """
+    start, stop = scan_range
+    if osc and nbins:
+        raise ValueError(
+            "osc and nbins are mutually exclusive, please pass only one of them."
+        )
+    if nbins:
+        return time_bin_edges(t_start, t_end, nbins)
+    if not osc:
+        raise ValueError("Please pass either osc or nbins.")
+    angles = np.append(np.arange(start, stop, osc), stop)
+    return t_start + (angles - start) / (stop - start) * (t_end - t_start)
+
+
+def _accumulate(counts: np.ndarray, idx: np.ndarray):
+    # Events in a chunk are close in time, so they only cover a small range of the images:
+    # bin that range and add it in
+    if idx.size == 0:
+        return
+    lo, hi = int(idx.min()), int(idx.max())
+    counts[lo : hi + 1] += np.bincount(idx - lo, minlength=hi - lo + 1).astype(
+        counts.dtype, copy=False
+    )
+
+
+def bin_module_events(
+    event_file: Path | str,
+    time_edges: np.ndarray,
+    image_size: tuple[int, int],
+    block_size: int | None = None,
+    index: ChunkTimeIndex | None = None,
+) -> np.ndarray:
+    """Histogram the events of one module file into images.
+
+    Args:
+        event_file (Path | str): Module event file.
+        time_edges (np.ndarray): Edges of the time slices, in clock ticks.
+        image_size (tuple[int, int]): Image size, as (slow, fast) axis.
+        block_size (int | None, optional): Number of events read at once. Defaults to None, \
+            for the HDF5 chunk size.
+        index (ChunkTimeIndex | None, optional): Timestamp index of the file, to only read \
+            the chunks with events within the time slices. Defaults to None.
+
+    Returns:
+        np.ndarray: Flattened image stack, of length (len(time_edges) - 1) * slow * fast.
+    """
+    nbins = len(time_edges) - 1
+    counts = np.zeros(nbins * image_size[0] * image_size[1], dtype=np.uint32)
+    for _, (event_id, ts) in iter_events_in_range(
+        event_file,
+        time_edges[0],
+        time_edges[-1],
+        index,
+        (EVENT_ID, EVENT_TIME),
+        block_size,
+    ):
+        b = np.searchsorted(time_edges, ts, side="right") - 1
+        _histogram(counts, b, event_id, nbins, image_size)
+    return counts
+
+
+def _histogram(
+    counts: np.ndarray,
+    b: np.ndarray,
+    event_id: np.ndarray,
+    nbins: int,
+    image_size: tuple[int, int],
+):
+    """Add the events with image index b, dropping those out of range, to the flattened \
+    image stack counts."""
+    slow, fast = image_size
+    x, y = decode_event_positions(event_id)
+    keep = (b >= 0) & (b < nbins) & (x < fast) & (y < slow)
+    idx = b[keep] * (slow * fast) + y[keep].astype(np.int64) * fast + x[keep]
+    _accumulate(counts, idx)
+
+
+def _sparse(worker: Callable[..., np.ndarray], *args) -> tuple[np.ndarray, np.ndarray]:
+    # Only send back the pixels with counts, images are mostly empty
+    counts = worker(*args)
+    nonzero = np.flatnonzero(counts)
+    return nonzero, counts[nonzero]
+
+
+def _module_pool(num_files: int, max_workers: int | None):
+    """Pool of processes to bin the module files in parallel, or None if they are to be \
+    binned in this process."""
+    if max_workers is None:
+        max_workers = min(num_files, os.cpu_count() or 1)
+    if max_workers <= 1 or num_files <= 1:
+        return nullcontext(None)
+    return ProcessPoolExecutor(max_workers=max_workers)
+
+
+def _bin_modules(
+    worker: Callable[..., np.ndarray],
+    event_files: list[Path | str],
+    nbins: int,
+    image_size: tuple[int, int],
+    pool: ProcessPoolExecutor | None,
+    args: Callable[[Path | str], tuple],
+) -> np.ndarray:
+    """Run worker(event_file, *args(event_file)) on every module file, in the pool if \
+    passed, and sum the flattened image stacks returned."""
+    images = np.zeros(nbins * image_size[0] * image_size[1], dtype=np.uint32)
+    if pool is None:
+        for filename in event_files:
+            images += worker(filename, *args(filename))
+    else:
+        futures = [
+            pool.submit(_sparse, worker, filename, *args(filename))
+            for filename in event_files
+        ]
+        for fut in futures:
+            nonzero, counts = fut.result()
+            images[nonzero] += counts
+    return images.reshape(nbins, *image_size)
+
+
+def _images_per_block(
+    image_size: tuple[int, int], max_block_bytes: int = MAX_BLOCK_BYTES
+) -> int:
+    """Number of images binned at once, so that each block fits in max_block_bytes."""
+    return max(max_block_bytes // (image_size[0] * image_size[1] * 4), 1)
+
+
+def _iter_binned_blocks(
+    event_files: list[Path | str],
+    time_edges: np.ndarray,
+    image_size: tuple[int, int],
+    max_workers: int | None,
+    block_size: int | None,
+    indexes: dict[str, ChunkTimeIndex] | None,
+    max_block_bytes: int,
+) -> Iterator[tuple[int, np.ndarray]]:
+    """Bin the events into blocks of consecutive time slices, yielding the index of the \
+    first image of each block and its image stack."""
+    time_edges = np.asarray(time_edges, dtype=np.float64)
+    indexes = indexes or {}
+    nbins = len(time_edges) - 1
+    per_block = _images_per_block(image_size, max_block_bytes)
+    logger.info(
+        f"Binning events from {len(event_files)} modules into {nbins} images, "
+        f"{min(per_block, nbins)} at a time."
+    )
+    with _module_pool(len(event_files), max_workers) as pool:
+        for i0 in range(0, nbins, per_block):
+            i1 = min(i0 + per_block, nbins)
+            edges = time_edges[i0 : i1 + 1]
+            yield (
+                i0,
+                _bin_modules(
+                    bin_module_events,
+                    event_files,
+                    i1 - i0,
+                    image_size,
+                    pool,
+                    lambda f: (
+                        edges,
+                        image_size,
+                        block_size,
+                        indexes.get(Path(f).name),
+                    ),
+                ),
+            )
+
+
+def bin_events(
+    event_files: list[Path | str],
+    time_edges: np.ndarray,
+    image_size: tuple[int, int],
+    max_workers: int | None = None,
+    block_size: int | None = None,
+    indexes: dict[str, ChunkTimeIndex] | None = None,
+    max_block_bytes: int = MAX_BLOCK_BYTES,
+) -> np.ndarray:
+    """Histogram the events of all the modules into images, one per time slice.
+
+    The whole image stack is returned in memory, use bin_events_to_file for collections \
+    with many images.
+
+    Args:
+        event_files (list[Path | str]): Module event files.
+        time_edges (np.ndarray): Edges of the time slices, in clock ticks.
+        image_size (tuple[int, int]): Image size, as (slow, fast) axis.
+        max_workers (int | None, optional): Number of modules binned in parallel, each in \
+            its own process. If 1, everything runs in this process. Defaults to None, for \
+            as many as there are modules, up to the number of CPUs.
+        block_size (int | None, optional): Number of events read at once. Defaults to None, \
+            for the HDF5 chunk size.
+        indexes (dict[str, ChunkTimeIndex] | None, optional): Timestamp index of each module \
+            file, by file name, to skip the chunks outside of the time slices. Defaults to \
+            None.
+        max_block_bytes (int, optional): Size of the largest stack of images binned at once \
+            by each worker. Defaults to 512 MiB.
+
+    Returns:
+        np.ndarray: Image stack, of shape (len(time_edges) - 1, slow, fast).
+    """
+    images = np.empty((len(time_edges) - 1, *image_size), dtype=np.uint32)
+    for i0, block in _iter_binned_blocks(
+        event_files,
+        time_edges,
+        image_size,
+        max_workers,
+        block_size,
+        indexes,
+        max_block_bytes,
+    ):
+        images[i0 : i0 + len(block)] = block
+    return images
+
+
+def bin_events_to_file(
+    event_files: list[Path | str],
+    time_edges: np.ndarray,
+    image_size: tuple[int, int],
+    filename: Path | str,
+    write_mode: str = "x",
+    max_workers: int | None = None,
+    block_size: int | None = None,
+    indexes: dict[str, ChunkTimeIndex] | None = None,
+    max_block_bytes: int = MAX_BLOCK_BYTES,
+    h5_profile: H5Profile | str | None = None,
+) -> Path:
+    """Histogram the events of all the modules into images, one per time slice, and write \
+    them to the "data" dataset of a new HDF5 file, one block of images at a time.
+
+    Args:
+        event_files (list[Path | str]): Module event files.
+        time_edges (np.ndarray): Edges of the time slices, in clock ticks.
+        image_size (tuple[int, int]): Image size, as (slow, fast) axis.
+        filename (Path | str): Output file.
+        write_mode (str, optional): File opening mode. Defaults to "x".
+        max_workers (int | None, optional): Number of modules binned in parallel. Defaults \
+            to None, for as many as there are modules, up to the number of CPUs.
+        block_size (int | None, optional): Number of events read at once. Defaults to None, \
+            for the HDF5 chunk size.
+        indexes (dict[str, ChunkTimeIndex] | None, optional): Timestamp index of each module \
+            file, by file name, to skip the chunks outside of each block. Defaults to None.
+        max_block_bytes (int, optional): Size of the largest stack of images binned at once \
+            by each worker. Defaults to 512 MiB.
+        h5_profile (H5Profile | str | None, optional): HDF5 property profile to apply to \
+            the new file. Defaults to None.
+
+    Returns:
+        Path: The output file.
+    """
+    filename = Path(filename).expanduser().resolve()
+    nbins = len(time_edges) - 1
+    with open_with_profile(filename, write_mode, h5_profile) as fh:
+        dset = fh.create_dataset(
+            "data",
+            shape=(nbins, *image_size),
+            dtype=np.uint32,
+            chunks=(1, *image_size),
+            **Bitshuffle(),
+        )
+        for i0, block in _iter_binned_blocks(
+            event_files,
+            time_edges,
+            image_size,
+            max_workers,
+            block_size,
+            indexes,
+            max_block_bytes,
+        ):
+            dset[i0 : i0 + len(block)] = block
+    logger.info(f"{nbins} images written to {filename}.")
+    return filename
+
+
+def write_binned_images(
+    images: np.ndarray,
+    filename: Path | str,
+    write_mode: str = "x",
+    h5_profile: H5Profile | str | None = None,
+) -> Path:
+    """Write a stack of binned images to the "data" dataset of a new HDF5 file.
+
+    Args:
+        images (np.ndarray): Image stack, of shape (num_images, slow, fast).
+        filename (Path | str): Output file.
+        write_mode (str, optional): File opening mode. Defaults to "x".
+        h5_profile (H5Profile | str | None, optional): HDF5 property profile to apply to \
+            the new file. Defaults to None.
+
+    Returns:
+        Path: The output file.
+    """
+    filename = Path(filename).expanduser().resolve()
+    with open_with_profile(filename, write_mode, h5_profile) as fh:
+        fh.create_dataset(
+            "data",
+            data=images,
+            chunks=(1, *images.shape[1:]),
+            **Bitshuffle(),
+        )
+    logger.info(f"{len(images)} images written to {filename}.")
+    return filename
+
+
+def bin_tristan_images(
+    meta_file: Path | str,
+    output_file: Path | str,
+    image_size: tuple[int, int],
+    nbins: int | None = None,
+    osc: float | None = None,
+    scan_range: tuple[float, float] | None = None,
+    max_workers: int | None = None,
+    write_mode: str = "x",
+    save_index: bool = True,
+    max_block_bytes: int = MAX_BLOCK_BYTES,
+) -> Path:
+    """Bin the events of a Tristan collection into images and write them to a data file.
+
+    Events are binned between the shutter open and close cues, or between the first and \
+    last event if those weren't recorded. The timestamp index of the module files is loaded, \
+    or built and optionally saved next to the meta file, to only read the chunks in that range. \
+    The images are binned and written a block at a time. The data file can then be passed to \
+    single_image_nexus, for nbins=1, or multiple_images_nexus with the same osc or nbins.
+
+    Args:
+        meta_file (Path | str): The _meta.h5 file of the collection, the module files are \
+            found next to it.
+        output_file (Path | str): Data file to write.
+        image_size (tuple[int, int]): Image size, as (slow, fast) axis.
+        nbins (int | None, optional): Number of images. Defaults to None.
+        osc (float | None, optional): Oscillation angle of each image, requires scan_range. \
+            Defaults to None.
+        scan_range (tuple[float, float] | None, optional): Start and stop angles of a \
+            rotation collection. Defaults to None.
+        max_workers (int | None, optional): Number of modules binned in parallel. \
+            Defaults to None.
+        write_mode (str, optional): File opening mode for the data file. Defaults to "x".
+        save_index (bool, optional): Save the timestamp index next to the meta file, if it \
+            has to be built. Defaults to True.
+        max_block_bytes (int, optional): Size of the largest stack of images binned at once \
+            by each worker. Defaults to 512 MiB.
+
+    Raises:
+        FileNotFoundError: If no event files are found.
+        ValueError: If osc is passed without a scan_range.
+
+    Returns:
+        Path: The data file.
+    """
+    event_files = find_event_files(meta_file)
+    if not event_files:
+        raise FileNotFoundError(f"No event files found for {meta_file}.")
+
+    indexes = get_timestamp_index(meta_file, max_workers, save=save_index)
+    t_start, t_end = find_shutter_times(event_files)
+    if t_start is None or t_end is None:
+        logger.warning("Shutter cues not found, using the time range of the events.")
+        t_start, t_end = index_time_range(indexes)
+        # Make sure the last event falls in the last bin
+        t_end += 1
+
+    if osc:
+        if scan_range is None:
+            raise ValueError("A scan_range is needed to bin by oscillation angle.")
+        time_edges = rotation_bin_edges(t_start, t_end, scan_range, osc=osc)
+    else:
+        time_edges = time_bin_edges(t_start, t_end, nbins if nbins else 1)
+
+    return bin_events_to_file(
+        event_files,
+        time_edges,
+        image_size,
+        output_file,
+        write_mode,
+        max_workers,
+        indexes=indexes,
+        max_block_bytes=max_block_bytes,
+    )
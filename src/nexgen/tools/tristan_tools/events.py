@@ -0,0 +1,217 @@
+"""
+Readers for the event data files written by a Tristan detector.
+
+Each module of the detector writes its own file, with the position, timestamp and energy of \
+every event and the timestamped cue messages (shutter, triggers, ...) it received.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections.abc import Iterator
+from enum import IntEnum
+from pathlib import Path
+
+import h5py
+import numpy as np
+from numpy.typing import ArrayLike
+
+from ..constants import clock_freq
+
+logger = logging.getLogger("nexgen.tools.TristanEvents")
+logger.setLevel(logging.DEBUG)
+
+# Event positions are packed as x * 0x2000 + y
+POSITION_BITS = 13
+POSITION_MASK = 0x1FFF
+
+EVENT_ID = "event_id"
+EVENT_TIME = "event_timestamp_zero"
+CUE_ID = "cue_id"
+CUE_TIME = "cue_timestamp_zero"
+
+event_file_pattern = re.compile(r"(.*)_\d{6}\.h5")
+
+
+class TristanCue(IntEnum):
+    """Identifiers of the cue messages recorded by the Tristan detector."""
+
+    PADDING = 0x000
+    SYNC = 0x800
+    SHUTTER_OPEN = 0x840
+    SHUTTER_OPEN_MODULE_1 = 0x841
+    SHUTTER_OPEN_MODULE_2 = 0x842
+    SHUTTER_CLOSE = 0x880
+    SHUTTER_CLOSE_MODULE_1 = 0x881
+    SHUTTER_CLOSE_MODULE_2 = 0x882
+    FEM_FALLING = 0x8C1
+    FEM_RISING = 0x8E1
+    TTL_FALLING = 0x8C9
+    TTL_RISING = 0x8E9
+    LVDS_FALLING = 0x8CA
+    LVDS_RISING = 0x8EA
+    TZERO_FALLING = 0x8CB
+    TZERO_RISING = 0x8EB
+    SYNC_FALLING = 0x8CC
+    SYNC_RISING = 0x8EC
+
+
+SHUTTER_OPEN_CUES = (
+    TristanCue.SHUTTER_OPEN,
+    TristanCue.SHUTTER_OPEN_MODULE_1,
+    TristanCue.SHUTTER_OPEN_MODULE_2,
+)
+SHUTTER_CLOSE_CUES = (
+    TristanCue.SHUTTER_CLOSE,
+    TristanCue.SHUTTER_CLOSE_MODULE_1,
+    TristanCue.SHUTTER_CLOSE_MODULE_2,
+)
+
+
+def decode_event_positions(event_id: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+    """Unpack the pixel coordinates from the event ids.
+
+    Args:
+        event_id (ArrayLike): Packed event positions, x * 0x2000 + y.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: x (fast axis) and y (slow axis) coordinates.
+    """
+    event_id = np.asarray(event_id, dtype=np.uint32)
+    return (event_id >> POSITION_BITS) & POSITION_MASK, event_id & POSITION_MASK
+
+
+def ticks_to_seconds(ticks: ArrayLike) -> np.ndarray | float:
+    """Convert timestamps in detector clock ticks to seconds."""
+    return np.asarray(ticks, dtype=np.float64) / clock_freq
+
+
+def find_event_files(meta_file: Path | str) -> list[Path]:
+    """Find the event files written by each module, eg. for file_meta.h5 look for \
+    file_000001.h5, file_000002.h5, ...
+
+    Args:
+        meta_file (Path | str): Path to the _meta.h5 file of the collection.
+
+    Returns:
+        list[Path]: Event files, sorted.
+    """
+    meta_file = Path(meta_file).expanduser().resolve()
+    stem = meta_file.name.removesuffix("_meta.h5")
+    files = [
+        f
+        for f in meta_file.parent.glob(f"{stem}_*.h5")
+        if (m := event_file_pattern.fullmatch(f.name)) and m[1] == stem
+    ]
+    return sorted(files)
+
+
+def iter_event_chunks(
+    event_file: Path | str | h5py.File,
+    datasets: tuple[str, ...] = (EVENT_ID, EVENT_TIME),
+    start: int = 0,
+    stop: int | None = None,
+    block_size: int | None = None,
+) -> Iterator[tuple[int, list[np.ndarray]]]:
+    """Read the event datasets of a module file one block at a time.
+
+    By default the blocks are aligned with the HDF5 chunks of the first dataset, so that \
+    each compressed chunk is only decompressed once.
+
+    Args:
+        event_file (Path | str | h5py.File): Event file, or its open handle.
+        datasets (tuple[str, ...], optional): Datasets to read. Defaults to event_id and \
+            event_timestamp_zero.
+        start (int, optional): First event to read. Defaults to 0.
+        stop (int | None, optional): Stop before this event. Defaults to None, for all events.
+        block_size (int | None, optional): Number of events per block. Defaults to None, \
+            for the chunk size of the first dataset.
+
+    Yields:
+        tuple[int, list[np.ndarray]]: Index of the first event in the block and the values \
+            read from each dataset.
+    """
+    if not isinstance(event_file, h5py.File):
+        with h5py.File(event_file, "r") as fh:
+            yield from iter_event_chunks(fh, datasets, start, stop, block_size)
+        return
+
+    dsets = [event_file[d] for d in datasets]
+    num_events = min(len(d) for d in dsets)
+    stop = num_events if stop is None else min(stop, num_events)
+    if block_size is None:
+        chunks = dsets[0].chunks
+        block_size = chunks[0] if chunks else 1 << 20
+    # Start of the first block, aligned with the chunks
+    pos = start - start % block_size
+    while pos < stop:
+        end = min(pos + block_size, stop)
+        first = max(pos, start)
+        yield first, [d[first:end] for d in dsets]
+        pos += block_size
+
+
+def read_cues(event_file: Path | str | h5py.File) -> tuple[np.ndarray, np.ndarray]:
+    """Read the cue messages recorded in a module file, dropping the padding.
+
+    Args:
+        event_file (Path | str | h5py.File): Event file, or its open handle.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Cue ids and timestamps.
+    """
+    if not isinstance(event_file, h5py.File):
+        with h5py.File(event_file, "r") as fh:
+            return read_cues(fh)
+    if CUE_ID not in event_file:
+        return np.array([], dtype=np.uint16), np.array([], dtype=np.uint64)
+    cue_id = event_file[CUE_ID][()]
+    cue_time = event_file[CUE_TIME][()]
+    keep = cue_id != TristanCue.PADDING
+    return cue_id[keep], cue_time[keep]
+
+
+def find_shutter_times(
+    event_files: list[Path | str],
+) -> tuple[int | None, int | None]:
+    """Find when the shutter opened and closed from the cues recorded by the modules.
+
+    Args:
+        event_files (list[Path | str]): Event files of all the modules.
+
+    Returns:
+        tuple[int | None, int | None]: Timestamps of the first shutter open and last \
+            shutter close cues, in clock ticks. None if not found.
+    """
+    opens, closes = [], []
+    for filename in event_files:
+        cue_id, cue_time = read_cues(filename)
+        opens.extend(cue_time[np.isin(cue_id, SHUTTER_OPEN_CUES)])
+        closes.extend(cue_time[np.isin(cue_id, SHUTTER_CLOSE_CUES)])
+    t_open = int(min(opens)) if opens else None
+    t_close = int(max(closes)) if closes else None
+    logger.debug(f"Shutter open at {t_open}, closed at {t_close}.")
+    return t_open, t_close
+
+
+def find_time_range(event_files: list[Path | str]) -> tuple[int, int]:
+    """Find the first and last event timestamps, scanning all the events.
+
+    Args:
+        event_files (list[Path | str]): Event files of all the modules.
+
+    Returns:
+        tuple[int, int]: Earliest and latest timestamps, in clock ticks.
+    """
+    t_min, t_max = None, None
+    for filename in event_files:
+        for _, (ts,) in iter_event_chunks(filename, (EVENT_TIME,)):
+            if ts.size == 0:
+                continue
+            lo, hi = int(ts.min()), int(ts.max())
+            t_min = lo if t_min is None else min(t_min, lo)
+            t_max = hi if t_max is None else max(t_max, hi)
+    if t_min is None:
+        raise ValueError("No events found in the event files.")
+    return t_min, t_max
@@ -0,0 +1,266 @@
+"""
+Bin the events of a stationary pump-probe collection on a Tristan detector into phases of \
+the pump cycle.
+
+The laser triggers are recorded by the detector as cues. Each event is assigned to a phase \
+bin according to the time elapsed since the last trigger, and the images of each phase are \
+accumulated in a single streaming pass over the module files. The result can be passed to \
+single_image_nexus with pump_probe_bins set to the number of phases.
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from ..constants import clock_freq
+from .binning import _bin_modules, _histogram, _module_pool, write_binned_images
+from .events import (
+    EVENT_ID,
+    EVENT_TIME,
+    TristanCue,
+    find_event_files,
+    find_shutter_times,
+    read_cues,
+)
+from .timestamp_index import (
+    ChunkTimeIndex,
+    get_timestamp_index,
+    iter_events_in_range,
+)
+
+logger = logging.getLogger("nexgen.tools.TristanPumpProbe")
+logger.setLevel(logging.DEBUG)
+
+__all__ = [
+    "find_trigger_times",
+    "find_pump_period",
+    "bin_module_phases",
+    "bin_pump_probe",
+    "bin_pump_probe_images",
+]
+
+
+def find_trigger_times(
+    event_file: Path | str, trigger_cue: int = TristanCue.TTL_RISING
+) -> np.ndarray:
+    """Timestamps of the laser triggers recorded in a module file.
+
+    Args:
+        event_file (Path | str): Module event file.
+        trigger_cue (int, optional): Cue marking the laser trigger. Defaults to \
+            TristanCue.TTL_RISING.
+
+    Returns:
+        np.ndarray: Sorted trigger timestamps, in clock ticks.
+    """
+    cue_id, cue_time = read_cues(event_file)
+    return np.unique(cue_time[cue_id == trigger_cue])
+
+
+def find_pump_period(triggers: np.ndarray) -> float:
+    """Period of the pump laser, as the median interval between triggers.
+
+    Args:
+        triggers (np.ndarray): Sorted trigger timestamps, in clock ticks.
+
+    Raises:
+        ValueError: If there are less than two triggers.
+
+    Returns:
+        float: Pump period, in clock ticks.
+    """
+    if len(triggers) < 2:
+        raise ValueError("At least two triggers are needed to find the pump period.")
+    return float(np.median(np.diff(triggers)))
+
+
+def bin_module_phases(
+    event_file: Path | str,
+    triggers: np.ndarray,
+    period: float,
+    nbins: int,
+    image_size: tuple[int, int],
+    time_range: tuple[float, float] | None = None,
+    block_size: int | None = None,
+    index: ChunkTimeIndex | None = None,
+) -> np.ndarray:
+    """Histogram the events of one module file into images of the phases of the pump cycle.
+
+    Events before the first trigger, more than one period after the last trigger or outside \
+    of time_range are dropped.
+
+    Args:
+        event_file (Path | str): Module event file.
+        triggers (np.ndarray): Sorted trigger timestamps, in clock ticks.
+        period (float): Pump period, in clock ticks.
+        nbins (int): Number of phase bins the period is divided into.
+        image_size (tuple[int, int]): Image size, as (slow, fast) axis.
+        time_range (tuple[float, float] | None, optional): Only bin the events in this \
+            range, in clock ticks. Defaults to None.
+        block_size (int | None, optional): Number of events read at once. Defaults to None, \
+            for the HDF5 chunk size.
+        index (ChunkTimeIndex | None, optional): Timestamp index of the file, to only read \
+            the chunks with events that can be binned. Defaults to None.
+
+    Returns:
+        np.ndarray: Flattened image stack, of length nbins * slow * fast.
+    """
+    counts = np.zeros(nbins * image_size[0] * image_size[1], dtype=np.uint32)
+    if len(triggers) == 0:
+        return counts
+    triggers = np.asarray(triggers, dtype=np.int64)
+    t_start, t_end = triggers[0], triggers[-1] + period
+    if time_range is not None:
+        t_start, t_end = max(t_start, time_range[0]), min(t_end, time_range[1])
+    for _, (event_id, ts) in iter_events_in_range(
+        event_file, t_start, t_end, index, (EVENT_ID, EVENT_TIME), block_size
+    ):
+        ts = ts.astype(np.int64)
+        last = np.searchsorted(triggers, ts, side="right") - 1
+        delay = ts - triggers[np.maximum(last, 0)]
+        b = (delay * nbins // period).astype(np.int64)
+        b[last < 0] = -1
+        if time_range is not None:
+            b[(ts < time_range[0]) | (ts >= time_range[1])] = -1
+        _histogram(counts, b, event_id, nbins, image_size)
+    return counts
+
+
+def bin_pump_probe(
+    event_files: list[Path | str],
+    nbins: int,
+    image_size: tuple[int, int],
+    trigger_cue: int = TristanCue.TTL_RISING,
+    period: float | None = None,
+    time_range: tuple[float, float] | None = None,
+    max_workers: int | None = None,
+    block_size: int | None = None,
+    indexes: dict[str, ChunkTimeIndex] | None = None,
+) -> np.ndarray:
+    """Histogram the events of all the modules into images of the phases of the pump cycle.
+
+    Each module uses the triggers it recorded itself, or those recorded by the other \
+    modules if it has none.
+
+    Args:
+        event_files (list[Path | str]): Module event files.
+        nbins (int): Number of phase bins the pump period is divided into.
+        image_size (tuple[int, int]): Image size, as (slow, fast) axis.
+        trigger_cue (int, optional): Cue marking the laser trigger. Defaults to \
+            TristanCue.TTL_RISING.
+        period (float | None, optional): Pump period, in s. Defaults to None, to work it out \
+            from the triggers.
+        time_range (tuple[float, float] | None, optional): Only bin the events in this \
+            range, in clock ticks. Defaults to None.
+        max_workers (int | None, optional): Number of modules binned in parallel. Defaults \
+            to None, for as many as there are modules, up to the number of CPUs.
+        block_size (int | None, optional): Number of events read at once. Defaults to None, \
+            for the HDF5 chunk size.
+        indexes (dict[str, ChunkTimeIndex] | None, optional): Timestamp index of each module \
+            file, by file name, to skip the chunks that can't be binned. Defaults to None.
+
+    Raises:
+        ValueError: If no triggers are found.
+
+    Returns:
+        np.ndarray: Image stack, of shape (nbins, slow, fast).
+    """
+    indexes = indexes or {}
+    triggers = {f: find_trigger_times(f, trigger_cue) for f in event_files}
+    all_triggers = np.unique(np.concatenate(list(triggers.values())))
+    if len(all_triggers) == 0:
+        raise ValueError(f"No laser trigger cues ({trigger_cue:#x}) found.")
+    for f, t in triggers.items():
+        if len(t) == 0:
+            logger.warning(
+                f"No triggers recorded in {f}, using those of other modules."
+            )
+            triggers[f] = all_triggers
+    if period is None:
+        period_ticks = find_pump_period(all_triggers)
+    else:
+        period_ticks = round(period * clock_freq)
+    logger.info(
+        f"{len(all_triggers)} triggers found, pump period {period_ticks / clock_freq} s."
+    )
+    with _module_pool(len(event_files), max_workers) as pool:
+        return _bin_modules(
+            bin_module_phases,
+            event_files,
+            nbins,
+            image_size,
+            pool,
+            lambda f: (
+                triggers[f],
+                period_ticks,
+                nbins,
+                image_size,
+                time_range,
+                block_size,
+                indexes.get(Path(f).name),
+            ),
+        )
+
+
+def bin_pump_probe_images(
+    meta_file: Path | str,
+    output_file: Path | str,
+    image_size: tuple[int, int],
+    nbins: int,
+    trigger_cue: int = TristanCue.TTL_RISING,
+    period: float | None = None,
+    max_workers: int | None = None,
+    write_mode: str = "x",
+    save_index: bool = True,
+) -> Path:
+    """Bin the events of a pump-probe collection into images of the phases of the pump \
+    cycle and write them to a data file, to be passed to single_image_nexus with \
+    pump_probe_bins=nbins.
+
+    Only the events recorded while the shutter was open are binned, if the shutter cues \
+    are found.
+
+    Args:
+        meta_file (Path | str): The _meta.h5 file of the collection, the module files are \
+            found next to it.
+        output_file (Path | str): Data file to write.
+        image_size (tuple[int, int]): Image size, as (slow, fast) axis.
+        nbins (int): Number of phase bins.
+        trigger_cue (int, optional): Cue marking the laser trigger. Defaults to \
+            TristanCue.TTL_RISING.
+        period (float | None, optional): Pump period, in s. Defaults to None, to work it out \
+            from the triggers.
+        max_workers (int | None, optional): Number of modules binned in parallel. \
+            Defaults to None.
+        write_mode (str, optional): File opening mode for the data file. Defaults to "x".
+        save_index (bool, optional): Save the timestamp index next to the meta file, if it \
+            has to be built. Defaults to True.
+
+    Raises:
+        FileNotFoundError: If no event files are found.
+
+    Returns:
+        Path: The data file.
+    """
+    event_files = find_event_files(meta_file)
+    if not event_files:
+        raise FileNotFoundError(f"No event files found for {meta_file}.")
+    indexes = get_timestamp_index(meta_file, max_workers, save=save_index)
+    t_open, t_close = find_shutter_times(event_files)
+    time_range = None
+    if t_open is not None and t_close is not None:
+        time_range = (t_open, t_close)
+    images = bin_pump_probe(
+        event_files,
+        nbins,
+        image_size,
+        trigger_cue,
+        period,
+        time_range,
+        max_workers,
+        indexes=indexes,
+    )
+    return write_binned_images(images, output_file, write_mode)
@@ -0,0 +1,318 @@
+"""
+Statistics of the events recorded by a Tristan detector.
+
+The module files are scanned in parallel, in a single pass each, to count the events, find \
+their time span and the shutter cues, and histogram the count rate over the collection. The \
+count rate bins are on a fixed grid of multiples of the bin width, so no time range is \
+needed before the scan, and the time range of each chunk is recorded on the way to build \
+the timestamp index, saved next to the meta file for the binning tools. The results can be \
+saved to the NeXus file as a NXcollection.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from ...nxs_write.write_utils import create_attributes
+from ..constants import clock_freq
+from .events import (
+    EVENT_TIME,
+    SHUTTER_CLOSE_CUES,
+    SHUTTER_OPEN_CUES,
+    find_event_files,
+    iter_event_chunks,
+    read_cues,
+)
+from .timestamp_index import ChunkTimeIndex, _try_save, load_timestamp_index
+
+logger = logging.getLogger("nexgen.tools.TristanStatistics")
+logger.setLevel(logging.DEBUG)
+
+__all__ = [
+    "ModuleStatistics",
+    "EventStatistics",
+    "module_statistics",
+    "collect_event_statistics",
+    "write_event_statistics",
+]
+
+EVENT_STATISTICS_LOC = "/entry/instrument/detector/event_statistics"
+
+
+@dataclass
+class ModuleStatistics:
+    """Statistics of the events in one module file.
+
+    Args:
+        event_file (str): Name of the module file.
+        num_events (int): Number of events.
+        t_first (int | None): Earliest event timestamp, in clock ticks.
+        t_last (int | None): Latest event timestamp, in clock ticks.
+        shutter_open (np.ndarray): Timestamps of the shutter open cues, in clock ticks.
+        shutter_close (np.ndarray): Timestamps of the shutter close cues, in clock ticks.
+        rate_start (int): Position of the first count rate bin on the grid, the bin k \
+            covering [k * bin_width, (k + 1) * bin_width).
+        counts (np.ndarray): Number of events in each count rate bin, from rate_start.
+        index (ChunkTimeIndex): Timestamp index of the file.
+    """
+
+    event_file: str
+    num_events: int
+    t_first: int | None
+    t_last: int | None
+    shutter_open: np.ndarray
+    shutter_close: np.ndarray
+    rate_start: int
+    counts: np.ndarray
+    index: ChunkTimeIndex
+
+
+def module_statistics(
+    event_file: Path | str,
+    bin_width: int,
+    block_size: int | None = None,
+) -> ModuleStatistics:
+    """Scan the events of one module file, building its timestamp index on the way.
+
+    Args:
+        event_file (Path | str): Module event file.
+        bin_width (int): Width of the count rate bins, in clock ticks.
+        block_size (int | None, optional): Number of events read at once, and indexed \
+            together. Defaults to None, for the HDF5 chunk size.
+
+    Returns:
+        ModuleStatistics: Statistics of the module.
+    """
+    event_file = Path(event_file)
+    counts = np.zeros(0, dtype=np.uint64)
+    num_events, rate_start = 0, 0
+    t_min: list[int] = []
+    t_max: list[int] = []
+    with h5py.File(event_file, "r") as fh:
+        if block_size is None:
+            chunks = fh[EVENT_TIME].chunks
+            block_size = chunks[0] if chunks else 1 << 20
+        for _, (ts,) in iter_event_chunks(fh, (EVENT_TIME,), block_size=block_size):
+            if ts.size == 0:
+                continue
+            num_events += ts.size
+            lo, hi = int(ts.min()), int(ts.max())
+            t_min.append(lo)
+            t_max.append(hi)
+            # Grow the histogram to cover the bins of this chunk
+            first = lo // bin_width
+            if counts.size:
+                first = min(first, rate_start)
+            stop = max(rate_start + counts.size, hi // bin_width + 1)
+            if first != rate_start or stop != rate_start + counts.size:
+                grown = np.zeros(stop - first, dtype=np.uint64)
+                grown[rate_start - first : rate_start - first + counts.size] = counts
+                counts, rate_start = grown, first
+            b = (ts // bin_width).astype(np.int64) - rate_start
+            counts += np.bincount(b, minlength=counts.size).astype(np.uint64)
+        cue_id, cue_time = read_cues(fh)
+    index = ChunkTimeIndex(
+        event_file.name,
+        block_size,
+        num_events,
+        np.array(t_min, dtype=np.uint64),
+        np.array(t_max, dtype=np.uint64),
+    )
+    return ModuleStatistics(
+        event_file.name,
+        num_events,
+        min(t_min) if t_min else None,
+        max(t_max) if t_max else None,
+        np.sort(cue_time[np.isin(cue_id, SHUTTER_OPEN_CUES)]),
+        np.sort(cue_time[np.isin(cue_id, SHUTTER_CLOSE_CUES)]),
+        rate_start,
+        counts,
+        index,
+    )
+
+
+@dataclass
+class EventStatistics:
+    """Statistics of the events of a whole collection.
+
+    Args:
+        modules (list[ModuleStatistics]): Statistics of each module file.
+        rate_edges (np.ndarray): Edges of the count rate bins, in clock ticks.
+        counts (np.ndarray): Number of events in each count rate bin, summed over the \
+            modules.
+    """
+
+    modules: list[ModuleStatistics]
+    rate_edges: np.ndarray
+    counts: np.ndarray
+
+    @property
+    def events_per_module(self) -> np.ndarray:
+        return np.array([m.num_events for m in self.modules], dtype=np.uint64)
+
+    @property
+    def total_events(self) -> int:
+        return int(self.events_per_module.sum())
+
+    @property
+    def time_range(self) -> tuple[int, int]:
+        """Earliest and latest event timestamps, in clock ticks."""
+        firsts = [m.t_first for m in self.modules if m.t_first is not None]
+        lasts = [m.t_last for m in self.modules if m.t_last is not None]
+        return min(firsts), max(lasts)
+
+    @property
+    def shutter_open(self) -> int | None:
+        """First shutter open cue, in clock ticks."""
+        opens = [int(m.shutter_open[0]) for m in self.modules if len(m.shutter_open)]
+        return min(opens) if opens else None
+
+    @property
+    def shutter_close(self) -> int | None:
+        """Last shutter close cue, in clock ticks."""
+        closes = [
+            int(m.shutter_close[-1]) for m in self.modules if len(m.shutter_close)
+        ]
+        return max(closes) if closes else None
+
+    @property
+    def time_span(self) -> float:
+        """Time between the first and last event, in s."""
+        t_first, t_last = self.time_range
+        return (t_last - t_first) / clock_freq
+
+    @property
+    def collection_time(self) -> float:
+        """Time the shutter was open, in s, or the time span of the events if the shutter \
+        cues weren't recorded."""
+        if self.shutter_open is None or self.shutter_close is None:
+            return self.time_span
+        return (self.shutter_close - self.shutter_open) / clock_freq
+
+    @property
+    def count_rate(self) -> np.ndarray:
+        """Count rate in each bin, in events/s."""
+        return self.counts / (np.diff(self.rate_edges) / clock_freq)
+
+    @property
+    def mean_count_rate(self) -> float:
+        """Mean count rate over the collection time, in events/s."""
+        collection_time = self.collection_time
+        return self.total_events / collection_time if collection_time > 0 else 0.0
+
+
+def collect_event_statistics(
+    meta_file: Path | str,
+    rate_bin_width: float = 0.1,
+    max_workers: int | None = None,
+    block_size: int | None = None,
+    save_index: bool = True,
+) -> EventStatistics:
+    """Scan all the module files of a Tristan collection, in parallel.
+
+    Each file is read once. The count rate bins are aligned to multiples of rate_bin_width \
+    from the timestamp zero, so the first and last bins may only be partly covered by the \
+    collection. The timestamp index of the files is built in the same pass.
+
+    Args:
+        meta_file (Path | str): The _meta.h5 file of the collection, the module files are \
+            found next to it.
+        rate_bin_width (float, optional): Width of the count rate bins, in s. Defaults to 0.1.
+        max_workers (int | None, optional): Number of files scanned in parallel, each in its \
+            own process. If 1, everything runs in this process. Defaults to None, for as \
+            many as there are files, up to the number of CPUs.
+        block_size (int | None, optional): Number of events read at once. Defaults to None, \
+            for the HDF5 chunk size.
+        save_index (bool, optional): Save the timestamp index next to the meta file, if \
+            there isn't an up to date one already. Defaults to True.
+
+    Raises:
+        FileNotFoundError: If no event files are found.
+        ValueError: If there are no events in the files.
+
+    Returns:
+        EventStatistics: Statistics of the collection.
+    """
+    event_files = find_event_files(meta_file)
+    if not event_files:
+        raise FileNotFoundError(f"No event files found for {meta_file}.")
+    if max_workers is None:
+        max_workers = min(len(event_files), os.cpu_count() or 1)
+
+    width = max(round(rate_bin_width * clock_freq), 1)
+    if max_workers <= 1 or len(event_files) <= 1:
+        modules = [module_statistics(f, width, block_size) for f in event_files]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(module_statistics, f, width, block_size)
+                for f in event_files
+            ]
+            modules = [fut.result() for fut in futures]
+    if save_index and load_timestamp_index(meta_file) is None:
+        _try_save({m.event_file: m.index for m in modules}, meta_file)
+
+    scanned = [m for m in modules if m.num_events]
+    if not scanned:
+        raise ValueError("No events found in the event files.")
+    start = min(m.rate_start for m in scanned)
+    stop = max(m.rate_start + len(m.counts) for m in scanned)
+    counts = np.zeros(stop - start, dtype=np.uint64)
+    for m in scanned:
+        counts[m.rate_start - start : m.rate_start - start + len(m.counts)] += m.counts
+    rate_edges = width * np.arange(start, stop + 1, dtype=np.float64)
+    stats = EventStatistics(modules, rate_edges, counts)
+    logger.info(
+        f"{stats.total_events} events in {len(modules)} modules over {stats.time_span} s, "
+        f"mean count rate {stats.mean_count_rate:.0f} events/s."
+    )
+    return stats
+
+
+def write_event_statistics(
+    nxsfile: h5py.File, stats: EventStatistics, loc: str = EVENT_STATISTICS_LOC
+):
+    """Write the statistics of the events as a NXcollection in a NeXus file.
+
+    Times are written in s from the detector timestamp zero. An existing group at the same \
+    location is replaced.
+
+    Args:
+        nxsfile (h5py.File): NeXus file handle.
+        stats (EventStatistics): Statistics of the collection.
+        loc (str, optional): Location of the NXcollection group. Defaults to \
+            /entry/instrument/detector/event_statistics.
+    """
+    if loc in nxsfile:
+        del nxsfile[loc]
+    grp = nxsfile.create_group(loc)
+    create_attributes(grp, ("NX_class",), ("NXcollection",))
+
+    def _write(name, data, units=None):
+        dset = grp.create_dataset(name, data=data)
+        if units:
+            create_attributes(dset, ("units",), (units,))
+
+    t_first, t_last = stats.time_range
+    _write("event_files", np.array([np.bytes_(m.event_file) for m in stats.modules]))
+    _write("events_per_module", stats.events_per_module)
+    _write("total_events", stats.total_events)
+    _write("first_event_time", t_first / clock_freq, "s")
+    _write("last_event_time", t_last / clock_freq, "s")
+    _write("time_span", stats.time_span, "s")
+    if stats.shutter_open is not None:
+        _write("shutter_open_time", stats.shutter_open / clock_freq, "s")
+    if stats.shutter_close is not None:
+        _write("shutter_close_time", stats.shutter_close / clock_freq, "s")
+    _write("collection_time", stats.collection_time, "s")
+    _write("mean_count_rate", stats.mean_count_rate, "Hz")
+    _write("count_rate_time", stats.rate_edges[:-1] / clock_freq, "s")
+    _write("count_rate", stats.count_rate, "Hz")
+    logger.debug(f"Event statistics written in {loc}.")
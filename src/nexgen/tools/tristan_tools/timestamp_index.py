@@ -0,0 +1,311 @@
+"""
+Index of the event timestamps in the files written by a Tristan detector.
+
+For each module file, the earliest and latest event_timestamp_zero of every HDF5 chunk are \
+recorded, so that time window queries only need to read the chunks overlapping the window \
+instead of scanning all the events. The index is saved to a small HDF5 sidecar file next to \
+the meta file, or to a group in the meta file itself.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from .events import EVENT_ID, EVENT_TIME, find_event_files, iter_event_chunks
+
+logger = logging.getLogger("nexgen.tools.TristanTimestampIndex")
+logger.setLevel(logging.DEBUG)
+
+__all__ = [
+    "ChunkTimeIndex",
+    "build_module_index",
+    "build_timestamp_index",
+    "index_time_range",
+    "iter_events_in_range",
+    "save_timestamp_index",
+    "load_timestamp_index",
+    "get_timestamp_index",
+]
+
+INDEX_GROUP = "timestamp_index"
+
+
+@dataclass
+class ChunkTimeIndex:
+    """Time range of the events in each chunk of a module file.
+
+    Args:
+        event_file (str): Name of the module file.
+        chunk_size (int): Number of events per chunk.
+        num_events (int): Total number of events in the file.
+        t_min (np.ndarray): Earliest timestamp in each chunk, in clock ticks.
+        t_max (np.ndarray): Latest timestamp in each chunk, in clock ticks.
+    """
+
+    event_file: str
+    chunk_size: int
+    num_events: int
+    t_min: np.ndarray
+    t_max: np.ndarray
+
+    @property
+    def time_range(self) -> tuple[int, int] | None:
+        """Earliest and latest event timestamps in the file, None if there are no events."""
+        if self.num_events == 0:
+            return None
+        return int(self.t_min.min()), int(self.t_max.max())
+
+    def chunks_in_range(self, t_start: float, t_end: float) -> np.ndarray:
+        """Indices of the chunks with events in [t_start, t_end)."""
+        return np.flatnonzero((self.t_max >= t_start) & (self.t_min < t_end))
+
+    def event_ranges(self, t_start: float, t_end: float) -> list[tuple[int, int]]:
+        """Ranges of events to read to find all those in [t_start, t_end), with \
+        consecutive chunks merged.
+
+        Returns:
+            list[tuple[int, int]]: (start, stop) event indices.
+        """
+        ranges = []
+        for c in self.chunks_in_range(t_start, t_end):
+            start = int(c) * self.chunk_size
+            stop = min(start + self.chunk_size, self.num_events)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], stop)
+            else:
+                ranges.append((start, stop))
+        return ranges
+
+
+def build_module_index(
+    event_file: Path | str, chunk_size: int | None = None
+) -> ChunkTimeIndex:
+    """Record the time range of the events in each chunk of a module file.
+
+    The timestamps are read one HDF5 chunk at a time into a reused buffer, so each \
+    compressed chunk is only decompressed once.
+
+    Args:
+        event_file (Path | str): Module event file.
+        chunk_size (int | None, optional): Number of events per indexed chunk. Defaults to \
+            None, for the HDF5 chunk size.
+
+    Returns:
+        ChunkTimeIndex: The index of the file.
+    """
+    event_file = Path(event_file)
+    with h5py.File(event_file, "r") as fh:
+        dset = fh[EVENT_TIME]
+        num_events = len(dset)
+        if chunk_size is None:
+            chunk_size = dset.chunks[0] if dset.chunks else 1 << 20
+        num_chunks = -(-num_events // chunk_size)
+        t_min = np.zeros(num_chunks, dtype=np.uint64)
+        t_max = np.zeros(num_chunks, dtype=np.uint64)
+        buf = np.empty(min(chunk_size, num_events), dtype=dset.dtype)
+        for c in range(num_chunks):
+            start = c * chunk_size
+            n = min(chunk_size, num_events - start)
+            dset.read_direct(buf, np.s_[start : start + n], np.s_[:n])
+            t_min[c] = buf[:n].min()
+            t_max[c] = buf[:n].max()
+    return ChunkTimeIndex(event_file.name, chunk_size, num_events, t_min, t_max)
+
+
+def build_timestamp_index(
+    event_files: list[Path | str], max_workers: int | None = None
+) -> dict[str, ChunkTimeIndex]:
+    """Index the timestamps of all the module files, in parallel.
+
+    Args:
+        event_files (list[Path | str]): Module event files.
+        max_workers (int | None, optional): Number of files indexed in parallel, each in \
+            its own process. If 1, everything runs in this process. Defaults to None, for \
+            as many as there are files, up to the number of CPUs.
+
+    Returns:
+        dict[str, ChunkTimeIndex]: Index of each file, by file name.
+    """
+    if max_workers is None:
+        max_workers = min(len(event_files), os.cpu_count() or 1)
+    if max_workers <= 1 or len(event_files) <= 1:
+        indexes = [build_module_index(f) for f in event_files]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            indexes = list(pool.map(build_module_index, event_files))
+    logger.debug(f"Timestamps of {len(indexes)} event files indexed.")
+    return {idx.event_file: idx for idx in indexes}
+
+
+def index_time_range(indexes: dict[str, ChunkTimeIndex]) -> tuple[int, int]:
+    """Earliest and latest event timestamps of a collection, from its index.
+
+    Raises:
+        ValueError: If there are no events in any of the files.
+    """
+    ranges = [r for idx in indexes.values() if (r := idx.time_range) is not None]
+    if not ranges:
+        raise ValueError("No events found in the event files.")
+    return min(r[0] for r in ranges), max(r[1] for r in ranges)
+
+
+def iter_events_in_range(
+    event_file: Path | str,
+    t_start: float,
+    t_end: float,
+    index: ChunkTimeIndex | None = None,
+    datasets: tuple[str, ...] = (EVENT_ID, EVENT_TIME),
+    block_size: int | None = None,
+) -> Iterator[tuple[int, list[np.ndarray]]]:
+    """Read the event datasets of a module file, only from the chunks with events in \
+    [t_start, t_end).
+
+    The blocks returned may still hold events outside of the time range, which should be \
+    filtered out by the caller.
+
+    Args:
+        event_file (Path | str): Module event file.
+        t_start (float): Start time, in clock ticks.
+        t_end (float): End time, in clock ticks.
+        index (ChunkTimeIndex | None, optional): Timestamp index of the file. Defaults to \
+            None, to read all the events.
+        datasets (tuple[str, ...], optional): Datasets to read. Defaults to event_id and \
+            event_timestamp_zero.
+        block_size (int | None, optional): Number of events per block. Defaults to None, \
+            for the HDF5 chunk size.
+
+    Yields:
+        tuple[int, list[np.ndarray]]: Index of the first event in the block and the values \
+            read from each dataset.
+    """
+    ranges = [(0, None)] if index is None else index.event_ranges(t_start, t_end)
+    with h5py.File(event_file, "r") as fh:
+        for start, stop in ranges:
+            yield from iter_event_chunks(fh, datasets, start, stop, block_size)
+
+
+def _sidecar(meta_file: Path) -> Path:
+    return meta_file.parent / meta_file.name.replace("_meta.h5", "_ts_index.h5")
+
+
+def save_timestamp_index(
+    indexes: dict[str, ChunkTimeIndex],
+    meta_file: Path | str,
+    in_meta_file: bool = False,
+) -> Path:
+    """Save the index of a collection to a sidecar file, eg. file_ts_index.h5 for \
+    file_meta.h5, or to the timestamp_index group of the meta file.
+
+    Args:
+        indexes (dict[str, ChunkTimeIndex]): Index of each module file.
+        meta_file (Path | str): The _meta.h5 file of the collection.
+        in_meta_file (bool, optional): Write to the meta file instead of a sidecar. \
+            Defaults to False.
+
+    Returns:
+        Path: The file the index was written to.
+    """
+    meta_file = Path(meta_file).expanduser().resolve()
+    filename = meta_file if in_meta_file else _sidecar(meta_file)
+    with h5py.File(filename, "a" if in_meta_file else "w") as fh:
+        if INDEX_GROUP in fh:
+            del fh[INDEX_GROUP]
+        grp = fh.create_group(INDEX_GROUP)
+        for name, idx in indexes.items():
+            g = grp.create_group(name)
+            g.attrs["chunk_size"] = idx.chunk_size
+            g.attrs["num_events"] = idx.num_events
+            g.create_dataset("t_min", data=idx.t_min)
+            g.create_dataset("t_max", data=idx.t_max)
+    logger.info(f"Timestamp index saved to {filename}.")
+    return filename
+
+
+def load_timestamp_index(meta_file: Path | str) -> dict[str, ChunkTimeIndex] | None:
+    """Load the index of a collection from its sidecar file, or from the meta file.
+
+    An index is only returned if it covers all the module files, with the number of events \
+    they currently hold.
+
+    Args:
+        meta_file (Path | str): The _meta.h5 file of the collection.
+
+    Returns:
+        dict[str, ChunkTimeIndex] | None: Index of each module file, or None if not found \
+            or out of date.
+    """
+    meta_file = Path(meta_file).expanduser().resolve()
+    event_files = find_event_files(meta_file)
+    for filename in (_sidecar(meta_file), meta_file):
+        if not filename.exists():
+            continue
+        with h5py.File(filename, "r") as fh:
+            if INDEX_GROUP not in fh:
+                continue
+            grp = fh[INDEX_GROUP]
+            indexes = {
+                name: ChunkTimeIndex(
+                    name,
+                    int(g.attrs["chunk_size"]),
+                    int(g.attrs["num_events"]),
+                    g["t_min"][()],
+                    g["t_max"][()],
+                )
+                for name, g in grp.items()
+            }
+        if _is_up_to_date(indexes, event_files):
+            return indexes
+        logger.warning(f"Timestamp index in {filename} is out of date.")
+    return None
+
+
+def _is_up_to_date(indexes: dict[str, ChunkTimeIndex], event_files: list[Path]) -> bool:
+    if set(indexes.keys()) != {f.name for f in event_files}:
+        return False
+    for f in event_files:
+        with h5py.File(f, "r") as fh:
+            if len(fh[EVENT_TIME]) != indexes[f.name].num_events:
+                return False
+    return True
+
+
+def get_timestamp_index(
+    meta_file: Path | str,
+    max_workers: int | None = None,
+    save: bool = True,
+) -> dict[str, ChunkTimeIndex]:
+    """Load the timestamp index of a collection, building it if it's missing or out of date.
+
+    Args:
+        meta_file (Path | str): The _meta.h5 file of the collection.
+        max_workers (int | None, optional): Number of files indexed in parallel. Defaults \
+            to None.
+        save (bool, optional): Save a newly built index to the sidecar file. If it can't \
+            be written, eg. in a read-only directory, the index is only kept in memory. \
+            Defaults to True.
+
+    Returns:
+        dict[str, ChunkTimeIndex]: Index of each module file, by file name.
+    """
+    indexes = load_timestamp_index(meta_file)
+    if indexes is None:
+        indexes = build_timestamp_index(find_event_files(meta_file), max_workers)
+        if save:
+            _try_save(indexes, meta_file)
+    return indexes
+
+
+def _try_save(indexes: dict[str, ChunkTimeIndex], meta_file: Path | str):
+    """Save the index to the sidecar file, only logging a warning if it can't be written."""
+    try:
+        save_timestamp_index(indexes, meta_file)
+    except OSError as e:
+        logger.warning(f"Unable to save the timestamp index of {meta_file}: {e}")
@@ -17,6 +17,8 @@ from pydantic.dataclasses import dataclass
 
 from nexgen.tools.vds_tools import find_datasets_in_file
 
+from ..h5_profiles import H5Profile, open_with_profile
+from ..timings import timed
 from ..utils import MAX_FRAMES_PER_DATASET
 from .constants import jungfrau_fill_value, jungfrau_gap_size, jungfrau_mod_size
 
@@ -178,6 +180,7 @@ def create_virtual_layout(datasets: list[Dataset], data_type: DTypeLike):
     return layout
 
 
+@timed
 def image_vds_writer(
     nxsfile: h5py.File,
     full_data_shape: tuple | list,
@@ -231,6 +234,7 @@ def image_vds_writer(
     vds_logger.debug("VDS correctly written to NeXus file.")
 
 
+@timed
 def jungfrau_vds_writer(
     nxsfile: h5py.File,
     vds_shape: tuple | list,
@@ -265,12 +269,14 @@ def jungfrau_vds_writer(
     nxdata.create_virtual_dataset(entry_key, layout, fillvalue=jungfrau_fill_value)
 
 
+@timed
 def vds_file_writer(
     nxsfile: h5py.File,
     datafiles: list[Path],
     data_shape: tuple | list,
     data_type: DTypeLike = np.uint16,
     entry_key: str = "data",
+    h5_profile: H5Profile | str | None = None,
 ):
     """
     Write a Virtual DataSet _vds.h5 file for image data.
@@ -281,6 +287,8 @@ def vds_file_writer(
         data_shape (tuple | list): Shape of the dataset, usually defined as (num_frames, *image_size).
         data_type (DTypeLike, optional): Dtype. Defaults to np.uint16.
         entry_key (str): Entry key for the Virtual DataSet name. Defaults to data.
+        h5_profile (H5Profile | str | None, optional): HDF5 property profile to apply to \
+            the _vds.h5 file. Defaults to None.
     """
     vds_logger.debug("Start creating VDS file ...")
     # Where the vds will go
@@ -307,12 +315,13 @@ def vds_file_writer(
     s = Path(nxsfile.filename).expanduser().resolve()
     vds_filename = s.parent / f"{s.stem}_vds.h5"
     del s
-    with h5py.File(vds_filename, "w") as vds:
+    with open_with_profile(vds_filename, "w", h5_profile) as vds:
         vds.create_virtual_dataset("data", layout, fillvalue=-1)
     nxdata["data"] = h5py.ExternalLink(vds_filename.name, "data")
     vds_logger.debug(f"{vds_filename} written and link added to NeXus file.")
 
 
+@timed
 def clean_unused_links(
     nxsfile: h5py.File,
     vds_shape: tuple | list,
@@ -7,20 +7,24 @@ from __future__ import annotations
 import logging
 import re
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import NamedTuple
+from typing import TYPE_CHECKING, Any, NamedTuple
 
-import h5py
 import numpy as np
-import pint
 from numpy.typing import ArrayLike
 
+if TYPE_CHECKING:
+    import h5py
+    import pint
+
 __all__ = [
     "get_filename_template",
     "get_nexus_filename",
     "walk_nxs",
     "units_of_length",
     "units_of_time",
+    "get_unit_registry",
     "get_iso_timestamp",
     "create_directory",
 ]
@@ -147,27 +151,47 @@ def walk_nxs(nxs_obj: h5py.File | h5py.Group) -> list[str]:
     return obj_list
 
 
-# Initialize registry and a Quantity constructor
-ureg = pint.UnitRegistry()
-Q_ = ureg.Quantity
+@lru_cache(maxsize=1)
+def get_unit_registry() -> pint.UnitRegistry:
+    """Get the unit registry, initializing it on first use.
 
+    Building the registry takes a sizeable fraction of a second, so it's deferred until a \
+    quantity actually needs to be parsed instead of being done at import time.
 
-def units_of_length(q: str | float, to_base: bool = False) -> Q_:  # -> pint.Quantity:
+    Returns:
+        pint.UnitRegistry: The unit registry shared by all of nexgen.
     """
-    Check that a quantity of length is compatible with NX_LENGTH, defaulting to m if dimensionless.
+    import pint
 
-    Args:
-        q (Any): An object that can be interpreted as a pint Quantity, it can be dimensionless.
-        to_base (bool, optional): If True, convert to base units of length (m). Defaults to False.
+    return pint.UnitRegistry()
 
-    Raises:
-        ValueError: If the input value is a negative number.
-        pint.errors.DimensionalityError: If the input value is not a quantity of lenght.
 
-    Returns:
-        quantity (pint.Quantity): A pint quantity with units applied if it was dimensionless.
-    """
-    quantity = Q_(q)
+def __getattr__(name: str):
+    # Lazy access to the registry and Quantity constructor, eg. `from nexgen.utils import ureg`
+    if name == "ureg":
+        return get_unit_registry()
+    if name == "Q_":
+        return get_unit_registry().Quantity
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Size of the cache of parsed quantity strings
+UNITS_CACHE_SIZE = 256
+
+
+def _is_plain_number(q: Any) -> bool:
+    return isinstance(q, (int, float)) and not isinstance(q, bool)
+
+
+@lru_cache(maxsize=None)
+def _get_unit(name: str) -> pint.Unit:
+    return get_unit_registry().Unit(name)
+
+
+def _parse_length(q: Any, to_base: bool = False) -> pint.Quantity:
+    """Full pint conversion for units_of_length."""
+    ureg = get_unit_registry()
+    quantity = ureg.Quantity(q)
     if quantity <= 0:
         raise ValueError(
             f"Quantity (length) must be positive. Current value: {quantity}."
@@ -179,16 +203,78 @@ def units_of_length(q: str | float, to_base: bool = False) -> Q_:  # -> pint.Qua
         else:
             return quantity
     else:
-        raise pint.errors.DimensionalityError(
+        from pint.errors import DimensionalityError
+
+        raise DimensionalityError(
             quantity, "a quantity of", quantity.dimensionality, ureg.mm.dimensionality
         )
 
 
-def units_of_time(q: str) -> Q_:  # -> pint.Quantity:
+def _parse_time(q: Any) -> pint.Quantity:
+    """Full pint conversion for units_of_time."""
+    ureg = get_unit_registry()
+    quantity = ureg.Quantity(q)
+    if quantity <= 0:
+        raise ValueError(
+            f"Quantity (time) of time must be positive. Current value: {quantity}."
+        )
+    quantity = quantity * ureg.s if quantity.dimensionless else quantity
+    if quantity.check("[time]"):
+        return quantity.to_base_units()
+    else:
+        from pint.errors import DimensionalityError
+
+        raise DimensionalityError(
+            quantity, "a quantity of", quantity.dimensionality, ureg.s.dimensionality
+        )
+
+
+# Only the (magnitude, units) pairs are cached, as pint quantities can be modified in place
+@lru_cache(maxsize=UNITS_CACHE_SIZE)
+def _cached_length(q: str, to_base: bool) -> tuple[Any, pint.Unit]:
+    quantity = _parse_length(q, to_base)
+    return quantity.magnitude, quantity.units
+
+
+@lru_cache(maxsize=UNITS_CACHE_SIZE)
+def _cached_time(q: str) -> tuple[Any, pint.Unit]:
+    quantity = _parse_time(q)
+    return quantity.magnitude, quantity.units
+
+
+def units_of_length(q: str | float, to_base: bool = False) -> pint.Quantity:
+    """
+    Check that a quantity of length is compatible with NX_LENGTH, defaulting to m if dimensionless.
+
+    Positive plain numbers skip the parsing entirely, and strings are only parsed by pint the \
+    first time they're seen.
+
+    Args:
+        q (Any): An object that can be interpreted as a pint Quantity, it can be dimensionless.
+        to_base (bool, optional): If True, convert to base units of length (m). Defaults to False.
+
+    Raises:
+        ValueError: If the input value is a negative number.
+        pint.errors.DimensionalityError: If the input value is not a quantity of lenght.
+
+    Returns:
+        quantity (pint.Quantity): A pint quantity with units applied if it was dimensionless.
+    """
+    if _is_plain_number(q) and q > 0:
+        return get_unit_registry().Quantity(q, _get_unit("m"))
+    if isinstance(q, str):
+        return get_unit_registry().Quantity(*_cached_length(q, to_base))
+    return _parse_length(q, to_base)
+
+
+def units_of_time(q: str) -> pint.Quantity:
     """
     Check that a quantity of time is compatible with NX_TIME, defaulting to s if dimensionless.
     Convert to seconds if time is passed as a fraction of it.
 
+    Positive plain numbers skip the parsing entirely, and strings are only parsed by pint the \
+    first time they're seen.
+
     Args:
         q (str): A string that can be interpreted as a pint Quantity, it can be dimensionless.
 
@@ -199,18 +285,11 @@ def units_of_time(q: str) -> Q_:  # -> pint.Quantity:
     Returns:
         quantity (pint.Quantity): A pint quantity in s, with units applied if it was dimensionless.
     """
-    quantity = Q_(q)
-    if quantity <= 0:
-        raise ValueError(
-            f"Quantity (time) of time must be positive. Current value: {quantity}."
-        )
-    quantity = quantity * ureg.s if quantity.dimensionless else quantity
-    if quantity.check("[time]"):
-        return quantity.to_base_units()
-    else:
-        raise pint.errors.DimensionalityError(
-            quantity, "a quantity of", quantity.dimensionality, ureg.s.dimensionality
-        )
+    if _is_plain_number(q) and q > 0:
+        return get_unit_registry().Quantity(q, _get_unit("s"))
+    if isinstance(q, str):
+        return get_unit_registry().Quantity(*_cached_time(q))
+    return _parse_time(q)
 
 
 def _validate_timestamp_string(ts: str, fmt: str) -> bool:
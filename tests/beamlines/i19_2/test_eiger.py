@@ -0,0 +1,42 @@
+from copy import deepcopy
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from nexgen.beamlines.i19_2.constants import I19_2_EIGER
+from nexgen.beamlines.i19_2.eiger import _get_info_from_metafile
+from nexgen.beamlines.i19_2.parameters import CollectionParams
+from nexgen.nxs_utils.detector import EigerStreamFormat
+
+
+def test_get_info_from_stream2_metafile(
+    dummy_eiger_collection_params: CollectionParams, tmp_path: Path
+):
+    metafile = tmp_path / "somefile_meta.h5"
+    with h5py.File(metafile, "w") as fh:
+        fh["_dectris/number_of_images"] = 100
+        fh["_dectris/number_of_triggers"] = 1
+        fh["_dectris/image_dtype"] = "uint32"
+        fh["_dectris/detector_translation"] = [0.0, 0.0, 0.25]
+        fh["_dectris/goniometer/phi/start"] = 5.0
+        fh["_dectris/goniometer/phi/increment"] = 0.2
+        fh["_dectris/goniometer/two_theta/start"] = 30.0
+    params = dummy_eiger_collection_params.model_copy(
+        update={"metafile": metafile, "scan_axis": "phi"}
+    )
+    gonio_axes = deepcopy(I19_2_EIGER.gonio)
+    det_axes = deepcopy(I19_2_EIGER.det_axes)
+
+    vds_dtype, n_frames = _get_info_from_metafile(
+        params, gonio_axes, det_axes, None, EigerStreamFormat.CBOR
+    )
+
+    assert vds_dtype == np.uint32
+    assert n_frames == 100 and params.tot_num_images == 100
+    phi = [ax for ax in gonio_axes if ax.name == "phi"][0]
+    assert phi.start_pos == 5.0 and phi.increment == 0.2 and phi.num_steps == 100
+    assert det_axes[0].start_pos == 30.0
+    assert det_axes[1].start_pos == 250.0
+    # Passed by the user, not overwritten
+    assert params.wavelength == 0.4 and params.beam_center == (100, 200)
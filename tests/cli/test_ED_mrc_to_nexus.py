@@ -0,0 +1,154 @@
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import h5py
+import mrcfile
+import numpy as np
+import pytest
+
+from nexgen.command_line.ED_mrc_to_nexus import (
+    batch_convert,
+    find_mrc_series,
+    main,
+    parse_input_arguments,
+)
+
+metadata_args = [
+    "--detector",
+    "unknown",
+    "--detector-name",
+    "test",
+    "--facility-name",
+    "test",
+    "--facility-id",
+    "test",
+    "--facility-short-name",
+    "test",
+    "--detector-distance",
+    "100",
+    "--wavelength",
+    "0.02",
+    "--angle-start",
+    "0",
+    "--angle-increment",
+    "1",
+    "--exposure-time",
+    "0.1",
+    "--beam-center",
+    "4",
+    "4",
+    "--pixel-size",
+    "0.014",
+    "--sensor-thickness",
+    "0.1",
+    "--detector-type",
+    "CMOS",
+    "--overload",
+    "1000",
+    "--underload",
+    "-1",
+]
+
+
+def make_mrc(filename: Path, data: np.ndarray):
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    with mrcfile.new(filename) as mrc:
+        mrc.set_data(data)
+
+
+@pytest.fixture
+def mrc_session(tmp_path: Path) -> Path:
+    """A directory with a series of 3 single images and another with a stack of 4."""
+    for i in range(3):
+        make_mrc(
+            tmp_path / "series" / f"tilt_{i + 1:05d}.mrc",
+            np.full((8, 8), i, dtype=np.int16),
+        )
+    make_mrc(tmp_path / "stack" / "stack.mrc", np.ones((4, 8, 8), dtype=np.int16))
+    return tmp_path
+
+
+def parse_args(*inputs) -> object:
+    with patch.object(sys, "argv", ["ED_mrc_to_nexus", *metadata_args, *inputs]):
+        return parse_input_arguments()
+
+
+def test_find_mrc_series(tmp_path):
+    for name in ["a/tilt_00002.mrc", "a/tilt_00001.mrc", "a/other.mrc", "b/tilt_1.mrc"]:
+        make_mrc(tmp_path / name, np.zeros((2, 2), dtype=np.int16))
+    series = find_mrc_series([str(tmp_path / "a"), str(tmp_path / "b/tilt_1.mrc")])
+    assert series == {
+        "a_tilt": [
+            str(tmp_path / "a/tilt_00001.mrc"),
+            str(tmp_path / "a/tilt_00002.mrc"),
+        ],
+        "other": [str(tmp_path / "a/other.mrc")],
+        "b_tilt": [str(tmp_path / "b/tilt_1.mrc")],
+    }
+
+
+def test_find_mrc_series_with_same_directory_names(tmp_path):
+    for name in ["a/x/s_00001.mrc", "b/x/s_00001.mrc", "x_s_00001.mrc"]:
+        make_mrc(tmp_path / name, np.zeros((2, 2), dtype=np.int16))
+    series = find_mrc_series(
+        [str(tmp_path / "a/x"), str(tmp_path / "b/x"), str(tmp_path)]
+    )
+    assert series == {
+        "a_x_s": [str(tmp_path / "a/x/s_00001.mrc")],
+        "b_x_s": [str(tmp_path / "b/x/s_00001.mrc")],
+        "x_s": [str(tmp_path / "x_s_00001.mrc")],
+    }
+
+
+def test_find_mrc_series_fails_on_duplicate_names(tmp_path):
+    for name in ["x/s_00001.mrc", "x_s_00001.mrc", "y/s_00001.mrc"]:
+        make_mrc(tmp_path / name, np.zeros((2, 2), dtype=np.int16))
+    with pytest.raises(ValueError):
+        find_mrc_series([str(tmp_path / "x"), str(tmp_path / "y"), str(tmp_path)])
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_batch_convert(mrc_session, max_workers):
+    inputs = [str(mrc_session / "series"), str(mrc_session / "stack/stack.mrc")]
+    out = mrc_session / "out"
+    results = batch_convert(inputs, parse_args(*inputs), out, max_workers)
+
+    assert [r["series"] for r in results] == ["tilt", "stack"]
+    assert [r["num_images"] for r in results] == [3, 4]
+    assert all(r["error"] is None for r in results)
+    assert results[0]["nexus_file"] == str(out / "tilt" / "tilt.nxs")
+    with h5py.File(out / "tilt" / "tilt.h5", "r") as fh:
+        np.testing.assert_array_equal(fh["/entry/data/data"][:, 0, 0], [0, 1, 2])
+    with h5py.File(out / "stack" / "stack.nxs", "r") as fh:
+        assert fh["/entry/data/data"].shape == (4, 8, 8)
+
+
+def test_batch_convert_without_fork(mrc_session, monkeypatch):
+    monkeypatch.setattr(
+        "nexgen.command_line.ED_mrc_to_nexus.get_all_start_methods",
+        lambda: ["spawn"],
+    )
+    inputs = [str(mrc_session / "series"), str(mrc_session / "stack")]
+    results = batch_convert(inputs, parse_args(*inputs), mrc_session / "out", 2)
+    assert all(r["error"] is None for r in results)
+    assert (mrc_session / "out" / "stack" / "stack.nxs").exists()
+
+
+def test_batch_convert_reports_failed_series(mrc_session, caplog):
+    make_mrc(mrc_session / "bad" / "bad.mrc", np.zeros((2, 2, 2, 2), dtype=np.int16))
+    inputs = [str(mrc_session / "stack"), str(mrc_session / "bad")]
+    results = batch_convert(inputs, parse_args(*inputs), mrc_session / "out", 1)
+
+    assert results[0]["error"] is None
+    assert results[1]["error"] is not None
+    assert "1/2 series, 4 images" in caplog.text
+
+
+def test_main_creates_output_dir(mrc_session):
+    out = mrc_session / "new" / "out"
+    inputs = ["--output-dir", str(out), str(mrc_session / "stack/stack.mrc")]
+    with patch.object(sys, "argv", ["ED_mrc_to_nexus", *metadata_args, *inputs]):
+        main()
+    with h5py.File(out / "stack.nxs", "r") as fh:
+        assert fh["/entry/data/data"].shape == (4, 8, 8)
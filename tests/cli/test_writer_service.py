@@ -0,0 +1,135 @@
+import threading
+from pathlib import Path
+
+import h5py
+import pytest
+
+from nexgen.command_line.writer_service import (
+    JOB_TYPES,
+    WriterService,
+    WriterServiceClient,
+    _Metrics,
+    _run_job,
+)
+
+
+def write_dummy(payload: dict):
+    with h5py.File(payload["master_file"], "x") as fh:
+        fh.create_dataset("num_imgs", data=payload["num_imgs"])
+
+
+def fail_write(payload: dict):
+    raise ValueError("Missing parameters.")
+
+
+@pytest.fixture
+def service():
+    service = WriterService(
+        port=0,
+        num_workers=1,
+        job_types={"dummy": write_dummy, "fail": fail_write},
+    )
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    yield service
+    service.shutdown()
+    thread.join()
+
+
+@pytest.fixture
+def default_service():
+    service = WriterService(port=0, num_workers=1)
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    yield service
+    service.shutdown()
+    thread.join()
+
+
+@pytest.fixture
+def client(service):
+    host, port = service.address
+    return WriterServiceClient(host, port, timeout=60)
+
+
+def test_default_job_types():
+    assert list(JOB_TYPES.keys()) == ["i19_2", "i19_2_eiger", "ssx"]
+
+
+def test_run_job_reports_timing(tmp_path: Path):
+    timing = _run_job(
+        write_dummy, {"master_file": tmp_path / "test.nxs", "num_imgs": 10}, 0.0
+    )
+    assert (tmp_path / "test.nxs").exists()
+    assert timing["queue_latency_s"] > 0
+    assert timing["write_time_s"] >= 0
+
+
+def test_writer_service_writes_file(client, tmp_path: Path):
+    filename = tmp_path / "test.nxs"
+    res = client.write("dummy", {"master_file": filename, "num_imgs": 5})
+
+    assert res["status"] == "done"
+    assert res["queue_latency_s"] >= 0
+    assert res["write_time_s"] >= 0
+    with h5py.File(filename) as fh:
+        assert fh["num_imgs"][()] == 5
+
+
+def test_writer_service_metrics(client, tmp_path: Path):
+    for n in range(2):
+        client.write(
+            "dummy", {"master_file": tmp_path / f"test_{n}.nxs", "num_imgs": n}
+        )
+    with pytest.raises(RuntimeError, match="Missing parameters"):
+        client.write("fail", {})
+
+    metrics = client.metrics()
+    assert metrics["jobs"] == 3
+    assert metrics["failed"] == 1
+    assert metrics["pending"] == 0
+    assert metrics["write_time_max_s"] >= metrics["write_time_mean_s"]
+    assert metrics["queue_latency_mean_s"] is not None
+
+
+def test_metrics_running_aggregates():
+    metrics = _Metrics()
+    for n in range(1000):
+        metrics.start()
+        metrics.finish({"queue_latency_s": 0.001, "write_time_s": float(n % 10)})
+    summary = metrics.summary()
+    assert summary["jobs"] == 1000
+    assert summary["write_time_mean_s"] == pytest.approx(4.5)
+    assert summary["write_time_max_s"] == 9.0
+    assert summary["queue_latency_mean_s"] == pytest.approx(0.001)
+
+
+def test_writer_service_unknown_job_type(client):
+    with pytest.raises(RuntimeError, match="Unknown job type"):
+        client.write("i24", {})
+
+
+def test_writer_service_runs_ssx_job(default_service, tmp_path: Path):
+    host, port = default_service.address
+    client = WriterServiceClient(host, port, timeout=120)
+    payload = {
+        "visitpath": tmp_path,
+        "filename": "test_ssx",
+        "beamline": "i24",
+        "num_imgs": 10,
+        "expt_type": "extruder",
+        "exp_time": 0.002,
+        "det_dist": 500.0,
+        "beam_center": [1590.7, 1643.7],
+        "transmission": 1.0,
+        "wavelength": 0.649,
+        "start_time": "2024-01-01T10:00:00",
+        "stop_time": "2024-01-01T10:01:00",
+    }
+    res = client.write("ssx", payload)
+
+    assert res["status"] == "done"
+    with h5py.File(tmp_path / "test_ssx.nxs", "r") as fh:
+        assert fh["/entry/definition"][()] == b"NXmx"
+        assert fh["/entry/start_time"][()] == b"2024-01-01T10:00:00Z"
+    assert client.metrics()["jobs"] == 1
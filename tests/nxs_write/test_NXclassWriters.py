@@ -2,6 +2,7 @@ from datetime import datetime
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import h5py
 import numpy as np
 import pytest
 from numpy.testing import assert_array_equal
@@ -67,6 +68,15 @@ def test_write_NXSource_with_probe(dummy_nexus_file, mock_source):
     assert dummy_nexus_file["/entry/source/probe"][()] == b"electron"
 
 
+def test_write_NXSource_with_compact_layout(dummy_nexus_file, mock_source):
+    write_NXsource(dummy_nexus_file, mock_source, compact=True)
+
+    nxsource = dummy_nexus_file["/entry/source"]
+    assert nxsource["type"][()] == b"Synchrotron X-ray Source"
+    assert nxsource["name"].attrs["short_name"] == b"DLS"
+    assert nxsource["name"].id.get_create_plist().get_layout() == h5py.h5d.COMPACT
+
+
 def test_write_NXtransformations_for_detector_axes(dummy_nexus_file):
     det_axes = [
         Axis("two_theta", ".", "rotation", (0, 0, -1), start_pos=90),
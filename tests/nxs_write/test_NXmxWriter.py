@@ -1,9 +1,19 @@
+import json
+import subprocess
+import sys
 from datetime import datetime
 from unittest.mock import patch
 
+import h5py
 import numpy as np
+import pytest
 
 from nexgen.nxs_utils import Axis, Goniometer, TransformationType
+from nexgen.nxs_write.nxmx_writer import (
+    FRAME_METADATA_LOC,
+    NXmxFileWriter,
+    SWMRNXmxFileWriter,
+)
 
 fake_gonio = Goniometer(
     [Axis("omega", ".", TransformationType.ROTATION, (0, 0, -1), 0.0)],
@@ -59,3 +69,202 @@ def test_NXmxFileWriter_write_vds(mock_vds_writer, dummy_NXmxWriter):
     dummy_NXmxWriter.detector.detector_params.image_size = (100, 100)
     dummy_NXmxWriter.write_vds()
     mock_vds_writer.assert_called_once()
+
+
+def test_NXmxFileWriter_write_in_memory(
+    tmp_path, mock_goniometer, mock_eiger, mock_source, mock_beam, mock_attenuator
+):
+    filename = tmp_path / "test_in_memory.nxs"
+    writer = NXmxFileWriter(
+        filename,
+        mock_goniometer,
+        mock_eiger,
+        mock_source,
+        mock_beam,
+        mock_attenuator,
+        90,
+    )
+    writer.write(in_memory=True)
+
+    assert list(tmp_path.iterdir()) == [filename]
+    with h5py.File(filename, "r") as nxs:
+        assert nxs["/entry/definition"][()] == b"NXmx"
+        assert "data_000001" in nxs["/entry/data"].keys()
+        assert "module" in nxs["/entry/instrument/detector"].keys()
+
+
+def test_NXmxFileWriter_applies_h5_profile(
+    tmp_path, mock_goniometer, mock_eiger, mock_source, mock_beam, mock_attenuator
+):
+    filename = tmp_path / "test_profile.nxs"
+    writer = NXmxFileWriter(
+        filename,
+        mock_goniometer,
+        mock_eiger,
+        mock_source,
+        mock_beam,
+        mock_attenuator,
+        90,
+        h5_profile="lustre",
+    )
+    writer.write()
+    writer.update_timestamps("2024-01-01T10:00:00Z")
+
+    with h5py.File(filename, "r") as nxs:
+        fcpl = nxs.id.get_create_plist()
+        assert fcpl.get_file_space_strategy()[0] == h5py.h5f.FSPACE_STRATEGY_PAGE
+        assert "end_time" in nxs["/entry"].keys()
+
+
+def test_NXmxFileWriter_saves_timings(
+    tmp_path, mock_goniometer, mock_eiger, mock_source, mock_beam, mock_attenuator
+):
+    filename = tmp_path / "test_timings.nxs"
+    writer = NXmxFileWriter(
+        filename,
+        mock_goniometer,
+        mock_eiger,
+        mock_source,
+        mock_beam,
+        mock_attenuator,
+        90,
+    )
+    writer.write()
+    sidecar = writer.save_timings()
+
+    assert sidecar == tmp_path / "test_timings.timings.json"
+    with open(sidecar) as fh:
+        res = json.load(fh)
+    assert res["nexus_file"] == str(filename)
+    assert res["phases"]["NXmxFileWriter.write"]["count"] == 1
+    for p in ["write_NXdata", "write_NXdetector", "write_NXsample"]:
+        assert p in res["phases"].keys()
+    assert res["total_s"] == res["phases"]["NXmxFileWriter.write"]["total_s"]
+
+
+READER = """
+import sys
+import h5py
+with h5py.File(sys.argv[1], "r", swmr=True) as fh:
+    print(fh["/entry/instrument/detector/frame_metadata/nframes"][()])
+"""
+
+
+def _read_nframes_from_another_process(filename) -> int:
+    out = subprocess.run(
+        [sys.executable, "-c", READER, str(filename)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return int(out.stdout)
+
+
+@pytest.fixture
+def swmr_writer(
+    tmp_path, mock_goniometer, mock_eiger, mock_source, mock_beam, mock_attenuator
+):
+    return SWMRNXmxFileWriter(
+        tmp_path / "test_swmr.nxs",
+        mock_goniometer,
+        mock_eiger,
+        mock_source,
+        mock_beam,
+        mock_attenuator,
+        90,
+        per_frame_fields={"timestamp": np.float64},
+        flush_interval=0.0,
+    )
+
+
+def test_SWMRNXmxFileWriter_live_collection(swmr_writer):
+    with swmr_writer as writer:
+        writer.start(start_time="2024-01-01T10:00:00Z")
+        assert writer.is_live
+        writer.append_frames(10, timestamp=np.arange(10) * 0.1)
+        assert _read_nframes_from_another_process(writer.filename) == 10
+        writer.append_frames(5, timestamp=np.arange(10, 15) * 0.1)
+        assert _read_nframes_from_another_process(writer.filename) == 15
+        writer.finish("2024-01-01T10:01:00Z")
+    assert not writer.is_live
+    # Nested writer methods don't record their phases twice
+    counts = {k: v["count"] for k, v in writer.timings.summary().items()}
+    assert counts["SWMRNXmxFileWriter.start"] == 1
+    assert counts["SWMRNXmxFileWriter.append_frames"] == 2
+    assert all(counts[p] == 1 for p in ["write_NXentry", "image_vds_writer"])
+
+    with h5py.File(writer.filename, "r") as nxs:
+        assert nxs["/entry/end_time"][()] == b"2024-01-01T10:01:00Z"
+        assert nxs[FRAME_METADATA_LOC]["nframes"][()] == 15
+        assert nxs[FRAME_METADATA_LOC]["timestamp"].shape == (15,)
+        assert nxs["/entry/data/data"].is_virtual
+
+
+def test_SWMRNXmxFileWriter_fails_to_create_objects_while_live(swmr_writer):
+    swmr_writer.start(write_vds=False)
+    with pytest.raises(RuntimeError):
+        swmr_writer.add_NXnote({"foo": "bar"})
+    with pytest.raises(RuntimeError):
+        swmr_writer.write_vds()
+    with pytest.raises(ValueError):
+        swmr_writer.append_frames(1, temperature=[100.0])
+    with pytest.raises(ValueError):
+        swmr_writer.append_frames(2, timestamp=[0.0])
+    swmr_writer.finish()
+    # Once finished, the file can be updated as usual
+    swmr_writer.add_NXnote({"foo": "bar"})
+
+
+def test_SWMRNXmxFileWriter_finish_without_end_time(swmr_writer):
+    swmr_writer.start(write_vds=False)
+    swmr_writer.finish()
+    with h5py.File(swmr_writer.filename, "r") as nxs:
+        assert "end_time" not in nxs["/entry"]
+
+
+def test_SWMRNXmxFileWriter_keeps_end_time_written_during_collection(swmr_writer):
+    swmr_writer.start(write_vds=False)
+    swmr_writer.update_timestamps("2024-01-01T10:01:00Z", "end_time")
+    swmr_writer.finish()
+    with h5py.File(swmr_writer.filename, "r") as nxs:
+        assert nxs["/entry/end_time"][()] == b"2024-01-01T10:01:00Z"
+
+
+def test_SWMRNXmxFileWriter_append_frames_fails_if_not_started(swmr_writer):
+    with pytest.raises(RuntimeError):
+        swmr_writer.append_frames(1)
+
+
+def test_NXmxFileWriter_session_opens_file_once(
+    tmp_path, mock_goniometer, mock_eiger, mock_source, mock_beam, mock_attenuator
+):
+    filename = tmp_path / "test_session.nxs"
+    writer = NXmxFileWriter(
+        filename,
+        mock_goniometer,
+        mock_eiger,
+        mock_source,
+        mock_beam,
+        mock_attenuator,
+        90,
+    )
+    with patch.object(
+        writer, "_open_for_writing", wraps=writer._open_for_writing
+    ) as mock_open:
+        with writer.session() as s:
+            s.write(start_time="2024-01-01T10:00:00Z")
+            s.update_timestamps("2024-01-01T10:01:00Z", "end_time")
+            s.add_NXnote({"foo": "bar"})
+            with pytest.raises(RuntimeError):
+                with writer.session():
+                    pass
+        mock_open.assert_called_once_with("x", False)
+
+    with h5py.File(filename, "r") as nxs:
+        assert nxs["/entry/end_time"][()] == b"2024-01-01T10:01:00Z"
+        assert nxs["/entry/notes/foo"][()] == b"bar"
+
+    # Outside of a session, each method opens the file
+    writer.add_NXnote({"bar": "foo"}, "/entry/other_notes")
+    with h5py.File(filename, "r") as nxs:
+        assert nxs["/entry/other_notes/bar"][()] == b"foo"
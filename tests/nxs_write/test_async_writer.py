@@ -0,0 +1,64 @@
+import asyncio
+import queue
+import threading
+
+import pytest
+
+from nexgen.nxs_write.async_writer import AsyncWriter
+
+
+def test_async_writer_runs_jobs_in_order_with_callbacks():
+    results = []
+    done = []
+    with AsyncWriter() as worker:
+        futures = [
+            worker.submit(results.append, n, on_done=lambda _: done.append(True))
+            for n in range(5)
+        ]
+        for f in futures:
+            f.result(timeout=5)
+    assert results == list(range(5))
+    assert len(done) == 5
+    assert worker.pending == 0
+
+
+def test_async_writer_calls_error_callback():
+    errors = []
+
+    def failing_job():
+        raise ValueError("Bad file.")
+
+    with AsyncWriter() as worker:
+        future = worker.submit(failing_job, on_error=errors.append)
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+    assert len(errors) == 1 and isinstance(errors[0], ValueError)
+
+
+def test_async_writer_bounded_queue_depth():
+    release = threading.Event()
+    with AsyncWriter(max_queue_depth=2) as worker:
+        worker.submit(release.wait)
+        worker.submit(release.wait)
+        assert worker.pending == 2
+        with pytest.raises(queue.Full):
+            worker.submit(release.wait, block=False)
+        with pytest.raises(queue.Full):
+            worker.submit(release.wait, timeout=0.01)
+        release.set()
+        worker.submit(release.wait).result(timeout=5)
+
+
+def test_async_writer_run_from_asyncio():
+    async def main(worker):
+        return await asyncio.gather(
+            worker.run(pow, 2, 3), worker.run(pow, 3, 2), worker.run(pow, 2, 2)
+        )
+
+    with AsyncWriter(max_queue_depth=1) as worker:
+        assert asyncio.run(main(worker)) == [8, 9, 4]
+
+
+def test_async_writer_fails_for_invalid_depth():
+    with pytest.raises(ValueError):
+        AsyncWriter(max_queue_depth=0)
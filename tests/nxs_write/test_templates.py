@@ -0,0 +1,101 @@
+import h5py
+import numpy as np
+import pytest
+
+from nexgen.nxs_utils import Axis, Detector, SinglaDetector, TransformationType
+from nexgen.nxs_write.nxmx_writer import NXmxFileWriter
+from nexgen.nxs_write.templates import NXmxTemplateCache
+
+
+def _get_tree(filename) -> dict:
+    tree = {}
+
+    def _visit(name, obj):
+        link = obj.parent.get(name.split("/")[-1], getlink=True)
+        value = None
+        if isinstance(link, h5py.ExternalLink):
+            value = (link.filename, link.path)
+        elif isinstance(obj, h5py.Dataset):
+            value = obj[()]
+            value = value.tolist() if isinstance(value, np.ndarray) else value
+        attrs = {
+            k: v.tolist() if isinstance(v, np.ndarray) else v
+            for k, v in obj.attrs.items()
+        }
+        tree[name] = (value, attrs)
+
+    with h5py.File(filename, "r") as fh:
+        fh.visititems(_visit)
+    return tree
+
+
+@pytest.fixture
+def mock_singla() -> Detector:
+    return Detector(
+        SinglaDetector("Dectris Singla 1M", (1062, 1028)),
+        [Axis("det_z", ".", TransformationType.TRANSLATION, (0, 0, 1), 350.0)],
+        [500.0, 520.0],
+        0.1,
+        [(-1, 0, 0), (0, -1, 0)],
+    )
+
+
+@pytest.mark.parametrize("detector", ["mock_eiger", "mock_singla"])
+def test_NXmxFileWriter_with_template_matches_full_write(
+    detector,
+    request,
+    tmp_path,
+    mock_goniometer,
+    mock_source,
+    mock_beam,
+    mock_attenuator,
+):
+    det = request.getfixturevalue(detector)
+    if detector == "mock_singla":
+        det.detector_params.constants["pixel_mask"] = None
+        det.detector_params.constants["flatfield"] = None
+    cache = NXmxTemplateCache()
+    files = []
+    for name, template_cache in zip(["full", "template"], [None, cache]):
+        filename = tmp_path / f"test_{name}.nxs"
+        writer = NXmxFileWriter(
+            filename,
+            mock_goniometer,
+            det,
+            mock_source,
+            mock_beam,
+            mock_attenuator,
+            90,
+        )
+        writer.write(image_filename="test", template_cache=template_cache)
+        files.append(filename)
+    cache.clear()
+
+    assert _get_tree(files[0]) == _get_tree(files[1])
+
+
+def test_template_cache_reuses_template_for_same_configuration(mock_eiger, mock_source):
+    cache = NXmxTemplateCache()
+    template = cache.get_template(mock_source, mock_eiger)
+    # Dynamic values don't change the template
+    mock_eiger.beam_center = [100, 100]
+    mock_eiger.exp_time = 1.0
+    assert cache.get_template(mock_source, mock_eiger) is template
+    assert "beam_center_x" not in template["/entry/instrument/detector"].keys()
+    assert "module_offset" not in template["/entry/instrument/detector/module"].keys()
+    # A different configuration gets a new template
+    mock_eiger.detector_params.sensor_material = "Si"
+    assert cache.get_template(mock_source, mock_eiger) is not template
+    cache.clear()
+
+
+def test_template_cache_saves_templates_to_directory(tmp_path, mock_eiger, mock_source):
+    cache = NXmxTemplateCache(tmp_path)
+    cache.get_template(mock_source, mock_eiger)
+    key = NXmxTemplateCache.get_key(mock_source, mock_eiger)
+    template_file = tmp_path / f"nxmx_template_{key}.h5"
+    assert template_file.exists()
+    cache.clear()
+
+    with h5py.File(template_file, "r") as fh:
+        assert fh["/entry/source/name"][()] == b"Diamond Light Source"
@@ -2,6 +2,7 @@ from datetime import datetime
 from pathlib import Path
 from unittest.mock import patch
 
+import h5py
 import numpy as np
 import pytest
 
@@ -14,8 +15,10 @@ from nexgen.nxs_write.write_utils import (
     find_number_of_images,
     mask_and_flatfield_writer,
     mask_and_flatfield_writer_for_event_data,
+    open_in_memory,
     set_dependency,
     write_compressed_copy,
+    write_small_dataset,
 )
 
 test_module = {"fast_axis": [1, 0, 0], "slow_axis": [0, 1, 0]}
@@ -29,6 +32,30 @@ def test_create_attributes(dummy_nexus_file):
     assert dummy_nexus_file["/entry/"].attrs["version"] == b"0.0"
 
 
+def test_write_small_dataset_with_compact_layout(dummy_nexus_file):
+    grp = dummy_nexus_file.require_group("/entry/")
+    write_small_dataset(grp, "name", np.bytes_("Test"), compact=True)
+    write_small_dataset(grp, "size", [10, 20], np.uint32, compact=True)
+
+    assert dummy_nexus_file["/entry/name"][()] == b"Test"
+    assert dummy_nexus_file["/entry/size"].dtype == np.uint32
+    for dset in ["name", "size"]:
+        layout = grp[dset].id.get_create_plist().get_layout()
+        assert layout == h5py.h5d.COMPACT
+
+
+def test_write_small_dataset_falls_back_to_contiguous_for_large_data(
+    dummy_nexus_file,
+):
+    grp = dummy_nexus_file.require_group("/entry/")
+    write_small_dataset(grp, "big", np.zeros((100, 100)), compact=True)
+    write_small_dataset(grp, "default", 1.0)
+
+    for dset in ["big", "default"]:
+        layout = grp[dset].id.get_create_plist().get_layout()
+        assert layout == h5py.h5d.CONTIGUOUS
+
+
 def test_set_dependency(mock_goniometer):
     # Check that the end of the dependency chain always gets set to b"."
     assert set_dependency(".", "/entry/sample/transformations/") == b"."
@@ -137,3 +164,62 @@ def test_add_non_standard_fields_to_NXsample(dummy_nexus_file, mock_goniometer):
     assert "omega_increment_set" in list(
         dummy_nexus_file[nxsample_path]["sample_omega"]
     )
+
+
+def test_open_in_memory_flushes_file_on_exit(tmp_path):
+    filename = tmp_path / "test_in_memory.nxs"
+    with open_in_memory(filename, "x") as nxs:
+        nxs["/entry/definition"] = np.bytes_("NXmx")
+        nxs["/entry/data/data_000001"] = h5py.ExternalLink("data_000001.h5", "data")
+        assert not filename.exists()
+
+    assert list(tmp_path.iterdir()) == [filename]
+    with h5py.File(filename, "r") as fh:
+        assert fh["/entry/definition"][()] == b"NXmx"
+        assert fh["/entry/data"].get("data_000001", getlink=True).filename == (
+            "data_000001.h5"
+        )
+
+
+def test_open_in_memory_does_not_write_anything_on_error(tmp_path):
+    filename = tmp_path / "test_in_memory.nxs"
+    with pytest.raises(RuntimeError):
+        with open_in_memory(filename, "w") as nxs:
+            nxs["/entry/definition"] = np.bytes_("NXmx")
+            raise RuntimeError("Something went wrong.")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_open_in_memory_fails_if_file_exists_and_mode_is_x(tmp_path):
+    filename = tmp_path / "test_in_memory.nxs"
+    filename.touch()
+    with pytest.raises(FileExistsError):
+        with open_in_memory(filename, "x"):
+            pass
+
+
+@pytest.mark.parametrize("write_mode", ["x", "w-"])
+def test_open_in_memory_does_not_overwrite_file_created_meanwhile(tmp_path, write_mode):
+    filename = tmp_path / "test_in_memory.nxs"
+    with pytest.raises(FileExistsError):
+        with open_in_memory(filename, write_mode) as nxs:
+            nxs["/entry/definition"] = np.bytes_("NXmx")
+            filename.write_bytes(b"other writer")
+    assert filename.read_bytes() == b"other writer"
+    assert list(tmp_path.iterdir()) == [filename]
+
+
+def test_open_in_memory_replaces_existing_file_if_mode_is_w(tmp_path):
+    filename = tmp_path / "test_in_memory.nxs"
+    filename.write_bytes(b"old file")
+    with open_in_memory(filename, "w") as nxs:
+        nxs["/entry/definition"] = np.bytes_("NXmx")
+    with h5py.File(filename, "r") as fh:
+        assert fh["/entry/definition"][()] == b"NXmx"
+    assert list(tmp_path.iterdir()) == [filename]
+
+
+def test_open_in_memory_fails_for_read_write_modes(tmp_path):
+    with pytest.raises(ValueError):
+        with open_in_memory(tmp_path / "test_in_memory.nxs", "r+"):
+            pass
@@ -0,0 +1,48 @@
+import h5py
+import pytest
+
+from nexgen.h5_profiles import (
+    H5_PROFILES,
+    H5Profile,
+    get_h5_profile,
+    open_with_profile,
+)
+
+
+def test_get_h5_profile():
+    assert get_h5_profile(None) == H5_PROFILES["default"]
+    assert get_h5_profile("GPFS") == H5_PROFILES["gpfs"]
+    custom = H5Profile(libver="latest")
+    assert get_h5_profile(custom) is custom
+
+
+def test_get_h5_profile_fails_for_unknown_name():
+    with pytest.raises(ValueError):
+        get_h5_profile("nfs")
+
+
+def test_default_profile_has_no_file_kwargs():
+    assert H5_PROFILES["default"].get_file_kwargs("w") == {}
+
+
+def test_profile_only_sets_creation_properties_for_new_files():
+    profile = H5_PROFILES["lustre"]
+    assert "fs_strategy" in profile.get_file_kwargs("x")
+    assert "page_buf_size" in profile.get_file_kwargs("w")
+    kw = profile.get_file_kwargs("r+")
+    assert "fs_strategy" not in kw and "page_buf_size" not in kw
+    assert kw["alignment_interval"] == 1024 * 1024
+
+
+def test_open_with_profile(tmp_path):
+    filename = tmp_path / "test.h5"
+    with open_with_profile(filename, "w", "gpfs") as fh:
+        fh["data"] = [1, 2, 3]
+        fcpl = fh.id.get_create_plist()
+        assert fcpl.get_file_space_strategy()[0] == h5py.h5f.FSPACE_STRATEGY_PAGE
+        assert fcpl.get_file_space_page_size() == 1024 * 1024
+    # Page buffer not requested on an existing file
+    with open_with_profile(filename, "r+", "gpfs") as fh:
+        fh["other"] = 1
+    with open_with_profile(filename, "r", "local-ssd", libver="earliest") as fh:
+        assert fh["other"][()] == 1
@@ -0,0 +1,110 @@
+import json
+import logging
+
+from nexgen.timings import Timings, phase, record_timings, timed, timed_method
+
+
+@timed
+def inner():
+    return 1
+
+
+@timed(name="outer_phase")
+def outer():
+    return inner() + 1
+
+
+def test_timed_records_nested_phases():
+    with record_timings() as timings:
+        assert outer() == 2
+
+    assert [r.phase for r in timings.records] == ["inner", "outer_phase"]
+    assert timings.records[0].parent == "outer_phase"
+    assert timings.records[1].parent is None
+    assert timings.total_s == timings.records[1].duration_s
+    assert timings.records[0].duration_s <= timings.records[1].duration_s
+
+
+class Writer:
+    def __init__(self):
+        self.timings = Timings()
+
+    @timed_method
+    def write(self):
+        return inner()
+
+    @timed_method
+    def start(self):
+        return self.write()
+
+
+def test_nested_timed_methods_recorded_once():
+    writer = Writer()
+    writer.start()
+    summary = writer.timings.summary()
+    assert {k: v["count"] for k, v in summary.items()} == {
+        "inner": 1,
+        "Writer.write": 1,
+        "Writer.start": 1,
+    }
+    assert writer.timings.records[0].parent == "Writer.write"
+    assert writer.timings.total_s == writer.timings.records[-1].duration_s
+
+
+def test_timings_keep_aggregates_beyond_max_records():
+    timings = Timings(max_records=2)
+    with record_timings(timings):
+        for _ in range(5):
+            inner()
+    assert len(timings.records) == 2
+    assert timings.summary()["inner"]["count"] == 5
+    timings.clear()
+    assert timings.summary() == {} and timings.total_s == 0
+
+
+def test_phases_not_recorded_outside_collector():
+    timings = Timings()
+    with record_timings(timings):
+        inner()
+    inner()
+    assert len(timings.records) == 1
+
+
+def test_nested_collectors_receive_records():
+    with record_timings() as outer_timings:
+        with record_timings() as inner_timings:
+            with phase("vds"):
+                pass
+        with phase("cleanup"):
+            pass
+    assert list(inner_timings.summary().keys()) == ["vds"]
+    assert list(outer_timings.summary().keys()) == ["vds", "cleanup"]
+
+
+def test_timings_summary():
+    with record_timings() as timings:
+        for _ in range(3):
+            inner()
+    summary = timings.summary()
+    assert summary["inner"]["count"] == 3
+    assert summary["inner"]["max_s"] <= summary["inner"]["total_s"]
+
+
+def test_phase_emits_log_record(caplog):
+    with caplog.at_level(logging.DEBUG, logger="nexgen.timings"):
+        with phase("meta_parsing"):
+            pass
+    rec = [r for r in caplog.records if r.name == "nexgen.timings"][-1]
+    assert rec.phase == "meta_parsing"
+    assert rec.duration_s >= 0
+
+
+def test_timings_save(tmp_path):
+    with record_timings() as timings:
+        inner()
+    out = timings.save(tmp_path / "test.timings.json", nexus_file="test.nxs")
+    with open(out) as fh:
+        res = json.load(fh)
+    assert res["nexus_file"] == "test.nxs"
+    assert res["phases"]["inner"]["count"] == 1
+    assert res["records"][0]["phase"] == "inner"
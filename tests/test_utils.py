@@ -1,3 +1,5 @@
+import subprocess
+import sys
 import time
 from datetime import datetime
 from pathlib import Path
@@ -118,3 +120,68 @@ def test_units_of_time():
 def test_units_of_time_raises_error_for_wrong_dimension():
     with pytest.raises(pint.errors.DimensionalityError):
         utils.units_of_time("0.2in")
+
+
+def test_unit_registry_is_shared():
+    assert utils.get_unit_registry() is utils.get_unit_registry()
+    assert utils.ureg is utils.get_unit_registry()
+    assert utils.Q_ is utils.get_unit_registry().Quantity
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "nexgen.__main__",
+        "nexgen.command_line.SSX_cli",
+        "nexgen.command_line.I19_2_cli",
+        "nexgen.nxs_write.nxmx_writer",
+    ],
+)
+def test_slow_dependencies_are_not_loaded_on_import(module):
+    code = (
+        f"import sys, {module}; "
+        "slow = ['pint', 'scanspec', 'nexgen.tools.tristan_tools']; "
+        "print(','.join(m for m in slow if m in sys.modules))"
+    )
+    res = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert res.stdout.strip() == ""
+
+
+@pytest.mark.parametrize(
+    "q, to_base", [("75um", False), ("5cm", True), (0.1, False), (100, True)]
+)
+def test_units_of_length_cached_matches_pint(q, to_base):
+    res = utils.units_of_length(q, to_base)
+    expected = utils._parse_length(q, to_base)
+    assert res == expected
+    assert res.units == expected.units
+    assert type(res.magnitude) is type(expected.magnitude)
+
+
+@pytest.mark.parametrize("q", ["0.05s", "20ms", 1, 0.5])
+def test_units_of_time_cached_matches_pint(q):
+    res = utils.units_of_time(q)
+    expected = utils._parse_time(q)
+    assert res == expected
+    assert type(res.magnitude) is type(expected.magnitude)
+
+
+def test_units_string_cache_is_used_and_results_are_independent():
+    utils._cached_length.cache_clear()
+    q1 = utils.units_of_length("172um")
+    q1.ito("m")
+    q2 = utils.units_of_length("172um")
+    assert utils._cached_length.cache_info().hits == 1
+    assert q2 == ureg.Quantity(172, "um")
+    assert str(q2.units) == "micrometer"
+
+
+@pytest.mark.parametrize("q", [-1, 0, "-2mm", -0.5])
+def test_units_of_length_cached_raises_same_error(q):
+    with pytest.raises(ValueError, match="must be positive"):
+        utils.units_of_length(q)
+    # Errors are not cached
+    with pytest.raises(ValueError, match="must be positive"):
+        utils.units_of_length(q)
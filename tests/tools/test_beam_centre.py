@@ -0,0 +1,131 @@
+from pathlib import Path
+
+import h5py
+import numpy as np
+import pytest
+
+from nexgen.nxs_utils import Axis, Detector, EigerDetector, TransformationType
+from nexgen.tools.beam_centre import (
+    _find_pixel_mask,
+    centroid_max_frames,
+    centroid_weighted_frames,
+    find_beam_centre_from_frames,
+    read_frame_subset,
+)
+from nexgen.tools.ed_tools import centroid_max
+from nexgen.utils import Point3D
+
+BEAM = (37, 21)  # (fast, slow)
+
+
+def make_frames(num_frames: int, shape=(64, 80), beam=BEAM) -> np.ndarray:
+    frames = np.ones((num_frames, *shape), dtype=np.uint16)
+    frames[:, beam[1], beam[0]] = 100
+    return frames
+
+
+@pytest.fixture
+def data_file(tmp_path: Path) -> Path:
+    filename = tmp_path / "test_000001.h5"
+    with h5py.File(filename, "w") as fh:
+        fh.create_dataset("/entry/data/data", data=make_frames(20), chunks=(1, 64, 80))
+    return filename
+
+
+def test_centroid_max_frames_matches_single_frame():
+    rng = np.random.default_rng(42)
+    images = rng.integers(0, 5, size=(6, 16, 12))
+    images[2, 3:5, 7] = 10
+    x, y = centroid_max_frames(images)
+    expected = np.array([centroid_max(im) for im in images])
+    np.testing.assert_allclose(x, expected[:, 0])
+    np.testing.assert_allclose(y, expected[:, 1])
+    assert (x[2], y[2]) == (7, 3.5)
+
+
+def test_centroid_weighted_frames_is_subpixel():
+    images = np.zeros((2, 5, 5))
+    images[0, 2, 1:3] = [10, 30]
+    x, y = centroid_weighted_frames(images, threshold=0)
+    assert x[0] == pytest.approx(1.75) and y[0] == pytest.approx(2)
+    assert np.isnan(x[1]) and np.isnan(y[1])
+
+
+def test_read_frame_subset_is_strided(data_file):
+    with h5py.File(data_file, "r") as fh:
+        dset = fh["/entry/data/data"]
+        frames = read_frame_subset(dset, 4, (slice(10, 30), slice(30, 40)))
+        assert frames.shape == (4, 20, 10)
+        assert read_frame_subset(dset, 50).shape == (20, 64, 80)
+
+
+def test_find_beam_centre_from_data_file(data_file):
+    assert find_beam_centre_from_frames(data_file, roi_half_size=None) == (37.5, 21.5)
+    # ROI around the centre of the image, clipped to the detector
+    assert find_beam_centre_from_frames(data_file, roi_half_size=30) == (37.5, 21.5)
+    assert find_beam_centre_from_frames(
+        data_file, roi_half_size=20, roi_centre=(30, 5)
+    ) == (37.5, 21.5)
+
+
+def test_find_beam_centre_from_nexus_file_without_vds(data_file, tmp_path):
+    nxs = tmp_path / "test.nxs"
+    with h5py.File(nxs, "w") as fh:
+        fh["/entry/data/data_000001"] = h5py.ExternalLink(
+            data_file.name, "/entry/data/data"
+        )
+        fh["/entry/instrument/detector/pixel_mask"] = np.zeros((64, 80), np.uint32)
+    assert find_beam_centre_from_frames(nxs, num_frames=3) == (37.5, 21.5)
+
+
+def test_find_beam_centre_from_vds(data_file, tmp_path):
+    layout = h5py.VirtualLayout(shape=(20, 64, 80), dtype=np.uint16)
+    layout[:] = h5py.VirtualSource(data_file, "/entry/data/data", shape=(20, 64, 80))
+    nxs = tmp_path / "test.nxs"
+    with h5py.File(nxs, "w") as fh:
+        fh.create_virtual_dataset("/entry/data/data", layout)
+    assert find_beam_centre_from_frames(nxs) == (37.5, 21.5)
+
+
+def test_find_beam_centre_ignores_masked_pixels_and_outliers(tmp_path):
+    frames = make_frames(10)
+    frames[:, 5, 5] = 500  # hot pixel
+    frames[3, 60, 2] = 1000  # one frame disagrees with the others
+    filename = tmp_path / "test.h5"
+    with h5py.File(filename, "w") as fh:
+        fh["/entry/data/data"] = frames
+        mask = np.zeros((64, 80), dtype=np.uint32)
+        mask[5, 5] = 8
+        fh["/entry/instrument/detector/pixel_mask"] = mask
+    assert find_beam_centre_from_frames(filename, roi_half_size=None) == (37.5, 21.5)
+    assert find_beam_centre_from_frames(
+        filename, mask=np.zeros((64, 80)), roi_half_size=None
+    ) == (5.5, 5.5)
+    # Only the region of interest of the mask is read
+    with h5py.File(filename, "r") as fh:
+        roi_mask = _find_pixel_mask(fh, (slice(0, 10), slice(2, 8)))
+    assert roi_mask.shape == (10, 6) and roi_mask[5, 3] == 8
+
+
+def test_find_beam_centre_returns_None_for_blank_images(tmp_path):
+    filename = tmp_path / "test.h5"
+    with h5py.File(filename, "w") as fh:
+        fh["/entry/data/data"] = np.zeros((4, 8, 8), dtype=np.uint16)
+    assert find_beam_centre_from_frames(filename) is None
+    assert find_beam_centre_from_frames(filename, subpixel=True) is None
+
+
+def test_detector_set_beam_center_from_data(data_file, tmp_path):
+    det_axes = [
+        Axis("det_z", ".", TransformationType.TRANSLATION, Point3D(0, 0, 1), 500.0)
+    ]
+    eiger = EigerDetector("Eiger2 1M", (64, 80), "Si", 10000, -1)
+    det = Detector(eiger, det_axes, [0, 0], 0.1, [(1, 0, 0), (0, -1, 0)])
+    assert det.set_beam_center_from_data(data_file, subpixel=True) is True
+    assert det.beam_center == pytest.approx([37.5, 21.5])
+
+    blank = tmp_path / "blank.h5"
+    with h5py.File(blank, "w") as fh:
+        fh["/entry/data/data"] = np.zeros((2, 8, 8))
+    assert det.set_beam_center_from_data(blank) is False
+    assert det.beam_center == pytest.approx([37.5, 21.5])
@@ -0,0 +1,16 @@
+import h5py
+import pytest
+
+from nexgen.tools.data_writer import generate_image_files
+
+
+@pytest.mark.parametrize("num_images, num_files", [(1000, 1), (2500, 3)])
+def test_generate_image_files(tmp_path, num_images, num_files):
+    datafiles = [tmp_path / f"test_{n:06d}.h5" for n in range(1, num_files + 1)]
+    generate_image_files(datafiles, (4, 4), "test", num_images)
+    shapes = []
+    for f in datafiles:
+        with h5py.File(f, "r") as fh:
+            shapes.append(fh["data"].shape[0])
+    assert sum(shapes) == num_images
+    assert shapes[0] == min(num_images, 1000)
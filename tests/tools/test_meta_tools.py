@@ -5,11 +5,18 @@ import numpy as np
 import pytest
 
 from nexgen.nxs_utils import Axis, TransformationType
+from nexgen.timings import record_timings
 from nexgen.tools.meta_reader import (
     define_vds_data_type,
     update_axes_from_meta,
 )
-from nexgen.tools.metafile import DectrisMetafile, TristanMetafile
+from nexgen.tools.metafile import (
+    DectrisMetafile,
+    DectrisStream2Metafile,
+    PathIndex,
+    TristanMetafile,
+    parse_config_string,
+)
 
 
 @pytest.fixture
@@ -104,6 +111,147 @@ def test_Eiger_meta_file(dummy_eiger_meta_file):
     }
 
 
+def test_Eiger_meta_file_config_read_once(dummy_eiger_meta_file):
+    meta = DectrisMetafile(dummy_eiger_meta_file)
+    with record_timings() as timings:
+        for _ in range(3):
+            meta.get_full_number_of_images()
+            meta.read_dectris_config()
+            meta.read_config_dset()
+    summary = timings.summary()
+    assert summary["DectrisMetafile.read_dectris_config"]["count"] == 1
+    assert summary["DectrisMetafile.read_config_dset"]["count"] == 1
+    # Callers get their own copy of the cached values
+    meta.read_dectris_config()["nimages"] = 0
+    assert meta.get_number_of_images() == 10
+
+
+def test_Eiger_meta_file_reads_only_needed_groups(dummy_eiger_meta_file):
+    dummy_eiger_meta_file["_dectris/pixel_mask"] = np.zeros((64, 64), dtype=np.uint32)
+    dummy_eiger_meta_file.create_dataset(
+        "mask", data=np.arange(64 * 64).reshape(64, 64), chunks=(16, 16)
+    )
+    dummy_eiger_meta_file["data/frame"] = np.arange(100)
+    meta = DectrisMetafile(dummy_eiger_meta_file)
+    assert meta.get_detector_size() == test_detector_size
+    assert meta.get_detector_distance() == 0.19
+    assert meta.find_mask() == ("mask", None)
+    assert meta.find_software_version() is None
+    assert "pixel_mask" not in meta.read_dectris_config()
+    assert meta._find("pixel_mask") == ["_dectris/pixel_mask"]
+    # The whole file hasn't been visited
+    assert "index" not in meta.__dict__
+
+    out = np.zeros((64, 64), dtype=np.int64)
+    mask = meta.read_mask(out)
+    assert mask is out
+    np.testing.assert_array_equal(out, np.arange(64 * 64).reshape(64, 64))
+    assert meta.read_flatfield() is None
+    with pytest.raises(ValueError):
+        meta.read_mask(np.zeros((2, 2)))
+
+
+def test_parse_config_string():
+    assert parse_config_string(b"{'nimages': 10, 'omega_start': 90.0}") == {
+        "nimages": 10,
+        "omega_start": 90.0,
+    }
+    assert parse_config_string('{"flatfield_correction_applied": true}') == {
+        "flatfield_correction_applied": True
+    }
+    with pytest.raises(ValueError):
+        parse_config_string("__import__('os').getcwd()")
+    with pytest.raises(ValueError):
+        parse_config_string("[1, 2]")
+
+
+def test_path_index_matches_substring_search(dummy_eiger_meta_file):
+    dummy_eiger_meta_file["_dectris/Mask"] = np.zeros((2, 2))
+    walk = []
+    dummy_eiger_meta_file.visit(walk.append)
+    index = PathIndex(dummy_eiger_meta_file)
+    assert index.paths == walk
+    assert len(index) == len(walk)
+    assert "_dectris/nimages" in index and "nimages" not in index
+    for key in ["pixels_in_detector", "_start", "dectris", "ntrigger", "omega", "x"]:
+        assert index.find(key) == [obj for obj in walk if key in obj]
+    assert index.find("_dectris/omega") == [
+        "_dectris/omega_increment",
+        "_dectris/omega_start",
+    ]
+    assert index.find("not_there") == []
+    assert index.find_name("wavelength") == ["_dectris/wavelength"]
+    assert index.find_path_ci("_DECTRIS/MASK") == ["_dectris/Mask"]
+
+
+def test_path_index_results_are_copies(dummy_eiger_meta_file):
+    index = PathIndex(dummy_eiger_meta_file)
+    for found in (index.find("nimages"), index.find_name("nimages")):
+        found.append("not_a_path")
+    assert index.find("nimages") == ["_dectris/nimages"]
+    assert index.find_name("nimages") == ["_dectris/nimages"]
+    meta = DectrisMetafile(dummy_eiger_meta_file)
+    meta.walk.clear()
+    assert len(meta.walk) == len(meta.index)
+
+
+@pytest.fixture
+def dummy_stream2_meta_file():
+    test_hdf_file = tempfile.TemporaryFile()
+    test_meta_file = h5py.File(test_hdf_file, "w")
+    test_meta_file["_dectris/number_of_images"] = 10
+    test_meta_file["_dectris/number_of_triggers"] = 2
+    test_meta_file["_dectris/image_size_x"] = test_detector_size[1]
+    test_meta_file["_dectris/image_size_y"] = test_detector_size[0]
+    test_meta_file["_dectris/image_dtype"] = "uint16"
+    test_meta_file["_dectris/incident_wavelength"] = 0.6
+    test_meta_file["_dectris/beam_center_x"] = 500.0
+    test_meta_file["_dectris/beam_center_y"] = 250.0
+    test_meta_file["_dectris/pixel_size_x"] = 7.5e-05
+    test_meta_file["_dectris/pixel_size_y"] = 7.5e-05
+    test_meta_file["_dectris/sensor_material"] = "Si"
+    test_meta_file["_dectris/sensor_thickness"] = 0.00045
+    test_meta_file["_dectris/saturation_value"] = 9999
+    test_meta_file["_dectris/detector_translation"] = [0.0, 0.0, 0.19]
+    test_meta_file["_dectris/arm_date"] = "2024-01-01T10:00:00.000+01:00"
+    test_meta_file["_dectris/threshold_energy/threshold_1"] = 6000.0
+    test_meta_file["_dectris/goniometer/omega/start"] = 90.0
+    test_meta_file["_dectris/goniometer/omega/increment"] = 0.0
+    test_meta_file["_dectris/goniometer/phi/start"] = 10.0
+    test_meta_file["_dectris/goniometer/phi/increment"] = 0.1
+    test_meta_file["mask"] = np.zeros(test_detector_size, dtype=np.uint32)
+    yield test_meta_file
+
+
+def test_Eiger_stream2_meta_file(dummy_stream2_meta_file):
+    meta = DectrisStream2Metafile(dummy_stream2_meta_file)
+    assert meta.get_number_of_images() == 10
+    assert meta.get_full_number_of_images() == 20
+    assert meta.get_detector_size() == test_detector_size
+    assert meta.get_bit_depth_image() == 16
+    assert define_vds_data_type(meta) == np.uint16
+    assert meta.get_wavelength() == 0.6
+    assert meta.get_beam_center() == [500.0, 250.0]
+    assert meta.get_pixel_size() == [7.5e-05, 7.5e-05]
+    assert meta.get_sensor_information() == ("Si", 0.00045)
+    assert meta.get_saturation_value() == 9999
+    assert meta.get_detector_distance() == 0.19
+    assert meta.get_data_collection_date() == "2024-01-01T10:00:00.000+01:00"
+    assert meta.get_fw_version() is None
+    assert meta.get_axes_positions() == {"omega": (90.0, 0.0), "phi": (10.0, 0.1)}
+    assert meta.find_threshold_energy() == "_dectris/threshold_energy/threshold_1"
+    assert meta.find_mask() == ("mask", None)
+
+
+def test_update_axes_from_stream2_meta(dummy_stream2_meta_file, axes_list):
+    meta = DectrisStream2Metafile(dummy_stream2_meta_file)
+    update_axes_from_meta(meta, axes_list, osc_axis="phi", use_config=True)
+    assert axes_list[0].start_pos == 90.0
+    assert axes_list[-1].start_pos == 10.0
+    assert axes_list[-1].increment == 0.1
+    assert axes_list[-1].num_steps == 20
+
+
 def test_define_vds_shape(dummy_eiger_meta_file):
     meta = DectrisMetafile(dummy_eiger_meta_file)
     vds_shape = define_vds_data_type(meta)
@@ -1,8 +1,11 @@
 import logging
 import os
+from unittest.mock import patch
 
+import h5py
 import mrcfile
 import numpy as np
+import pytest
 
 from nexgen.tools.mrc_tools import cal_wavelength, get_metadata, to_hdf5_data_file
 
@@ -23,6 +26,39 @@ def test_get_metadata():
     os.remove("images.mrc")
 
 
+def test_get_metadata_reads_only_the_header(tmp_path):
+    stack = np.zeros((3, 4, 5), dtype=np.float32)
+    with mrcfile.new(tmp_path / "stack.mrc") as mrc:
+        mrc.set_data(stack)
+    with patch("nexgen.tools.mrc_tools.mrcfile.open", wraps=mrcfile.open) as m:
+        h = get_metadata(tmp_path / "stack.mrc")
+    assert m.call_args.kwargs == {"header_only": True}
+    assert h["data_shape"] == (3, 4, 5)
+    assert h["original_data_type"] == np.float32
+
+
+def test_get_metadata_single_image_shape(tmp_path):
+    make_mrc_file(tmp_path / "image.mrc")
+    h = get_metadata(tmp_path / "image.mrc")
+    with mrcfile.open(tmp_path / "image.mrc") as mrc:
+        assert h["data_shape"] == mrc.data.shape == (1, 1)
+        assert h["original_data_type"] == mrc.data.dtype
+
+
+def test_get_metadata_is_cached_until_file_changes(tmp_path):
+    filename = tmp_path / "image.mrc"
+    make_mrc_file(filename)
+    with patch("nexgen.tools.mrc_tools.mrcfile.open", wraps=mrcfile.open) as m:
+        h = get_metadata(filename)
+        h["nx"] = 100
+        assert get_metadata(filename)["nx"] == 1
+        assert m.call_count == 1
+        with mrcfile.new(filename, overwrite=True) as mrc:
+            mrc.set_data(np.zeros((2, 3), dtype=np.int16))
+        assert get_metadata(filename)["data_shape"] == (2, 3)
+        assert m.call_count == 2
+
+
 def test_collect_data():
     make_mrc_file("images_00001.mrc")
     make_mrc_file("images_00002.mrc")
@@ -37,6 +73,47 @@ def test_collect_data():
     os.remove("images.h5")
 
 
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_stack_is_streamed_in_batches(tmp_path, monkeypatch, max_workers):
+    monkeypatch.chdir(tmp_path)
+    stack = np.arange(5 * 3 * 4, dtype=np.int16).reshape(5, 3, 4)
+    with mrcfile.new("stack.mrc") as mrc:
+        mrc.set_data(stack)
+
+    hdf5_file = to_hdf5_data_file(
+        ["stack.mrc"], logger, batch_size=2, max_workers=max_workers
+    )
+    assert hdf5_file == "stack.h5"
+    with h5py.File(hdf5_file, "r") as fh:
+        assert list(fh.keys()) == ["entry"]
+        dset = fh["/entry/data/data"]
+        assert dset.chunks == (1, 3, 4)
+        assert dset.dtype == np.int16
+        np.testing.assert_array_equal(dset[()], stack)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+@pytest.mark.parametrize("batch_size", [1, 2, 16])
+def test_image_list_is_streamed_in_batches(
+    tmp_path, monkeypatch, batch_size, max_workers
+):
+    monkeypatch.chdir(tmp_path)
+    images = np.arange(5 * 3 * 4, dtype=np.int16).reshape(5, 3, 4)
+    files = []
+    for i, img in enumerate(images):
+        files.append(f"images_{i + 1:05d}.mrc")
+        with mrcfile.new(files[-1]) as mrc:
+            mrc.set_data(img)
+
+    hdf5_file = to_hdf5_data_file(files, logger, dtype="float32", batch_size=batch_size)
+    with h5py.File(hdf5_file, "r") as fh:
+        assert list(fh.keys()) == ["entry"]
+        dset = fh["/entry/data/data"]
+        assert dset.dtype == np.float32
+        assert dset.id.get_create_plist().get_filter(0)[0] == 32004  # LZ4
+        np.testing.assert_array_equal(dset[()], images)
+
+
 def make_mrc_file(filename):
     images = np.zeros((1, 1), dtype=np.int16)
 
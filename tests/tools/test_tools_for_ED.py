@@ -75,6 +75,20 @@ def test_SignalMaster_get_mask_and_flatfiled(dummy_singla_master_file):
     assert_array_equal(flatfield_info[1], test_flatfield)
 
 
+def test_SinglaMaster_index(dummy_singla_master_file):
+    with h5py.File(dummy_singla_master_file.name, "r") as fh:
+        master = SinglaMaster(fh)
+        walk = []
+        fh.visit(walk.append)
+        assert master.walk == walk
+        assert master.index.find("flatfield") == [
+            obj for obj in walk if "flatfield" in obj
+        ]
+        assert master.index.find_name("nimages") == [
+            "entry/instrument/detector/nimages"
+        ]
+
+
 def test_get_mask_and_flatfield_from_singla_master_file(dummy_singla_master_file):
     D = extract_detector_info_from_master(dummy_singla_master_file.name)
     assert "pixel_mask" in D.keys() and "flatfield" in D.keys()
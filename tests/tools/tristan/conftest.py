@@ -0,0 +1,73 @@
+from pathlib import Path
+
+import h5py
+import numpy as np
+import pytest
+
+from nexgen.nxs_write.write_utils import create_attributes
+from nexgen.tools.tristan_tools.events import TristanCue
+
+# Small detector with two modules, stacked along the slow axis
+test_image_size = (4, 6)  # slow, fast
+test_chunk = 8
+
+
+def write_event_file(
+    filename: Path,
+    x: list[int],
+    y: list[int],
+    t: list[int],
+    cues: list[tuple[int, int]] = [],
+):
+    chunks = (min(test_chunk, len(t)),)
+    with h5py.File(filename, "w") as fh:
+        fh.create_dataset(
+            "event_id",
+            data=np.array(x, dtype=np.uint32) * 0x2000 + np.array(y, dtype=np.uint32),
+            chunks=chunks,
+        )
+        fh.create_dataset(
+            "event_timestamp_zero",
+            data=np.array(t, dtype=np.uint64),
+            chunks=chunks,
+        )
+        fh.create_dataset("event_energy", data=np.zeros(len(t), dtype=np.uint32))
+        cue_id = np.zeros(8, dtype=np.uint16)
+        cue_time = np.zeros(8, dtype=np.uint64)
+        for n, (c, ct) in enumerate(cues):
+            cue_id[n], cue_time[n] = c, ct
+        fh["cue_id"] = cue_id
+        fh["cue_timestamp_zero"] = cue_time
+
+
+@pytest.fixture
+def tristan_collection(tmp_path: Path) -> Path:
+    """Two modules, with one event per 100 ticks, from t=1000 to t=2990, and the shutter \
+    open from 1000 to 3000. Module 1 only sees pixel (x=1, y=0), module 2 (x=2, y=3)."""
+    t = list(range(1000, 3000, 100))
+    n = len(t)
+    shutter = [(TristanCue.SHUTTER_OPEN, 1000), (TristanCue.SHUTTER_CLOSE, 3000)]
+    write_event_file(tmp_path / "test_000001.h5", [1] * n, [0] * n, t, shutter)
+    write_event_file(
+        tmp_path / "test_000002.h5", [2] * n, [3] * n, t, [(TristanCue.SYNC, 0)]
+    )
+    with h5py.File(tmp_path / "test_meta.h5", "w") as fh:
+        fh["ts_qty_module00"] = np.array([n])
+        fh["ts_qty_module01"] = np.array([n])
+    return tmp_path / "test_meta.h5"
+
+
+@pytest.fixture
+def dummy_tristan_nexus(tmp_path: Path) -> Path:
+    filename = tmp_path / "tristan.nxs"
+    with h5py.File(filename, "w") as fh:
+        nxentry = fh.create_group("entry")
+        create_attributes(nxentry, ("NX_class",), ("NXentry",))
+        nxdata = nxentry.create_group("data")
+        create_attributes(nxdata, ("NX_class",), ("NXdata",))
+        omega = nxdata.create_dataset("omega", data=(0.0, 0.0))
+        create_attributes(omega, ("transformation_type",), ("rotation",))
+        nxsample = nxentry.create_group("sample")
+        create_attributes(nxsample, ("NX_class",), ("NXsample",))
+        nxsample["transformations/omega"] = (0.0, 0.0)
+    return filename
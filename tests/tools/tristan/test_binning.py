@@ -0,0 +1,135 @@
+from pathlib import Path
+
+import h5py
+import numpy as np
+import pytest
+
+from nexgen.tools.tristan_tools import (
+    bin_events,
+    bin_events_to_file,
+    bin_tristan_images,
+    decode_event_positions,
+    find_event_files,
+    find_shutter_times,
+    get_timestamp_index,
+    iter_event_chunks,
+    rotation_bin_edges,
+    time_bin_edges,
+)
+
+from .conftest import test_image_size, write_event_file
+
+
+def test_decode_event_positions():
+    x, y = decode_event_positions([3 * 0x2000 + 5, 4182 * 0x2000 + 3042])
+    np.testing.assert_array_equal(x, [3, 4182])
+    np.testing.assert_array_equal(y, [5, 3042])
+
+
+def test_find_event_files(tristan_collection: Path):
+    (tristan_collection.parent / "other_000001.h5").touch()
+    files = find_event_files(tristan_collection)
+    assert [f.name for f in files] == ["test_000001.h5", "test_000002.h5"]
+
+
+def test_iter_event_chunks_aligned_to_hdf5_chunks(tristan_collection: Path):
+    filename = tristan_collection.parent / "test_000001.h5"
+    blocks = list(iter_event_chunks(filename, start=3, stop=18))
+    assert [start for start, _ in blocks] == [3, 8, 16]
+    assert [len(ev_id) for _, (ev_id, _) in blocks] == [5, 8, 2]
+
+
+def test_find_shutter_times(tristan_collection: Path):
+    assert find_shutter_times(find_event_files(tristan_collection)) == (1000, 3000)
+
+
+def test_rotation_bin_edges():
+    edges = rotation_bin_edges(0, 1000, (0.0, 10.0), osc=2.5)
+    np.testing.assert_allclose(edges, [0, 250, 500, 750, 1000])
+    np.testing.assert_allclose(
+        rotation_bin_edges(0, 1000, (0.0, 10.0), nbins=2), time_bin_edges(0, 1000, 2)
+    )
+    with pytest.raises(ValueError):
+        rotation_bin_edges(0, 1000, (0.0, 10.0), osc=2.5, nbins=2)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_bin_events(tristan_collection: Path, max_workers: int):
+    files = find_event_files(tristan_collection)
+    images = bin_events(
+        files, time_bin_edges(1000, 3000, 4), test_image_size, max_workers
+    )
+    assert images.shape == (4, *test_image_size)
+    assert images.dtype == np.uint32
+    # 20 events per module, 5 per time slice
+    np.testing.assert_array_equal(images[:, 0, 1], [5, 5, 5, 5])
+    np.testing.assert_array_equal(images[:, 3, 2], [5, 5, 5, 5])
+    assert images.sum() == 40
+
+
+def test_bin_events_drops_out_of_range(tmp_path: Path):
+    filename = tmp_path / "test_000001.h5"
+    # Outside of the image, before and after the time range
+    write_event_file(filename, [6, 0, 0, 0], [0, 4, 0, 0], [10, 10, 0, 100])
+    images = bin_events([filename], time_bin_edges(5, 50, 1), test_image_size)
+    assert images.sum() == 0
+
+
+def test_bin_tristan_images(tristan_collection: Path):
+    data_file = bin_tristan_images(
+        tristan_collection,
+        tristan_collection.parent / "binned.h5",
+        test_image_size,
+        osc=0.5,
+        scan_range=(0.0, 1.0),
+        max_workers=1,
+        save_index=False,
+    )
+    assert not (tristan_collection.parent / "test_ts_index.h5").exists()
+    with h5py.File(data_file, "r") as fh:
+        assert fh["data"].shape == (2, *test_image_size)
+        assert fh["data"].chunks == (1, *test_image_size)
+        np.testing.assert_array_equal(fh["data"][:, 0, 1], [10, 10])
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_bin_events_in_blocks(tristan_collection: Path, max_workers: int):
+    files = find_event_files(tristan_collection)
+    edges = time_bin_edges(1000, 3000, 5)
+    indexes = get_timestamp_index(tristan_collection, save=False)
+    # Two images of 4x6 uint32 per block, the last block has only one
+    block_bytes = 2 * 4 * int(np.prod(test_image_size))
+    images = bin_events(
+        files, edges, test_image_size, max_workers, max_block_bytes=block_bytes
+    )
+    np.testing.assert_array_equal(images, bin_events(files, edges, test_image_size))
+    np.testing.assert_array_equal(images[:, 0, 1], [4, 4, 4, 4, 4])
+
+    data_file = bin_events_to_file(
+        files,
+        edges,
+        test_image_size,
+        tristan_collection.parent / "binned.h5",
+        max_workers=max_workers,
+        indexes=indexes,
+        max_block_bytes=block_bytes,
+    )
+    with h5py.File(data_file, "r") as fh:
+        assert fh["data"].chunks == (1, *test_image_size)
+        np.testing.assert_array_equal(fh["data"][()], images)
+
+
+def test_bin_tristan_images_in_blocks(tristan_collection: Path):
+    data_file = bin_tristan_images(
+        tristan_collection,
+        tristan_collection.parent / "binned.h5",
+        test_image_size,
+        nbins=20,
+        max_workers=1,
+        save_index=False,
+        max_block_bytes=3 * 4 * int(np.prod(test_image_size)),
+    )
+    with h5py.File(data_file, "r") as fh:
+        assert fh["data"].shape == (20, *test_image_size)
+        np.testing.assert_array_equal(fh["data"][:, 0, 1], np.ones(20))
+        np.testing.assert_array_equal(fh["data"][:, 3, 2], np.ones(20))
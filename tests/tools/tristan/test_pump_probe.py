@@ -0,0 +1,99 @@
+from pathlib import Path
+
+import h5py
+import numpy as np
+import pytest
+
+from nexgen.nxs_copy.copy_tristan_nexus import single_image_nexus
+from nexgen.tools.tristan_tools import (
+    TristanCue,
+    bin_pump_probe,
+    bin_pump_probe_images,
+    find_event_files,
+    find_trigger_times,
+)
+
+from .conftest import test_image_size, write_event_file
+
+# Laser triggers every 400 ticks, from t=1000
+triggers = [(TristanCue.TTL_RISING, t) for t in range(1000, 3000, 400)]
+
+
+@pytest.fixture
+def pump_probe_collection(tmp_path: Path) -> Path:
+    """One event per 100 ticks, from t=900, so each trigger is followed by 4 events at \
+    delays of 0, 100, 200 and 300 ticks."""
+    t = list(range(900, 3000, 100))
+    n = len(t)
+    write_event_file(
+        tmp_path / "pp_000001.h5",
+        [1] * n,
+        [0] * n,
+        t,
+        [
+            (TristanCue.SHUTTER_OPEN, 1000),
+            (TristanCue.SHUTTER_CLOSE, 2600),
+            *triggers,
+        ],
+    )
+    # The second module didn't record the triggers
+    write_event_file(tmp_path / "pp_000002.h5", [2] * n, [3] * n, t)
+    with h5py.File(tmp_path / "pp_meta.h5", "w") as fh:
+        fh["ts_qty_module00"] = np.array([n])
+    return tmp_path / "pp_meta.h5"
+
+
+def test_find_trigger_times(pump_probe_collection: Path):
+    files = find_event_files(pump_probe_collection)
+    np.testing.assert_array_equal(
+        find_trigger_times(files[0]), [1000, 1400, 1800, 2200, 2600]
+    )
+    assert len(find_trigger_times(files[1])) == 0
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_bin_pump_probe(pump_probe_collection: Path, max_workers: int):
+    files = find_event_files(pump_probe_collection)
+    images = bin_pump_probe(files, 4, test_image_size, max_workers=max_workers)
+    assert images.shape == (4, *test_image_size)
+    # The event before the first trigger is dropped, 5 cycles after that
+    np.testing.assert_array_equal(images[:, 0, 1], [5, 5, 5, 5])
+    np.testing.assert_array_equal(images[:, 3, 2], [5, 5, 5, 5])
+    # Two phases per period
+    images = bin_pump_probe(files, 2, test_image_size, max_workers=1)
+    np.testing.assert_array_equal(images[:, 0, 1], [10, 10])
+
+
+def test_bin_pump_probe_with_period(pump_probe_collection: Path):
+    files = find_event_files(pump_probe_collection)
+    # Only the first half of the cycle, events with delays 0 and 100 ticks
+    images = bin_pump_probe(
+        files[:1], 2, test_image_size, period=200 / 6.4e8, max_workers=1
+    )
+    np.testing.assert_array_equal(images[:, 0, 1], [5, 5])
+
+
+def test_bin_pump_probe_without_triggers(tmp_path: Path):
+    write_event_file(tmp_path / "pp_000001.h5", [0], [0], [0])
+    with pytest.raises(ValueError):
+        bin_pump_probe([tmp_path / "pp_000001.h5"], 4, test_image_size)
+
+
+def test_bin_pump_probe_images_to_nexus(
+    pump_probe_collection: Path, dummy_tristan_nexus: Path
+):
+    data_file = bin_pump_probe_images(
+        pump_probe_collection,
+        pump_probe_collection.parent / "pp_binned.h5",
+        test_image_size,
+        4,
+        max_workers=1,
+    )
+    with h5py.File(data_file, "r") as fh:
+        # Events while the shutter was open only, 1000 <= t < 2600
+        np.testing.assert_array_equal(fh["data"][:, 0, 1], [4, 4, 4, 4])
+
+    nxs_file = single_image_nexus(data_file, dummy_tristan_nexus, pump_probe_bins=4)
+    with h5py.File(nxs_file, "r") as fh:
+        assert fh["entry/data/data"].shape == (4, *test_image_size)
+        assert len(fh["entry/data/omega"]) == 4
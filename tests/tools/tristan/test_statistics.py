@@ -0,0 +1,116 @@
+from unittest.mock import MagicMock
+
+import h5py
+import numpy as np
+import pytest
+
+from nexgen.nxs_write.nxmx_writer import EventNXmxFileWriter
+from nexgen.tools.constants import clock_freq
+from nexgen.tools.tristan_tools.statistics import (
+    collect_event_statistics,
+    module_statistics,
+    write_event_statistics,
+)
+from nexgen.tools.tristan_tools.timestamp_index import (
+    build_module_index,
+    load_timestamp_index,
+)
+
+from .conftest import write_event_file
+
+
+def test_module_statistics(tristan_collection):
+    filename = tristan_collection.parent / "test_000001.h5"
+    stats = module_statistics(filename, 1000)
+    assert stats.event_file == "test_000001.h5"
+    assert stats.num_events == 20
+    assert (stats.t_first, stats.t_last) == (1000, 2900)
+    assert list(stats.shutter_open) == [1000]
+    assert list(stats.shutter_close) == [3000]
+    assert stats.rate_start == 1
+    assert list(stats.counts) == [10, 10]
+    # The timestamp index is built in the same pass
+    index = build_module_index(filename)
+    assert stats.index.chunk_size == index.chunk_size
+    assert stats.index.num_events == index.num_events
+    np.testing.assert_array_equal(stats.index.t_min, index.t_min)
+    np.testing.assert_array_equal(stats.index.t_max, index.t_max)
+
+
+def test_module_statistics_with_events_out_of_order(tmp_path):
+    filename = tmp_path / "test_000001.h5"
+    write_event_file(
+        filename, [0] * 10, [0] * 10, [950, 20, 30, 40, 50, 60, 70, 80, 0, 999]
+    )
+    stats = module_statistics(filename, 100, block_size=4)
+    assert stats.rate_start == 0
+    assert list(stats.counts) == [8, 0, 0, 0, 0, 0, 0, 0, 0, 2]
+    assert list(stats.index.t_min) == [20, 50, 0]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_collect_event_statistics(tristan_collection, max_workers):
+    stats = collect_event_statistics(
+        tristan_collection, rate_bin_width=500 / clock_freq, max_workers=max_workers
+    )
+    assert [m.event_file for m in stats.modules] == ["test_000001.h5", "test_000002.h5"]
+    assert list(stats.events_per_module) == [20, 20]
+    assert stats.total_events == 40
+    assert stats.time_range == (1000, 2900)
+    assert (stats.shutter_open, stats.shutter_close) == (1000, 3000)
+    assert stats.collection_time == pytest.approx(2000 / clock_freq)
+    assert list(stats.rate_edges) == [1000, 1500, 2000, 2500, 3000]
+    assert list(stats.counts) == [10, 10, 10, 10]
+    np.testing.assert_allclose(stats.count_rate, 10 / (500 / clock_freq))
+    assert stats.mean_count_rate == pytest.approx(40 / (2000 / clock_freq))
+    # The timestamp index was built in the same pass and saved
+    assert load_timestamp_index(tristan_collection).keys() == {
+        "test_000001.h5",
+        "test_000002.h5",
+    }
+
+
+def test_collection_time_without_shutter_cues(tmp_path):
+    write_event_file(tmp_path / "test_000001.h5", [0] * 3, [0] * 3, [100, 200, 400])
+    with h5py.File(tmp_path / "test_meta.h5", "w") as fh:
+        fh["ts_qty_module00"] = np.array([3])
+    stats = collect_event_statistics(tmp_path / "test_meta.h5", max_workers=1)
+    assert stats.shutter_open is None and stats.shutter_close is None
+    assert stats.collection_time == stats.time_span == pytest.approx(300 / clock_freq)
+
+
+def test_collect_event_statistics_fails_without_event_files(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        collect_event_statistics(tmp_path / "test_meta.h5")
+
+
+def test_write_event_statistics(tristan_collection, tmp_path):
+    stats = collect_event_statistics(tristan_collection, max_workers=1)
+    with h5py.File(tmp_path / "test.nxs", "w") as nxs:
+        write_event_statistics(nxs, stats)
+        # Rewriting replaces the group
+        write_event_statistics(nxs, stats)
+    with h5py.File(tmp_path / "test.nxs", "r") as nxs:
+        grp = nxs["/entry/instrument/detector/event_statistics"]
+        assert grp.attrs["NX_class"] == b"NXcollection"
+        assert list(grp["events_per_module"]) == [20, 20]
+        assert grp["total_events"][()] == 40
+        assert grp["shutter_open_time"][()] == pytest.approx(1000 / clock_freq)
+        assert grp["collection_time"].attrs["units"] == b"s"
+        assert len(grp["count_rate"]) == len(grp["count_rate_time"])
+
+
+def test_EventNXmxFileWriter_adds_event_statistics(tristan_collection):
+    nxs_file = tristan_collection.parent / "test.nxs"
+    with h5py.File(nxs_file, "w") as nxs:
+        nxs["/entry/instrument/detector/count_time"] = 10.0
+    writer = EventNXmxFileWriter(
+        nxs_file, MagicMock(), MagicMock(), MagicMock(), MagicMock(), MagicMock()
+    )
+    stats = writer.add_event_statistics(max_workers=1)
+    assert stats.total_events == 40
+    with h5py.File(nxs_file, "r") as nxs:
+        count_time = nxs["/entry/instrument/detector/count_time"]
+        assert count_time[()] == pytest.approx(2000 / clock_freq)
+        assert count_time.attrs["units"] == b"s"
+        assert "/entry/instrument/detector/event_statistics/count_rate" in nxs
@@ -0,0 +1,137 @@
+import h5py
+import numpy as np
+import pytest
+
+from nexgen.tools.tristan_tools.binning import bin_events, time_bin_edges
+from nexgen.tools.tristan_tools.events import find_event_files
+from nexgen.tools.tristan_tools.timestamp_index import (
+    ChunkTimeIndex,
+    build_module_index,
+    build_timestamp_index,
+    get_timestamp_index,
+    index_time_range,
+    iter_events_in_range,
+    load_timestamp_index,
+    save_timestamp_index,
+)
+
+from .conftest import test_image_size, write_event_file
+
+
+def test_build_module_index(tristan_collection):
+    idx = build_module_index(tristan_collection.parent / "test_000001.h5")
+    assert idx.event_file == "test_000001.h5"
+    assert idx.chunk_size == 8
+    assert idx.num_events == 20
+    assert list(idx.t_min) == [1000, 1800, 2600]
+    assert list(idx.t_max) == [1700, 2500, 2900]
+    assert idx.time_range == (1000, 2900)
+
+
+def test_build_module_index_unsorted_events(tmp_path):
+    t = [50, 10, 40, 30, 90, 70]
+    write_event_file(tmp_path / "test_000001.h5", [0] * 6, [0] * 6, t)
+    idx = build_module_index(tmp_path / "test_000001.h5", chunk_size=4)
+    assert list(idx.t_min) == [10, 70]
+    assert list(idx.t_max) == [50, 90]
+
+
+def test_event_ranges_merges_consecutive_chunks():
+    idx = ChunkTimeIndex(
+        "test_000001.h5",
+        10,
+        35,
+        np.array([0, 100, 200, 300]),
+        np.array([99, 199, 299, 399]),
+    )
+    assert list(idx.chunks_in_range(150, 250)) == [1, 2]
+    assert idx.event_ranges(150, 250) == [(10, 30)]
+    assert idx.event_ranges(250, 1000) == [(20, 35)]
+    assert idx.event_ranges(400, 500) == []
+
+
+def test_build_timestamp_index_in_parallel(tristan_collection):
+    files = find_event_files(tristan_collection)
+    serial = build_timestamp_index(files, max_workers=1)
+    parallel = build_timestamp_index(files, max_workers=2)
+    assert serial.keys() == parallel.keys() == {"test_000001.h5", "test_000002.h5"}
+    for name, idx in serial.items():
+        np.testing.assert_array_equal(idx.t_min, parallel[name].t_min)
+        np.testing.assert_array_equal(idx.t_max, parallel[name].t_max)
+    assert index_time_range(serial) == (1000, 2900)
+
+
+def test_save_and_load_timestamp_index(tristan_collection):
+    indexes = build_timestamp_index(find_event_files(tristan_collection))
+    sidecar = save_timestamp_index(indexes, tristan_collection)
+    assert sidecar.name == "test_ts_index.h5"
+    loaded = load_timestamp_index(tristan_collection)
+    assert loaded.keys() == indexes.keys()
+    for name, idx in loaded.items():
+        assert idx.chunk_size == indexes[name].chunk_size
+        assert idx.num_events == indexes[name].num_events
+        np.testing.assert_array_equal(idx.t_min, indexes[name].t_min)
+
+
+def test_save_timestamp_index_in_meta_file(tristan_collection):
+    indexes = build_timestamp_index(find_event_files(tristan_collection))
+    assert save_timestamp_index(indexes, tristan_collection, in_meta_file=True) == (
+        tristan_collection
+    )
+    with h5py.File(tristan_collection, "r") as fh:
+        assert "timestamp_index/test_000001.h5/t_min" in fh
+        assert "ts_qty_module00" in fh
+    assert load_timestamp_index(tristan_collection) is not None
+
+
+def test_load_timestamp_index_out_of_date(tristan_collection):
+    assert load_timestamp_index(tristan_collection) is None
+    indexes = build_timestamp_index(find_event_files(tristan_collection))
+    save_timestamp_index(indexes, tristan_collection)
+    write_event_file(tristan_collection.parent / "test_000001.h5", [0], [0], [5])
+    assert load_timestamp_index(tristan_collection) is None
+
+
+def test_get_timestamp_index_builds_and_saves(tristan_collection):
+    indexes = get_timestamp_index(tristan_collection, max_workers=1)
+    assert (tristan_collection.parent / "test_ts_index.h5").exists()
+    assert get_timestamp_index(tristan_collection).keys() == indexes.keys()
+
+
+def test_get_timestamp_index_in_read_only_directory(
+    tristan_collection, monkeypatch, caplog
+):
+    def read_only(*args, **kwargs):
+        raise PermissionError("Read-only file system")
+
+    monkeypatch.setattr(
+        "nexgen.tools.tristan_tools.timestamp_index.save_timestamp_index", read_only
+    )
+    indexes = get_timestamp_index(tristan_collection, max_workers=1)
+    assert list(indexes.keys()) == ["test_000001.h5", "test_000002.h5"]
+    assert "Unable to save the timestamp index" in caplog.text
+
+
+def test_get_timestamp_index_without_saving(tristan_collection):
+    get_timestamp_index(tristan_collection, max_workers=1, save=False)
+    assert not (tristan_collection.parent / "test_ts_index.h5").exists()
+
+
+def test_iter_events_in_range_skips_chunks(tristan_collection):
+    event_file = tristan_collection.parent / "test_000001.h5"
+    idx = build_module_index(event_file)
+    blocks = list(iter_events_in_range(event_file, 1900, 2100, idx))
+    assert [first for first, _ in blocks] == [8]
+    assert list(blocks[0][1][1]) == list(range(1800, 2600, 100))
+    assert len(list(iter_events_in_range(event_file, 1900, 2100))) == 3
+
+
+@pytest.mark.parametrize("t_range", [(1000, 3000), (1850, 2250)])
+def test_bin_events_with_index(tristan_collection, t_range):
+    files = find_event_files(tristan_collection)
+    edges = time_bin_edges(*t_range, 4)
+    indexes = build_timestamp_index(files)
+    np.testing.assert_array_equal(
+        bin_events(files, edges, test_image_size, max_workers=1, indexes=indexes),
+        bin_events(files, edges, test_image_size, max_workers=1),
+    )